@@ -0,0 +1,109 @@
+"""Compare page-load time and bytes for the default and lean browser profiles.
+
+Loads each URL with a default Chrome and with a lean one (see
+create_chrome_driver), waiting for the network to go quiet so both
+profiles are measured over the whole page, and writes a JSON report
+with the per-profile timings and transfer sizes. It also counts the menu
+items each load shows (Nutrislice tiles, Starbucks categories) and exits
+with status 1 if the lean profile shows a different number than the
+default one. Unlike bench_parsers.py this hits the live sites.
+
+    python benchmarks/bench_browser.py
+    python benchmarks/bench_browser.py --site starbucks --repeat 5
+"""
+import argparse
+import json
+import os
+import sys
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from run_metrics import RunMetrics, report_path, write_atomic
+from scraper_common import create_chrome_driver, load_page
+from wait_engine import waits_for, network_idle
+from nutrislice_scraper import MENU_ITEM_SELECTOR, click_view_menus_button
+from starbucks_scraper import CATEGORY_PATH, StarbucksScraper
+
+DEFAULT_URLS = {
+    'nutrislice': 'https://cpp.nutrislice.com/menu/centerpointe-dining-commons/lunch',
+    'starbucks': 'https://www.starbucks.com/menu'
+}
+
+def count_nutrislice_items(driver):
+    """Menu tiles shown once past the View Menus splash"""
+    from selenium.webdriver.common.by import By
+    
+    click_view_menus_button(driver)
+    return len(driver.find_elements(By.CSS_SELECTOR, MENU_ITEM_SELECTOR))
+
+def count_starbucks_items(driver):
+    """Menu categories the scraper's browser discovery would find"""
+    scraper = StarbucksScraper()
+    hrefs = '\n'.join(scraper.browser_links(driver, "a[href*='/menu/']"))
+    return len(scraper.links_in_html(hrefs, CATEGORY_PATH, scraper.canonical_category_url))
+
+ITEM_COUNTERS = {'nutrislice': count_nutrislice_items, 'starbucks': count_starbucks_items}
+
+def measure(site, url, lean, repeat):
+    """Load url repeat times with one driver; return that profile's metrics report and item counts"""
+    metrics = RunMetrics(f"{site}[{'lean' if lean else 'default'}]")
+    driver = create_chrome_driver(metrics, lean=lean)
+    counts = []
+    try:
+        for _ in range(repeat):
+            # Start each load from a blank page so nothing is served from the previous one
+            driver.get('about:blank')
+            driver.delete_all_cookies()
+            load_page(driver, url, metrics)
+            waits_for(driver).maybe('network_idle', network_idle())
+            counts.append(ITEM_COUNTERS[site](driver))
+    finally:
+        driver.quit()
+    return metrics.report(), counts
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Page-load time and bytes, default vs lean browser")
+    parser.add_argument('--site', choices=sorted(DEFAULT_URLS), nargs='+', default=sorted(DEFAULT_URLS), help="sites to load")
+    parser.add_argument('--repeat', type=int, default=3, help="loads per profile (default: 3)")
+    parser.add_argument('--report', default=report_path('browser_profile_report.json'), help="JSON report to write (default: reports/browser_profile_report.json)")
+    args = parser.parse_args(argv)
+
+    report = {}
+    mismatches = []
+    print(f"{'site':<12} {'profile':<8} {'p50 load':>9} {'max load':>9} {'bytes/page':>12} {'items':>6}")
+    for site in args.site:
+        report[site] = {}
+        for lean in (False, True):
+            profile = 'lean' if lean else 'default'
+            result, counts = measure(site, DEFAULT_URLS[site], lean, args.repeat)
+            suffix = '_lean' if lean else ''
+            phase = result['phases'].get(f'page_load{suffix}', {})
+            per_page = result['counters'].get(f'page_bytes{suffix}', 0) // max(1, args.repeat)
+            report[site][profile] = {
+                'page_load_p50_seconds': phase.get('p50_seconds', 0.0),
+                'page_load_max_seconds': phase.get('max_seconds', 0.0),
+                'bytes_per_page': per_page,
+                'items_per_load': counts,
+                'run': result
+            }
+            print(f"{site:<12} {profile:<8} {phase.get('p50_seconds', 0.0):>8.2f}s {phase.get('max_seconds', 0.0):>8.2f}s "
+                  f"{per_page:>12,} {max(counts, default=0):>6}")
+        
+        # Lean is only worth its savings if it still shows the whole menu
+        default_items = max(report[site]['default']['items_per_load'], default=0)
+        lean_items = max(report[site]['lean']['items_per_load'], default=0)
+        if lean_items != default_items:
+            mismatches.append(f"{site}: lean profile shows {lean_items} items, default {default_items}")
+
+    write_atomic(args.report, json.dumps(report, indent=2) + '\n')
+    print(f"\nWrote {args.report}")
+
+    if mismatches:
+        print("\nLEAN PROFILE MISSES ITEMS:")
+        for mismatch in mismatches:
+            print(f"  ✗ {mismatch}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""End-to-end scraper throughput against the mock menu sites.
+
+Starts mock_sites.py in-process for each menu size and runs the real
+entry points against it, scrape_nutrislice_menu and
+StarbucksScraper.scrape_menu, recording wall time, items/sec and the
+share of items that failed. An item only counts as scraped if its
+calories, protein, carbs, fats and allergens match the mock's source
+data, so a parser that silently reads zeros fails the run, and so does
+one that drops real all-zero products (every tenth Starbucks product is
+an unsweetened tea). Nothing here touches the real sites. The
+Nutrislice run uses the menu API unless --nutrislice-browser is given,
+which drives the mock menu page in Chrome instead.
+
+    python benchmarks/bench_e2e.py                                # 10, 100 and 1000 items
+    python benchmarks/bench_e2e.py --sizes 100 --latency 0.05 --error-rate 0.05
+    python benchmarks/bench_e2e.py --update-baseline              # record a new baseline
+
+The fetch controller's per-host rate limit is raised to --rate for the
+mock host, since at the production 5 requests/sec it alone would set
+the pace. Exits with status 1 if a run is slower or fails more items
+than e2e_baseline.json allows; the baseline is only compared when it
+was recorded with the same mock settings.
+"""
+from contextlib import redirect_stdout
+import argparse
+import io
+import json
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_FILE = os.path.join(BENCH_DIR, 'e2e_baseline.json')
+
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from mock_sites import MockConfig, MockSites
+from fetch_control import CONTROLLER
+from parse_pipeline import DEFAULT_PARSE_WORKERS, parse_pool, run_parse
+from run_metrics import all_metrics, metrics_for
+import nutrislice_scraper
+from starbucks_scraper import StarbucksScraper
+
+SOURCES = ['nutrislice', 'starbucks']
+
+MENU_DATE = '2025-11-24'
+
+def run_nutrislice(sites, args):
+    url = f"{sites.url}/menu/mock-dining/lunch/{MENU_DATE}"
+    return nutrislice_scraper.scrape_nutrislice_menu(
+        url, use_api=not args.nutrislice_browser, api_base=sites.url, lean=args.lean, parse_workers=args.parse_workers
+    )
+
+def run_starbucks(sites, args):
+    scraper = StarbucksScraper(workers=args.workers, lean=args.lean, base_url=sites.url, parse_workers=args.parse_workers)
+    return scraper.scrape_menu()
+
+RUNNERS = {'nutrislice': run_nutrislice, 'starbucks': run_starbucks}
+
+def reset_state():
+    """Fresh metrics, host limits and breakers, so runs don't inherit each other's"""
+    for metrics in all_metrics():
+        metrics.reset()
+    CONTROLLER.reset()
+
+def mismatches(items, expected):
+    """Names of scraped items that aren't on the mock menu or whose values differ from it"""
+    wrong = []
+    for item in items:
+        values = expected.get(item.name)
+        if values is None or values != {'calories': item.calories, 'protein': item.protein, 'carbs': item.carbs,
+                                        'fats': item.fats, 'allergens': sorted(item.allergen_list)}:
+            wrong.append(item.name)
+    return wrong
+
+def run_once(source, size, args):
+    config = MockConfig(items=size, latency=args.latency, error_rate=args.error_rate,
+                        broken_rate=args.broken_rate, seed=args.seed)
+    reset_state()
+    log = io.StringIO()
+    with MockSites(config) as sites:
+        start = time.perf_counter()
+        with redirect_stdout(sys.stdout if args.verbose else log):
+            items = RUNNERS[source](sites, args)
+        wall = time.perf_counter() - start
+        wrong = mismatches(items, sites.expected_items(source))
+
+    for name in wrong[:3]:
+        print(f"  {source}: {name} doesn't match the mock menu")
+    report = metrics_for(source).report()
+    scraped = len(items) - len(wrong)
+    return {
+        'items': scraped,
+        'mismatched': len(wrong),
+        'wall_seconds': wall,
+        'items_per_sec': scraped / wall if wall else 0.0,
+        'failure_rate': 1 - scraped / size if size else 0.0,
+        'retries': report['counters'].get('retries', 0),
+        'requests': sites.stats['requests'],
+        'errors_injected': sites.stats['errors_injected']
+    }
+
+def mock_settings(args):
+    """The settings a baseline is only comparable under"""
+    return {
+        'latency': args.latency, 'error_rate': args.error_rate, 'broken_rate': args.broken_rate, 'seed': args.seed,
+        'rate': args.rate, 'workers': args.workers, 'nutrislice_browser': args.nutrislice_browser
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="End-to-end scraper throughput against mock menu sites")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000], help="items per menu (default: 10 100 1000)")
+    parser.add_argument('--only', choices=SOURCES, help="run only this scraper")
+    parser.add_argument('--latency', type=float, default=0.0, help="mock seconds per response, +-50%% (default: 0)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="share of mock requests answered 503 (default: 0)")
+    parser.add_argument('--broken-rate', type=float, default=0.0, help="share of mock Starbucks products that always fail (default: 0)")
+    parser.add_argument('--seed', type=int, default=0, help="seed for injected errors")
+    parser.add_argument('--rate', type=float, default=200.0, help="requests/sec the fetch controller allows the mock host (default: 200)")
+    parser.add_argument('--workers', type=int, default=4, help="Starbucks product workers (default: 4)")
+    parser.add_argument('--parse-workers', type=int, default=DEFAULT_PARSE_WORKERS, help=f"parse processes (default: {DEFAULT_PARSE_WORKERS})")
+    parser.add_argument('--nutrislice-browser', action='store_true', help="scrape the mock Nutrislice page in Chrome instead of the API")
+    parser.add_argument('--lean', action='store_true', help="lean Chrome for any browser pages")
+    parser.add_argument('--tolerance', type=float, default=0.5, help="allowed slowdown over baseline wall time, 0.5 = 50%% (default: 0.5)")
+    parser.add_argument('--baseline', default=BASELINE_FILE, help="baseline JSON file")
+    parser.add_argument('--update-baseline', action='store_true', help="write the results as the new baseline")
+    parser.add_argument('--output', help="also write the results to this JSON file")
+    parser.add_argument('--verbose', action='store_true', help="show the scrapers' own output")
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.update_baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+    comparable = baseline.get('settings') == mock_settings(args)
+
+    CONTROLLER.rate = args.rate
+    CONTROLLER.burst = max(CONTROLLER.burst, int(args.rate))
+    # Start the parse processes now rather than inside the first timed run
+    run_parse(parse_pool(args.parse_workers), len, '')
+
+    results = {}
+    failures = []
+    print(f"{'run':<18} {'items':>6} {'wall':>8} {'items/s':>9} {'failed':>7} {'retries':>8}  vs baseline")
+    for source in [args.only] if args.only else SOURCES:
+        for size in args.sizes:
+            name = f"{source}:{size}"
+            result = run_once(source, size, args)
+            results[name] = result
+
+            comparison = 'no baseline'
+            base = baseline.get('runs', {}).get(name)
+            if base and not comparable:
+                comparison = 'baseline has other mock settings'
+            elif base:
+                ratio = result['wall_seconds'] / base['wall_seconds'] if base['wall_seconds'] else 1.0
+                comparison = f"{ratio:.2f}x time"
+                # 50ms of slack keeps the small menus' runs from flapping
+                if result['wall_seconds'] > base['wall_seconds'] * (1 + args.tolerance) + 0.05:
+                    failures.append(f"{name}: {result['wall_seconds']:.2f}s is {ratio:.2f}x the baseline {base['wall_seconds']:.2f}s")
+                # One item of slack, so a single flaky item doesn't fail a small run
+                if result['failure_rate'] > base['failure_rate'] + 1 / size:
+                    failures.append(f"{name}: {result['failure_rate']:.1%} of items failed, baseline {base['failure_rate']:.1%}")
+                    comparison += ', FAILURES'
+
+            print(f"{name:<18} {result['items']:>6} {result['wall_seconds']:>7.2f}s {result['items_per_sec']:>9.1f} "
+                  f"{result['failure_rate']:>6.1%} {result['retries']:>8}  {comparison}")
+
+    rounded = {name: {key: round(value, 4) if isinstance(value, float) else value for key, value in result.items()}
+               for name, result in results.items()}
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'settings': mock_settings(args), 'runs': rounded}, f, indent=2)
+            f.write('\n')
+        print(f"\nWrote results to {args.output}")
+
+    if args.update_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({'settings': mock_settings(args), 'runs': rounded}, f, indent=2)
+            f.write('\n')
+        print(f"\nWrote baseline for {len(results)} runs to {args.baseline}")
+
+    if failures:
+        print("\nREGRESSIONS:")
+        for failure in failures:
+            print(f"  ✗ {failure}")
+        sys.exit(1)
+
+    print("\n✓ End-to-end runs within baseline")
+
+if __name__ == "__main__":
+    main()
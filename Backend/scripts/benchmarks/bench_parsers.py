@@ -0,0 +1,232 @@
+"""Offline parser benchmarks for the menu scrapers.
+
+Runs the HTML parsing used by both scrapers against the saved pages in
+fixtures/ and compares per-call latency and memory with baseline.json.
+Nothing here touches the network or starts a browser.
+
+Latency is compared relative to a calibration loop timed in the same
+run (the standard library's HTMLParser over the Nutrislice fixture), so
+a baseline recorded on one machine holds on a faster or slower one.
+baseline.json stores each benchmark's mean as a multiple of that loop.
+
+    python benchmarks/bench_parsers.py                    # compare with baseline
+    python benchmarks/bench_parsers.py --update-baseline  # record a new baseline
+
+Exits with status 1 if any benchmark is slower or allocates more than
+the baseline allows, or if a parser stops returning the expected values.
+"""
+from html.parser import HTMLParser
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURE_DIR = os.path.join(BENCH_DIR, 'fixtures')
+BASELINE_FILE = os.path.join(BENCH_DIR, 'baseline.json')
+
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from bs4 import BeautifulSoup
+from run_metrics import all_metrics
+import nutrislice_scraper
+from menu_item import MenuItem, allergen_bits
+from starbucks_scraper import StarbucksScraper
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURE_DIR, name), encoding='utf-8') as f:
+        return f.read()
+
+def build_benchmarks():
+    """Return [(name, func, expected_result)]"""
+    modal_html = load_fixture('nutrislice_modal.html')
+    modal_soup = BeautifulSoup(modal_html, nutrislice_scraper.HTML_PARSER)
+    nutrition_html = load_fixture('starbucks_nutrition.html')
+    nutrition_soup = BeautifulSoup(nutrition_html, 'html.parser')
+    state_html = load_fixture('starbucks_product_state.html')
+    scraper = StarbucksScraper()
+
+    expected_starbucks = {'calories': 190, 'protein': 13, 'carbs': 19, 'fats': 7, 'allergens': ['M']}
+
+    return [
+        (
+            'nutrislice.parse_nutrition_html',
+            lambda: nutrislice_scraper.parse_nutrition_html(modal_html, 'Cheeseburger'),
+            MenuItem('Cheeseburger (1 each)', 423, 21, 28, 12, False, allergen_bits('M,S,W'))
+        ),
+        (
+            'nutrislice.parse_allergens',
+            lambda: nutrislice_scraper.parse_allergens(modal_soup),
+            'M,S,W'
+        ),
+        (
+            'starbucks.parse_allergens',
+            lambda: scraper.parse_allergens('Contains: Milk, Soy, Wheat and Tree Nuts (Almond)'),
+            ['M', 'S', 'T', 'W']
+        ),
+        (
+            'starbucks.parse_nutrition_soup',
+            lambda: scraper.parse_nutrition_soup(nutrition_soup),
+            expected_starbucks
+        ),
+        (
+            'starbucks.parse_product_html[css]',
+            lambda: scraper.parse_product_html(nutrition_html),
+            MenuItem.from_starbucks('Caffè Latte', expected_starbucks)
+        ),
+        (
+            'starbucks.parse_product_html[state]',
+            lambda: scraper.parse_product_html(state_html),
+            MenuItem.from_starbucks('Caffè Latte', expected_starbucks)
+        ),
+    ]
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+class TagCounter(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.tags = 0
+
+    def handle_starttag(self, tag, attrs):
+        self.tags += 1
+
+def calibration():
+    """Mean microseconds of a fixed pure-Python parse, the unit benchmark times are compared in"""
+    html = load_fixture('nutrislice_modal.html')
+
+    def parse():
+        counter = TagCounter()
+        counter.feed(html)
+        counter.close()
+        return counter.tags
+
+    return run_benchmark(parse, 2000, 0)['mean_us']
+
+def reset_metrics():
+    """Drop phase timings the scrapers recorded so they don't pile up across calls"""
+    for metrics in all_metrics():
+        metrics.reset()
+
+def run_benchmark(func, iterations, memory_iterations):
+    """Time func and measure its peak traced memory per call"""
+    # Warm up caches and lazy imports before timing
+    for _ in range(min(50, iterations)):
+        func()
+
+    durations = []
+    for _ in range(iterations):
+        start = time.perf_counter_ns()
+        func()
+        durations.append(time.perf_counter_ns() - start)
+    durations.sort()
+    reset_metrics()
+
+    # tracemalloc slows every allocation, so it gets its own shorter run
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(memory_iterations):
+            reset_metrics()
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            func()
+            peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'mean_us': sum(durations) / len(durations) / 1000,
+        'p50_us': percentile(durations, 0.50) / 1000,
+        'p95_us': percentile(durations, 0.95) / 1000,
+        'peak_kib': max(peaks, default=0) / 1024
+    }
+
+def normalize(result):
+    """Make tuples and lists compare equal to what the expectations use"""
+    if isinstance(result, tuple):
+        return tuple(normalize(value) for value in result)
+    if isinstance(result, dict):
+        return {key: sorted(value) if isinstance(value, list) else value for key, value in result.items()}
+    if isinstance(result, list):
+        return sorted(result)
+    return result
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the scraper parsers")
+    parser.add_argument('--iterations', type=int, default=2000, help="timed calls per benchmark (default: 2000)")
+    parser.add_argument('--memory-iterations', type=int, default=50, help="traced calls per benchmark (default: 50)")
+    parser.add_argument('--tolerance', type=float, default=0.5, help="allowed slowdown over baseline mean, 0.5 = 50%% (default: 0.5)")
+    parser.add_argument('--memory-tolerance', type=float, default=0.1, help="allowed growth over baseline peak memory (default: 0.1)")
+    parser.add_argument('--baseline', default=BASELINE_FILE, help="baseline JSON file")
+    parser.add_argument('--update-baseline', action='store_true', help="write the results as the new baseline")
+    parser.add_argument('--only', help="run only benchmarks whose name contains this text")
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.update_baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f).get('benchmarks', {})
+
+    results = {}
+    failures = []
+
+    unit_us = calibration()
+    print(f"calibration: {unit_us:.1f}us per loop; times below are also shown as multiples of it\n")
+    print(f"{'benchmark':<38} {'mean':>9} {'p50':>9} {'p95':>9} {'peak mem':>10} {'loops':>7}  vs baseline")
+    for name, func, expected in build_benchmarks():
+        if args.only and args.only not in name:
+            continue
+
+        actual = func()
+        if normalize(actual) != normalize(expected):
+            failures.append(f"{name}: returned {actual!r}, expected {expected!r}")
+            print(f"{name:<38} WRONG RESULT")
+            continue
+
+        result = run_benchmark(func, args.iterations, args.memory_iterations)
+        result['mean_loops'] = result['mean_us'] / unit_us
+        results[name] = result
+
+        comparison = 'no baseline'
+        base = baseline.get(name)
+        if base and base.get('mean_loops'):
+            ratio = result['mean_loops'] / base['mean_loops']
+            comparison = f"{ratio:.2f}x time"
+            if ratio > 1 + args.tolerance:
+                failures.append(f"{name}: mean {result['mean_loops']:.2f} calibration loops is {ratio:.2f}x "
+                                f"the baseline {base['mean_loops']:.2f}")
+            if result['peak_kib'] > base['peak_kib'] * (1 + args.memory_tolerance):
+                failures.append(f"{name}: peak {result['peak_kib']:.1f}KiB exceeds baseline {base['peak_kib']:.1f}KiB")
+                comparison += ', MEMORY'
+
+        print(f"{name:<38} {result['mean_us']:>7.1f}us {result['p50_us']:>7.1f}us {result['p95_us']:>7.1f}us "
+              f"{result['peak_kib']:>7.1f}KiB {result['mean_loops']:>7.2f}  {comparison}")
+
+    if args.update_baseline:
+        # Only the calibration-relative mean and the peak memory are compared; the
+        # microsecond figures are kept for reference
+        recorded = {
+            'calibration_us': round(unit_us, 2),
+            'benchmarks': {name: {key: round(value, 6 if key == 'mean_loops' else 2) for key, value in result.items()}
+                           for name, result in results.items()}
+        }
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(recorded, f, indent=2)
+            f.write('\n')
+        print(f"\nWrote baseline for {len(results)} benchmarks to {args.baseline}")
+
+    if failures:
+        print("\nREGRESSIONS:")
+        for failure in failures:
+            print(f"  ✗ {failure}")
+        sys.exit(1)
+
+    print("\n✓ All benchmarks within baseline")
+
+if __name__ == "__main__":
+    main()
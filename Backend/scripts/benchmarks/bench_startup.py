@@ -0,0 +1,117 @@
+"""Startup-time check for scrape.py.
+
+Runs the commands that should never start a browser (--help, each
+subcommand's --dry-run) in fresh interpreters, and fails if any of them
+imports Selenium, BeautifulSoup or requests, or if their wall time grows
+past startup_baseline.json. Nothing here touches the network.
+
+    python benchmarks/bench_startup.py                    # compare with baseline
+    python benchmarks/bench_startup.py --update-baseline  # record a new baseline
+
+Exits with status 1 on any regression.
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRAPE_PY = os.path.join(os.path.dirname(BENCH_DIR), 'scrape.py')
+BASELINE_FILE = os.path.join(BENCH_DIR, 'startup_baseline.json')
+
+# Modules only the browser or HTTP code paths may load
+HEAVY_MODULES = ['selenium', 'bs4', 'requests', 'lxml.html', 'numpy', 'pymongo']
+
+COMMANDS = {
+    'help': ['--help'],
+    'nutrislice --help': ['nutrislice', '--help'],
+    'nutrislice --dry-run': ['nutrislice', '--dry-run', '--locations', 'centerpointe-dining-commons', '--days', '7'],
+    'starbucks --dry-run': ['starbucks', '--dry-run'],
+    'all --dry-run': ['all', '--dry-run']
+}
+
+# "import time:  self | cumulative | module" lines from python -X importtime
+IMPORT_LINE = re.compile(r'^import time:\s+\d+ \|\s+\d+ \|\s*(\S+)')
+
+def heavy_imports(command):
+    """Heavy top-level packages a command imports"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', SCRAPE_PY] + command,
+        capture_output=True, text=True, check=True
+    )
+    modules = {match.group(1) for match in map(IMPORT_LINE.match, result.stderr.splitlines()) if match}
+    return sorted(
+        heavy for heavy in HEAVY_MODULES
+        if any(module == heavy or module.startswith(heavy + '.') for module in modules)
+    )
+
+def median_ms(argv, repeat):
+    """Median wall time of a process in milliseconds"""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(argv, capture_output=True, check=True)
+        durations.append((time.perf_counter() - start) * 1000)
+    durations.sort()
+    return durations[len(durations) // 2]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Startup time and imports of scrape.py")
+    parser.add_argument('--repeat', type=int, default=7, help="timed runs per command (default: 7)")
+    parser.add_argument('--tolerance', type=float, default=0.5, help="allowed slowdown over baseline, 0.5 = 50%% (default: 0.5)")
+    parser.add_argument('--baseline', default=BASELINE_FILE, help="baseline JSON file")
+    parser.add_argument('--update-baseline', action='store_true', help="write the results as the new baseline")
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.update_baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    # The interpreter's own startup, so a slow machine doesn't read as a regression
+    interpreter_ms = median_ms([sys.executable, '-c', 'pass'], args.repeat)
+    print(f"{'command':<24} {'median':>9} {'over python':>12}  vs baseline")
+    print(f"{'(python -c pass)':<24} {interpreter_ms:>7.1f}ms")
+
+    results = {}
+    failures = []
+    for name, command in COMMANDS.items():
+        heavy = heavy_imports(command)
+        if heavy:
+            failures.append(f"{name}: imports {', '.join(heavy)}")
+
+        overhead_ms = max(0.0, median_ms([sys.executable, SCRAPE_PY] + command, args.repeat) - interpreter_ms)
+        results[name] = {'overhead_ms': round(overhead_ms, 1)}
+
+        comparison = 'no baseline'
+        base = baseline.get(name)
+        if base:
+            # A few milliseconds of slack keeps tiny overheads from flapping
+            allowed = base['overhead_ms'] * (1 + args.tolerance) + 10
+            comparison = f"{overhead_ms - base['overhead_ms']:+.1f}ms"
+            if overhead_ms > allowed:
+                failures.append(f"{name}: {overhead_ms:.1f}ms over interpreter startup, baseline {base['overhead_ms']:.1f}ms")
+        if heavy:
+            comparison += f", HEAVY IMPORTS: {', '.join(heavy)}"
+
+        print(f"{name:<24} {overhead_ms + interpreter_ms:>7.1f}ms {overhead_ms:>10.1f}ms  {comparison}")
+
+    if args.update_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+            f.write('\n')
+        print(f"\nWrote baseline for {len(results)} commands to {args.baseline}")
+
+    if failures:
+        print("\nREGRESSIONS:")
+        for failure in failures:
+            print(f"  ✗ {failure}")
+        sys.exit(1)
+
+    print("\n✓ Startup within baseline")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,388 @@
+"""Local stand-ins for the Nutrislice and Starbucks menu sites.
+
+Serves generated menus shaped like the real sites, so whole scrapes can
+run offline (see bench_e2e.py). Any school, meal and date works:
+
+    /menu/api/weeks/school/<school>/menu-type/<meal>/<yyyy>/<mm>/<dd>/   Nutrislice weekly menu API
+    /menu/<school>/<meal>/<yyyy-mm-dd>                                   Nutrislice menu page (View Menus
+                                                                         splash, tiles, nutrition modals)
+    /menu                                                                Starbucks menu, links to categories
+    /menu/drinks/<category>, /menu/food/<category>                       product links, with size variants
+    /menu/product/<id>/<hot|iced>/nutrition                              embedded state or nutrition panel
+
+Latency and errors are injected per request: every response waits
+latency seconds (+-50% jitter), error_rate of requests get a 503, and
+broken_rate of the products always answer 500. Choices are seeded, so a
+configuration always breaks the same products.
+
+    python benchmarks/mock_sites.py --items 100 --latency 0.05 --error-rate 0.02
+"""
+from dataclasses import dataclass
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import argparse
+import html
+import json
+import random
+import re
+import threading
+import time
+
+# Starbucks products per category page
+CATEGORY_SIZE = 25
+
+# Every this many Starbucks products is an unsweetened tea with all-zero nutrition
+ALL_ZERO_EVERY = 10
+
+ALLERGEN_ICONS = ['Milk', 'Egg', 'Soy', 'Wheat', 'Tree Nut', 'Peanut', 'Fish', 'Sesame']
+
+# Menus/*.csv allergen code of each allergen the mock sites name
+ALLERGEN_CODES = {'Milk': 'M', 'Egg': 'E', 'Soy': 'S', 'Wheat': 'W', 'Tree Nut': 'T', 'Peanut': 'P', 'Fish': 'F', 'Sesame': 'SS'}
+
+NUTRISLICE_API_PATH = re.compile(r'^/menu/api/weeks/school/([^/]+)/menu-type/([^/]+)/(\d{4})/(\d{2})/(\d{2})/?$')
+NUTRISLICE_PAGE_PATH = re.compile(r'^/menu/([^/]+)/([^/]+)/(\d{4}-\d{2}-\d{2})/?$')
+STARBUCKS_CATEGORY_PATH = re.compile(r'^/menu/(drinks|food)/mock-(\d+)/?$')
+STARBUCKS_NUTRITION_PATH = re.compile(r'^/menu/product/(\d+)/(hot|iced)/nutrition/?$')
+
+@dataclass
+class MockConfig:
+    items: int = 100
+    latency: float = 0.0
+    error_rate: float = 0.0
+    broken_rate: float = 0.0
+    # Share of Nutrislice tiles whose food record is in the page's transfer state (the rest need their modal)
+    state_share: float = 0.5
+    # Share of Starbucks product pages with only the server-rendered panel, no embedded state
+    panel_share: float = 0.2
+    seed: int = 0
+
+def nutrislice_food(i):
+    """Menu API food record for generated dish i"""
+    return {
+        'name': f"Mock Dish {i}",
+        'rounded_nutrition_info': {
+            'calories': 150 + (i * 37) % 600,
+            'g_protein': 3 + (i * 7) % 40,
+            'g_carbs': 10 + (i * 11) % 80,
+            'g_fat': round(1 + (i * 13) % 30 + (0.5 if i % 4 == 0 else 0), 1)
+        },
+        'serving_size_info': {'serving_size_amount': str(1 + i % 3), 'serving_size_unit': 'each' if i % 2 else 'ounce'},
+        'icons': {'food_icons': (
+            [{'name': ALLERGEN_ICONS[i % len(ALLERGEN_ICONS)], 'synced_name': ALLERGEN_ICONS[i % len(ALLERGEN_ICONS)]}]
+            + ([{'name': 'Vegetarian', 'synced_name': 'Vegetarian'}] if i % 5 == 0 else [])
+        )}
+    }
+
+def starbucks_product(i):
+    """(form, name, nutrition state) for generated product i"""
+    form = 'hot' if i % 2 else 'iced'
+    if i % ALL_ZERO_EVERY == 0:
+        # A real product, not a page that failed to render: 0 of everything, no allergens
+        return form, f"Mock {'Hot' if form == 'hot' else 'Iced'} Tea {i}", {
+            'calories': {'displayValue': '0'},
+            'additionalFacts': [
+                {'displayName': name, 'value': 0, 'unit': 'g'} for name in ('Total Fat', 'Total Carbohydrates', 'Protein')
+            ],
+            'allergens': ''
+        }
+    name = f"Mock {'Hot' if form == 'hot' else 'Iced'} Drink {i}"
+    nutrition = {
+        'calories': {'displayValue': str(5 + (i * 29) % 450)},
+        'additionalFacts': [
+            {'displayName': 'Total Fat', 'value': (i * 3) % 20, 'unit': 'g'},
+            {'displayName': 'Total Carbohydrates', 'value': (i * 7) % 70, 'unit': 'g'},
+            {'displayName': 'Protein', 'value': (i * 5) % 18, 'unit': 'g'}
+        ],
+        'allergens': 'Contains: Milk' if i % 3 else 'Contains: Soy, Tree Nut'
+    }
+    return form, name, nutrition
+
+def expected_nutrislice_item(i):
+    """(item name, values) a scrape of dish i should produce"""
+    food = nutrislice_food(i)
+    info, serving = food['rounded_nutrition_info'], food['serving_size_info']
+    return f"{food['name']} ({serving['serving_size_amount']} {serving['serving_size_unit']})", {
+        'calories': info['calories'], 'protein': info['g_protein'], 'carbs': info['g_carbs'], 'fats': info['g_fat'],
+        'allergens': sorted(ALLERGEN_CODES[icon['name']] for icon in food['icons']['food_icons'] if icon['name'] in ALLERGEN_CODES)
+    }
+
+def expected_starbucks_item(i):
+    """(item name, values) a scrape of product i should produce"""
+    _, name, nutrition = starbucks_product(i)
+    facts = {fact['displayName']: fact['value'] for fact in nutrition['additionalFacts']}
+    named = nutrition['allergens'].split(':', 1)[1].split(',') if nutrition['allergens'] else []
+    return name, {
+        'calories': int(nutrition['calories']['displayValue']), 'protein': facts['Protein'],
+        'carbs': facts['Total Carbohydrates'], 'fats': facts['Total Fat'],
+        'allergens': sorted(ALLERGEN_CODES[allergen.strip()] for allergen in named)
+    }
+
+MENU_PAGE_SCRIPT = """
+var foods = %s;
+var splash = document.getElementById('splash');
+var menu = document.getElementById('menu');
+document.querySelector('[data-testid="view-menus-button"]').addEventListener('click', function () {
+  splash.remove();
+  foods.forEach(function (entry) {
+    var tile = document.createElement('div');
+    tile.className = 'menu-item-wrapper';
+    tile.setAttribute('data-testid', 'menu-item-' + entry.food.name);
+    tile.textContent = entry.food.name;
+    tile.addEventListener('click', function () { openModal(entry.food); });
+    menu.appendChild(tile);
+  });
+});
+function openModal(food) {
+  var info = food.rounded_nutrition_info;
+  var serving = food.serving_size_info.serving_size_amount + ' ' + food.serving_size_info.serving_size_unit;
+  var icons = food.icons.food_icons.map(function (icon) {
+    return '<li aria-label="Contains ' + icon.name + '" class="icon">' + icon.name + '</li>';
+  }).join('');
+  var dialog = document.createElement('div');
+  dialog.setAttribute('role', 'dialog');
+  dialog.className = 'cdk-overlay-pane modal';
+  dialog.innerHTML = '<button class="close" aria-label="Close dialog">x</button>'
+    + '<menus-food-icons><ul>' + icons + '</ul></menus-food-icons>'
+    + '<div class="nutrition-container">'
+    + '<div class="serving-size"><div class="bold">Serving Size</div><div class="bold">' + serving + '</div></div>'
+    + '<div class="calories-row"><div class="bold">Calories</div><div>' + info.calories + '</div></div>'
+    + '<div class="nutrition-label"><span>Total Fat</span><span>' + info.g_fat + 'g</span></div>'
+    + '<div class="nutrition-label"><span>Total Carbohydrate</span><span>' + info.g_carbs + 'g</span></div>'
+    + '<div class="nutrition-label"><span>Protein</span><span>' + info.g_protein + 'g</span></div>'
+    + '</div>';
+  dialog.querySelector('button.close').addEventListener('click', function () { dialog.remove(); });
+  document.body.appendChild(dialog);
+}
+"""
+
+class MockSites:
+    """The mock server on a background thread; use as a context manager
+
+    Port 0 picks a free port; the server's base URL is .url once started.
+    .stats counts requests served and errors injected.
+    """
+
+    def __init__(self, config=None, host='127.0.0.1', port=0):
+        self.config = config or MockConfig()
+        self.host = host
+        self.port = port
+        self.server = None
+        self.thread = None
+        self.stats = {'requests': 0, 'errors_injected': 0, 'broken_served': 0}
+        self.lock = threading.Lock()
+        self.rng = random.Random(self.config.seed)
+        picker = random.Random(self.config.seed + 1)
+        ids = range(1, self.config.items + 1)
+        self.broken = set(picker.sample(ids, int(round(self.config.broken_rate * self.config.items))))
+        self.panel_only = set(picker.sample(ids, int(round(self.config.panel_share * self.config.items))))
+        # Every other all-zero product, starting with the first, is panel-only: the case a
+        # parser is likeliest to mistake for a page that didn't render
+        self.panel_only |= {i for i in ids if i % (2 * ALL_ZERO_EVERY) == ALL_ZERO_EVERY}
+        self.in_state = set(picker.sample(ids, int(round(self.config.state_share * self.config.items))))
+        self.responses = {}
+
+    def expected_items(self, source):
+        """{item name: calories, protein, carbs, fats and allergen codes} of every item source serves"""
+        expected = expected_nutrislice_item if source == 'nutrislice' else expected_starbucks_item
+        return dict(expected(i) for i in range(1, self.config.items + 1))
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+    def start(self):
+        sites = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                sites.handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def count(self, stat):
+        with self.lock:
+            self.stats[stat] += 1
+
+    def handle(self, request):
+        self.count('requests')
+        config = self.config
+        if config.latency:
+            time.sleep(config.latency * (0.5 + self.rng.random()))
+        with self.lock:
+            inject = config.error_rate and self.rng.random() < config.error_rate
+        if inject:
+            self.count('errors_injected')
+            return self.send(request, 503, 'text/plain', 'Service Unavailable (injected)')
+
+        path = request.path.split('?', 1)[0].split('#', 1)[0]
+        route = self.route(path)
+        if route is None:
+            return self.send(request, 404, 'text/plain', 'Not Found')
+        self.send(request, *route)
+
+    def route(self, path):
+        """(status, content type, body) for path, or None for a 404"""
+        match = NUTRISLICE_API_PATH.match(path)
+        if match:
+            return 200, 'application/json', self.cached(path, lambda: self.nutrislice_week(date(*map(int, match.groups()[2:]))))
+        match = STARBUCKS_NUTRITION_PATH.match(path)
+        if match:
+            product = int(match.group(1))
+            if not 1 <= product <= self.config.items or starbucks_product(product)[0] != match.group(2):
+                return None
+            if product in self.broken:
+                self.count('broken_served')
+                return 500, 'text/plain', 'Internal Server Error'
+            return 200, 'text/html', self.cached(path, lambda: self.starbucks_nutrition(product))
+        match = STARBUCKS_CATEGORY_PATH.match(path)
+        if match:
+            category = int(match.group(2))
+            if category >= self.category_count():
+                return None
+            return 200, 'text/html', self.cached(path, lambda: self.starbucks_category(category))
+        if path.rstrip('/') == '/menu':
+            return 200, 'text/html', self.cached('/menu', self.starbucks_menu)
+        match = NUTRISLICE_PAGE_PATH.match(path)
+        if match:
+            return 200, 'text/html', self.cached(path, self.nutrislice_page)
+        return None
+
+    def cached(self, key, build):
+        """Bodies are generated once per path; big menus stay cheap to serve"""
+        with self.lock:
+            body = self.responses.get(key)
+        if body is None:
+            body = build().encode('utf-8')
+            with self.lock:
+                self.responses[key] = body
+        return body
+
+    def send(self, request, status, content_type, body):
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        request.send_response(status)
+        request.send_header('Content-Type', f'{content_type}; charset=utf-8')
+        request.send_header('Content-Length', str(len(body)))
+        request.end_headers()
+        request.wfile.write(body)
+
+    def nutrislice_week(self, menu_date):
+        """Weekly API response with the same generated menu every day, split into sections"""
+        menu_items = []
+        for i in range(1, self.config.items + 1):
+            if i % 10 == 1:
+                menu_items.append({'is_section_title': True, 'text': f"Station {i // 10 + 1}", 'food': None})
+            menu_items.append({'is_section_title': False, 'food': nutrislice_food(i)})
+        week_start = menu_date - timedelta(days=(menu_date.weekday() + 1) % 7)
+        days = [{'date': (week_start + timedelta(days=d)).isoformat(), 'menu_items': menu_items} for d in range(7)]
+        return json.dumps({'start_date': week_start.isoformat(), 'days': days})
+
+    def nutrislice_page(self):
+        foods = [{'food': nutrislice_food(i)} for i in range(1, self.config.items + 1)]
+        # Angular's transfer state: the server-side API responses the app was rendered from,
+        # here holding only the tiles the page "knows"
+        state = {'menu-week': {'status': 200, 'body': {'days': [{'menu_items': [
+            entry for i, entry in enumerate(foods, 1) if i in self.in_state
+        ]}]}}}
+        state_json = json.dumps(state).replace('</', '<\\/')
+        return (
+            '<!DOCTYPE html><html><head><title>Mock Nutrislice</title></head><body>'
+            '<div id="splash"><button data-testid="view-menus-button">View Menus</button></div>'
+            '<div id="menu"></div>'
+            f'<script id="ng-state" type="application/json">{state_json}</script>'
+            f'<script>{MENU_PAGE_SCRIPT % json.dumps(foods)}</script></body></html>'
+        )
+
+    def category_count(self):
+        return max(1, -(-self.config.items // CATEGORY_SIZE))
+
+    def category_path(self, category):
+        return f"/menu/{'drinks' if category % 3 else 'food'}/mock-{category}"
+
+    def starbucks_menu(self):
+        links = ''.join(f'<li><a href="{self.category_path(c)}">Category {c}</a></li>' for c in range(self.category_count()))
+        return f'<!DOCTYPE html><html><head><title>Menu: Starbucks Coffee Company</title></head><body><ul>{links}</ul></body></html>'
+
+    def starbucks_category(self, category):
+        links = []
+        first = category * CATEGORY_SIZE + 1
+        for i in range(first, min(first + CATEGORY_SIZE, self.config.items + 1)):
+            form, name, _ = starbucks_product(i)
+            # Size variants and tracking parameters, like the real category pages
+            links.append(f'<a href="/menu/product/{i}/{form}?parent=%2Fdrinks">{html.escape(name)}</a>')
+            links.append(f'<a href="/menu/product/{i}/{form}/grande">Grande</a>')
+        return f'<!DOCTYPE html><html><body><h1>Category {category}</h1>{"".join(links)}</body></html>'
+
+    def starbucks_nutrition(self, product):
+        form, name, nutrition = starbucks_product(product)
+        title = f'<title>{html.escape(name)}: Starbucks Coffee Company</title>'
+        if product not in self.panel_only:
+            state = {'ordering': {'productDetails': {f'{product}/{form}': {'products': [
+                {'name': name, 'productNumber': product, 'formCode': form.title(),
+                 'sizes': [{'sizeCode': 'Grande', 'default': True, 'nutrition': nutrition}]}
+            ]}}}}
+            return f'<!DOCTYPE html><html><head>{title}</head><body><div id="root"></div><script>window.__BOOTSTRAP = {json.dumps(state)};</script></body></html>'
+
+        # Same markup as the live panel (see fixtures/starbucks_nutrition.html): list rows,
+        # then protein in a div of its own, and the allergen line in p.my1
+        def fact(tag, fact):
+            return (f'<{tag} class="container___Ds7kK"><span class="text-semibold">{fact["displayName"]}</span> '
+                    f'<span class="text-semibold">{fact["value"]} g</span></{tag}>')
+
+        rows = ''.join(fact('li', f) for f in nutrition['additionalFacts'] if f['displayName'] != 'Protein')
+        protein = ''.join(fact('div', f) for f in nutrition['additionalFacts'] if f['displayName'] == 'Protein')
+        return (
+            f'<!DOCTYPE html><html><head>{title}</head><body><main class="productNutrition">'
+            f'<h1 class="text-bold sb-heading">{html.escape(name)}</h1>'
+            f'<p class="text-semibold">Calories <span data-e2e="calories">{nutrition["calories"]["displayValue"]}</span></p>'
+            f'<div data-e2e="nutritionSection" class="nutritionSection"><ul class="nutritionList">{rows}</ul>{protein}</div>'
+            f'<div data-e2e="allergensSection" class="allergensSection"><h2>Allergens</h2>'
+            f'<p class="my1">{nutrition["allergens"]}</p></div>'
+            '</main></body></html>'
+        )
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve mock Nutrislice and Starbucks menu sites")
+    parser.add_argument('--port', type=int, default=8800, help="port to listen on (default: 8800)")
+    parser.add_argument('--items', type=int, default=100, help="items per menu (default: 100)")
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds added to every response, +-50%% (default: 0)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="share of requests answered 503 (default: 0)")
+    parser.add_argument('--broken-rate', type=float, default=0.0, help="share of Starbucks products that always answer 500 (default: 0)")
+    parser.add_argument('--seed', type=int, default=0, help="seed for injected errors and page variants")
+    args = parser.parse_args(argv)
+
+    config = MockConfig(items=args.items, latency=args.latency, error_rate=args.error_rate,
+                        broken_rate=args.broken_rate, seed=args.seed)
+    with MockSites(config, port=args.port) as sites:
+        print(f"Mock sites with {args.items} items at {sites.url}")
+        print(f"  Nutrislice: {sites.url}/menu/mock-dining/lunch/{date.today().isoformat()} (API: --api-base {sites.url})")
+        print(f"  Starbucks:  {sites.url}/menu (--base-url {sites.url})")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Stream scraped rows to disk as they are produced, with resumable progress.
+
+Rows are appended to '<output>.partial' and every finished unit of work
+(a product URL, a menu page) is recorded in the '<output>.checkpoint'
+sidecar together with the partial file's size at that point. After a
+crash or kill, a resumed run truncates the partial file back to the last
+checkpointed size, skips the recorded keys and carries on appending.
+The output file itself only appears, atomically, once the crawl finishes.
+"""
+import csv
+import os
+import threading
+
+class Checkpoint:
+    """Append-only sidecar file of finished work keys.
+
+    Each line is '<offset>\\t<key>'. The offset is only meaningful to
+    StreamingCSVWriter; other callers can leave it at 0.
+    """
+
+    def __init__(self, path, resume=False):
+        self.path = path
+        self.done = set()
+        self.last_offset = None
+
+        if resume and os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    # A kill mid-write can leave a torn last line; ignore it
+                    if not line.endswith('\n') or '\t' not in line:
+                        continue
+                    offset, key = line.rstrip('\n').split('\t', 1)
+                    self.done.add(key)
+                    self.last_offset = int(offset)
+
+        self.file = open(path, 'a' if self.done else 'w', encoding='utf-8')
+
+    def __contains__(self, key):
+        return key in self.done
+
+    def __len__(self):
+        return len(self.done)
+
+    def mark_done(self, key, offset=0):
+        self.file.write(f"{offset}\t{key}\n")
+        self.file.flush()
+        self.done.add(key)
+        self.last_offset = offset
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+    def remove(self):
+        """Close and delete the sidecar once the work it tracks is complete"""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+class StreamingCSVWriter:
+    """CSV writer that streams rows to a partial file and checkpoints each key.
+
+    Use as a context manager: a clean exit moves the partial file into place
+    and deletes the checkpoint, while an exception leaves both behind for a
+    later run with resume=True. Safe to share between worker threads.
+    """
+
+    def __init__(self, path, fieldnames, resume=False):
+        self.path = path
+        self.fieldnames = fieldnames
+        self.partial_path = f"{path}.partial"
+        self.lock = threading.Lock()
+        self.rows = 0
+
+        resume = resume and os.path.exists(self.partial_path)
+        self.checkpoint = Checkpoint(f"{path}.checkpoint", resume)
+
+        if self.checkpoint.done:
+            # Drop rows written after the last checkpoint; their key will be redone
+            with open(self.partial_path, 'r+b') as f:
+                f.truncate(self.checkpoint.last_offset)
+            self.file = open(self.partial_path, 'a', newline='', encoding='utf-8')
+            self.writer = csv.DictWriter(self.file, fieldnames=fieldnames)
+            print(f"Resuming {path}: {len(self.checkpoint)} finished, skipping them")
+        else:
+            self.file = open(self.partial_path, 'w', newline='', encoding='utf-8')
+            self.writer = csv.DictWriter(self.file, fieldnames=fieldnames)
+            self.writer.writeheader()
+            self.file.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.finish()
+        else:
+            self.close()
+            print(f"Progress kept in {self.partial_path}; rerun with --resume to continue")
+        return False
+
+    def is_done(self, key):
+        return key in self.checkpoint
+
+    def write_rows(self, key, rows):
+        """Append rows for key and record key as finished"""
+        with self.lock:
+            self.writer.writerows(rows)
+            self.file.flush()
+            self.rows += len(rows)
+            self.checkpoint.mark_done(key, self.file.tell())
+
+    def close(self):
+        """Close without publishing, keeping the partial file and checkpoint"""
+        with self.lock:
+            if not self.file.closed:
+                self.file.close()
+            self.checkpoint.close()
+
+    def finish(self):
+        """Publish the output file atomically and delete the checkpoint"""
+        self.close()
+        os.replace(self.partial_path, self.path)
+        self.checkpoint.remove()
+        print(f"\n✓ Saved {self.rows} new rows to {self.path}")
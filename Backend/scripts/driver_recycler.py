@@ -0,0 +1,157 @@
+"""Keep a long crawl's browser memory bounded by replacing the browser.
+
+Chrome's memory keeps growing over a long crawl (DOM, caches, leftovers
+of closed modals) and later pages get slower with it. A DriverRecycler
+owns one scraper's driver: get() hands out the driver for the next page,
+first replacing it once it has served max_pages pages or Chrome's
+resident memory is over max_rss_mb. The new browser gets the old one's
+cookies (over CDP) and session flags such as cookies_accepted, so the
+caller just carries on with its queue. Chrome's peak memory is recorded
+as the 'browser_rss_mb' peak of the source's run metrics, beside the
+Python process's own peak (see run_metrics.py).
+
+Memory is read from /proc; elsewhere only the page limit applies.
+"""
+import os
+
+DEFAULT_MAX_PAGES = 50
+DEFAULT_MAX_RSS_MB = 1536
+
+# Driver attributes that record session state the restored cookies carry over
+SESSION_ATTRIBUTES = ['cookies_accepted']
+
+def rss_mb(pid):
+    """Resident memory of one process in MB, or None if it can't be read"""
+    try:
+        with open(f'/proc/{pid}/status', encoding='ascii', errors='replace') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError):
+        return None
+    # Zombies and kernel threads have no VmRSS line
+    return 0.0
+
+def child_pids(pid):
+    pids = []
+    try:
+        for tid in os.listdir(f'/proc/{pid}/task'):
+            with open(f'/proc/{pid}/task/{tid}/children', encoding='ascii') as f:
+                pids.extend(int(child) for child in f.read().split())
+    except (OSError, ValueError):
+        pass
+    return pids
+
+def process_tree_rss_mb(pid):
+    """Summed resident memory of pid and all its descendants in MB, or None
+
+    Pages shared between processes are counted once per process, so this
+    overstates the real footprint somewhat; it is meant for thresholds.
+    """
+    total = rss_mb(pid)
+    if total is None:
+        return None
+    pending = child_pids(pid)
+    while pending:
+        child = pending.pop()
+        total += rss_mb(child) or 0.0
+        pending.extend(child_pids(child))
+    return total
+
+def browser_rss_mb(driver):
+    """Resident memory of chromedriver and everything it started, or None"""
+    process = getattr(getattr(driver, 'service', None), 'process', None)
+    if process is None:
+        return None
+    return process_tree_rss_mb(process.pid)
+
+class DriverRecycler:
+    """Lazily started driver that is replaced after max_pages pages or past max_rss_mb
+
+    start() creates a driver. on_quit(driver), if given, runs before a
+    driver is quit, e.g. to keep its wait records. A limit of 0 turns
+    that check off. Not thread-safe; use one recycler per worker.
+    """
+
+    def __init__(self, start, metrics, max_pages=DEFAULT_MAX_PAGES, max_rss_mb=DEFAULT_MAX_RSS_MB, on_quit=None):
+        self.start = start
+        self.metrics = metrics
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self.on_quit = on_quit
+        self.driver = None
+        self.pages = 0
+        self.cookies = None
+        self.session = {}
+
+    def get(self):
+        """Driver for the next page, started or replaced first if it is due"""
+        if self.driver is not None:
+            reason = f"{self.pages} pages" if self.max_pages and self.pages >= self.max_pages else self.memory_due()
+            if reason:
+                self.recycle(reason)
+        if self.driver is None:
+            self.driver = self.start()
+            self.restore()
+        self.pages += 1
+        return self.driver
+
+    def sample(self, driver=None):
+        """Chrome's memory now in MB, recorded as a peak; None if unknown"""
+        driver = driver if driver is not None else self.driver
+        rss = browser_rss_mb(driver) if driver is not None else None
+        if rss is not None:
+            self.metrics.peak('browser_rss_mb', rss)
+        return rss
+
+    def memory_due(self):
+        """Why the running browser should be replaced for memory (e.g. '1600 MB'), or None"""
+        rss = self.sample()
+        if self.max_rss_mb and rss is not None and rss > self.max_rss_mb:
+            return f"{rss:.0f} MB"
+        return None
+
+    def recycle(self, reason):
+        """Replace the driver now, keeping its cookies and session flags; return the new one"""
+        print(f"  Recycling browser after {reason}")
+        self.save()
+        self.quit()
+        self.metrics.add('driver_recycles', 1)
+        self.driver = self.start()
+        self.restore()
+        return self.driver
+
+    def save(self):
+        try:
+            self.cookies = self.driver.execute_cdp_cmd('Network.getAllCookies', {}).get('cookies', [])
+        except Exception as e:
+            print(f"  Could not save browser cookies: {e}")
+            self.cookies = None
+        self.session = {name: getattr(self.driver, name) for name in SESSION_ATTRIBUTES if hasattr(self.driver, name)}
+
+    def restore(self):
+        if self.cookies is None:
+            return
+        try:
+            if self.cookies:
+                self.driver.execute_cdp_cmd('Network.setCookies', {'cookies': self.cookies})
+        except Exception as e:
+            # Without the cookies the flags would be wrong; the site's banners show again
+            print(f"  Could not restore browser cookies: {e}")
+            return
+        for name, value in self.session.items():
+            setattr(self.driver, name, value)
+
+    def quit(self):
+        """Quit the current driver, if any; the next get() starts a fresh one"""
+        driver, self.driver = self.driver, None
+        self.pages = 0
+        if driver is None:
+            return
+        self.sample(driver)
+        if self.on_quit:
+            self.on_quit(driver)
+        try:
+            driver.quit()
+        except Exception:
+            pass
@@ -0,0 +1,294 @@
+"""Polite, adaptive fetching shared by the scrapers.
+
+Every page fetch, plain HTTP or a browser page load, goes through one
+FetchController. Per host it spaces requests with a token bucket and
+caps requests in flight with an AIMD limit: one more slot after a run
+of healthy responses, half the slots on 429/503, timeouts or latency
+far above the host's best. HTTP fetches that fail transiently are
+retried with full-jitter exponential backoff (Retry-After wins when the
+server sends one). Each source has a circuit breaker that opens after
+repeated failures so a blocked site fails fast instead of being
+hammered, and lets a single trial request through after a cooldown.
+"""
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+import random
+import threading
+import time
+
+from run_metrics import metrics_for
+
+# Responses worth retrying; the throttle ones also mean "slow down"
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+THROTTLE_STATUSES = {429, 503}
+
+class CircuitOpenError(Exception):
+    """A source's breaker is open; its fetches fail fast until the cooldown ends"""
+
+class TokenBucket:
+    """Requests per second for one host, with bursts up to `burst`"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def pause(self, seconds):
+        """Hold every request to this host for seconds (e.g. Retry-After)"""
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    wait = self.paused_until - now
+                else:
+                    self.tokens = min(self.capacity, self.tokens + (now - max(self.updated, self.paused_until)) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+class AIMDLimit:
+    """Requests in flight to one host, adapted additive-increase/multiplicative-decrease"""
+
+    # At most one halving per this many seconds, so one bad burst isn't counted many times
+    DECREASE_INTERVAL = 1.0
+
+    # Best latencies below this are treated as this, so jitter on a fast host isn't congestion
+    LATENCY_FLOOR = 0.05
+
+    def __init__(self, initial=2, minimum=1, maximum=16, latency_factor=3.0):
+        self.limit = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency_factor = latency_factor
+        self.in_flight = 0
+        self.successes = 0
+        self.best_latency = None
+        self.last_decrease = 0.0
+        self.cond = threading.Condition()
+
+    def acquire(self):
+        with self.cond:
+            while self.in_flight >= self.limit:
+                self.cond.wait()
+            self.in_flight += 1
+
+    def release(self, latency=None, congested=False):
+        """Free a slot; latency is None for a failed request"""
+        with self.cond:
+            self.in_flight -= 1
+            if latency is not None:
+                if self.best_latency is None or latency < self.best_latency:
+                    self.best_latency = latency
+                congested = congested or latency > self.latency_factor * max(self.best_latency, self.LATENCY_FLOOR)
+
+            if congested:
+                now = time.monotonic()
+                if now - self.last_decrease >= self.DECREASE_INTERVAL:
+                    self.limit = max(self.minimum, self.limit // 2)
+                    self.last_decrease = now
+                self.successes = 0
+            elif latency is not None:
+                # Roughly one more slot per round of `limit` healthy responses
+                self.successes += 1
+                if self.successes >= self.limit:
+                    self.limit = min(self.maximum, self.limit + 1)
+                    self.successes = 0
+            self.cond.notify_all()
+
+class CircuitBreaker:
+    """Opens after `threshold` failures in a row; half-opens after `cooldown` seconds"""
+
+    def __init__(self, threshold=5, cooldown=30.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.trial = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        return 'half-open' if self.trial else 'open'
+
+    def allow(self):
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if not self.trial and time.monotonic() - self.opened_at >= self.cooldown:
+                # Let one request find out whether the source has recovered
+                self.trial = True
+                return True
+            return False
+
+    def record(self, ok):
+        with self.lock:
+            if ok:
+                self.failures = 0
+                self.opened_at = None
+                self.trial = False
+                return
+            self.failures += 1
+            if self.trial or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+                self.trial = False
+
+def retry_after_seconds(response):
+    """Seconds a Retry-After header asks for, or None"""
+    value = response.headers.get('Retry-After') if response is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class FetchController:
+    """Per-host rate and concurrency limits, retries and per-source breakers. Thread-safe."""
+
+    def __init__(self, rate=5.0, burst=10, initial_concurrency=2, max_concurrency=16,
+                 retries=3, backoff=0.5, max_backoff=30.0, breaker_threshold=5, breaker_cooldown=30.0):
+        self.rate = rate
+        self.burst = burst
+        self.initial_concurrency = initial_concurrency
+        self.max_concurrency = max_concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.hosts = {}
+        self.breakers = {}
+        self.lock = threading.Lock()
+
+    def host(self, url):
+        """(TokenBucket, AIMDLimit) for url's host"""
+        netloc = urlsplit(url).netloc
+        with self.lock:
+            if netloc not in self.hosts:
+                self.hosts[netloc] = (
+                    TokenBucket(self.rate, self.burst),
+                    AIMDLimit(self.initial_concurrency, maximum=self.max_concurrency)
+                )
+            return self.hosts[netloc]
+
+    def reset(self):
+        """Forget every host's limits and every breaker, e.g. between benchmark runs"""
+        with self.lock:
+            self.hosts = {}
+            self.breakers = {}
+
+    def breaker(self, source):
+        with self.lock:
+            if source not in self.breakers:
+                self.breakers[source] = CircuitBreaker(self.breaker_threshold, self.breaker_cooldown)
+            return self.breakers[source]
+
+    def check_breaker(self, source, url):
+        if not self.breaker(source).allow():
+            metrics_for(source).add('circuit_open', 1)
+            raise CircuitOpenError(f"{source} circuit breaker is open, not fetching {url}")
+
+    def get(self, session, url, source, **kwargs):
+        """session.get(url, **kwargs) under url's host limits, retrying transient failures
+
+        Returns the response like session.get does, including a final
+        non-retryable or still-failing one, and raises its exception if
+        the last attempt could not connect. Raises CircuitOpenError
+        without fetching while source's breaker is open.
+        """
+        import requests
+
+        metrics = metrics_for(source)
+        bucket, limit = self.host(url)
+        # Checked once per fetch, so a half-open trial gets its retries too
+        self.check_breaker(source, url)
+        for attempt in range(self.retries + 1):
+            bucket.acquire()
+            limit.acquire()
+            start = time.perf_counter()
+            response = error = None
+            try:
+                response = session.get(url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            except Exception:
+                limit.release()
+                self.breaker(source).record(False)
+                raise
+
+            transient = error is not None or response.status_code in RETRY_STATUSES
+            throttled = isinstance(error, requests.Timeout) or (response is not None and response.status_code in THROTTLE_STATUSES)
+            limit.release(None if transient else time.perf_counter() - start, congested=throttled)
+            if not transient:
+                self.breaker(source).record(True)
+                return response
+
+            if response is not None and response.status_code == 429:
+                metrics.add('throttled', 1)
+            retry_after = retry_after_seconds(response)
+            if retry_after:
+                bucket.pause(min(retry_after, self.max_backoff))
+            if attempt == self.retries:
+                self.breaker(source).record(False)
+                if error is not None:
+                    raise error
+                return response
+
+            metrics.add('retries', 1)
+            delay = retry_after if retry_after is not None else random.uniform(0, self.backoff * 2 ** attempt)
+            time.sleep(min(self.max_backoff, delay))
+
+    def call(self, source, url, fetch):
+        """Run fetch() (e.g. a browser page load of url) under url's host limits
+
+        Not retried, since a browser may be left in an unknown state; an
+        exception counts against the host's limit and source's breaker.
+        """
+        self.check_breaker(source, url)
+        bucket, limit = self.host(url)
+        bucket.acquire()
+        limit.acquire()
+        start = time.perf_counter()
+        ok = False
+        try:
+            result = fetch()
+            ok = True
+            return result
+        finally:
+            limit.release(time.perf_counter() - start if ok else None, congested=not ok)
+            self.breaker(source).record(ok)
+
+    def print_summary(self):
+        """Print where each host's concurrency settled and any breaker that isn't closed"""
+        with self.lock:
+            hosts = sorted(self.hosts.items())
+            breakers = sorted(self.breakers.items())
+        if not hosts:
+            return
+        print("\nFetch control:")
+        for netloc, (_, limit) in hosts:
+            best = f", best {limit.best_latency:.2f}s" if limit.best_latency is not None else ''
+            print(f"  {netloc}: concurrency {limit.limit}{best}")
+        for source, breaker in breakers:
+            if breaker.state != 'closed':
+                print(f"  {source}: circuit {breaker.state}")
+
+# The controller both scrapers fetch through, so limits hold across sources and workers
+CONTROLLER = FetchController()
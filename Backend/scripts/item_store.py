@@ -0,0 +1,103 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+from page_cache import DEFAULT_CACHE_PATH
+
+# Nutrition for a dish rarely changes, so known items stay usable for a week
+DEFAULT_ITEM_TTL = 7 * 24 * 3600
+
+def normalize_text(text):
+    """Case-, accent- and punctuation-insensitive form of a name or serving size"""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch)).casefold()
+    return ' '.join(re.sub(r'[^0-9a-z]+', ' ', text).split())
+
+def item_fingerprint(name, serving=''):
+    """Content address of an item: hash of its normalized name and serving size"""
+    key = f"{normalize_text(name)}|{normalize_text(serving)}"
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+class ItemStore:
+    """Persistent store of item nutrition keyed by name+serving fingerprint.
+
+    The same dish shows up on many menu pages, dates and meals, and the
+    same Starbucks product under several URLs. Each is stored once under
+    its fingerprint, and any number of source-specific aliases (a
+    Nutrislice tile name at one location, a canonical product URL) point
+    at it, so a scraper can recognize an item before it opens the modal
+    or fetches the nutrition page. Lives in the page cache's SQLite file
+    by default. Safe to share between scraper worker threads.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_ITEM_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.stats = {'hits': 0, 'misses': 0, 'stored': 0}
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS items ("
+            "fingerprint TEXT PRIMARY KEY, name TEXT, serving TEXT, source TEXT, value TEXT, stored_at REAL)"
+        )
+        self.conn.execute("CREATE TABLE IF NOT EXISTS item_aliases (alias TEXT PRIMARY KEY, fingerprint TEXT)")
+        self.conn.commit()
+
+    def get(self, fingerprint):
+        """Return the stored value for a fingerprint if it is still fresh, counting a hit or miss"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT value, stored_at FROM items WHERE fingerprint = ?", (fingerprint,)
+            ).fetchone()
+        return self._result(row)
+
+    def get_by_alias(self, alias):
+        """Return the fresh value an alias points at, or None"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT items.value, items.stored_at FROM item_aliases "
+                "JOIN items ON items.fingerprint = item_aliases.fingerprint WHERE item_aliases.alias = ?",
+                (alias,)
+            ).fetchone()
+        return self._result(row)
+
+    def _result(self, row):
+        if row and time.time() - row[1] < self.ttl:
+            self.count('hits')
+            return json.loads(row[0])
+        self.count('misses')
+        return None
+
+    def put(self, name, serving, value, source, aliases=()):
+        """Store value under the item's fingerprint and point aliases at it"""
+        fingerprint = item_fingerprint(name, serving)
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO items (fingerprint, name, serving, source, value, stored_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (fingerprint, name, serving, source, json.dumps(value), time.time())
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO item_aliases (alias, fingerprint) VALUES (?, ?)",
+                [(alias, fingerprint) for alias in aliases]
+            )
+            self.conn.commit()
+            self.stats['stored'] += 1
+        return fingerprint
+
+    def count(self, stat):
+        with self.lock:
+            self.stats[stat] += 1
+
+    def print_summary(self):
+        """Print how many item fetches the store saved this run"""
+        stats = self.stats
+        print(f"\nItem store: {stats['hits']} known items reused, {stats['misses']} unknown, {stats['stored']} stored")
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
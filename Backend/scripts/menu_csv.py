@@ -0,0 +1,43 @@
+"""Read menu CSVs in the Menus/ schema the way populateMenus.js does."""
+import csv
+import re
+
+MENU_FIELDS = ['Item Name', 'Calories', 'Protein', 'Carbohydrates', 'Fats', 'Vegetarian', 'Allergens']
+
+# Leading number the way JavaScript's parseFloat reads it ("20g" -> 20)
+LEADING_NUMBER = re.compile(r'\s*([-+]?(?:\d+\.?\d*|\.\d+))')
+
+def parse_number(value, integer=False):
+    """parseInt/parseFloat || 0, as populateMenus.js does it"""
+    match = LEADING_NUMBER.match(str(value or ''))
+    if not match:
+        return 0
+    number = float(match.group(1))
+    if integer or number.is_integer():
+        return int(number)
+    return number
+
+def menu_item_from_row(row):
+    """Menus CSV row -> menuItems entry (mirrors parseCSV in populateMenus.js)"""
+    def first_number(*columns):
+        for column in columns:
+            number = parse_number(row.get(column))
+            if number:
+                return number
+        return 0
+
+    return {
+        'itemName': (row.get('Item Name') or row.get('Item') or '').strip(),
+        'calories': parse_number(row.get('Calories'), integer=True),
+        'nutrition': {
+            'protein': first_number('Protein', 'Protein (g)'),
+            'carbs': first_number('Carbohydrates', 'Carbs (g)'),
+            'fats': first_number('Fats', 'Fat (g)')
+        },
+        'vegetarian': row.get('Vegetarian') in ('TRUE', 'true'),
+        'allergens': [a.strip() for a in (row.get('Allergens') or '').split(',') if a.strip()]
+    }
+
+def load_menu_csv(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return [item for item in map(menu_item_from_row, csv.DictReader(f)) if item['itemName']]
@@ -0,0 +1,257 @@
+"""One typed record per menu item, shared by both scrapers and every writer.
+
+Nutrislice nutrition is parsed as strings ('20', 'Yes', 'M,S,W') and
+Starbucks nutrition as ints with a list of allergen codes. Each is turned
+into a MenuItem once, where it is parsed, and written from there in one
+of three forms:
+
+- CSV in the Menus/ schema populateMenus.js reads (MENU_FIELDS)
+- JSONL, one compact array per item in RECORD_FIELDS order
+- binary, a fixed-size record per item plus its UTF-8 name
+
+write_menu_items/read_menu_items pick the form from the file extension
+(.csv, .jsonl, .bin), and running this file converts between them:
+
+    python menu_item.py Menus/starbucks_menu.csv starbucks_menu.bin
+    python menu_item.py starbucks_menu.bin starbucks_menu.csv
+"""
+import argparse
+import csv
+import json
+import os
+import struct
+
+from menu_csv import MENU_FIELDS, menu_item_from_row, parse_number
+
+# Allergen codes used in Menus/*.csv, one bit each
+ALLERGEN_CODES = ['E', 'F', 'M', 'P', 'SF', 'S', 'T', 'W', 'SS']
+ALLERGEN_BITS = {code: 1 << i for i, code in enumerate(ALLERGEN_CODES)}
+
+# Order of a JSONL record's values
+RECORD_FIELDS = ['name', 'calories', 'protein', 'carbs', 'fats', 'vegetarian', 'allergens']
+
+# Binary file: magic and item count, then per item calories, protein, carbs,
+# fats, flags, allergen bits and name length, followed by the name
+BINARY_MAGIC = b'MENU\x01'
+BINARY_HEADER = struct.Struct('<5sI')
+BINARY_RECORD = struct.Struct('<IfffBHH')
+VEGETARIAN_FLAG = 1
+VEGETARIAN_UNKNOWN_FLAG = 2
+
+def allergen_bits(codes):
+    """Allergen codes (a list or 'M,S,W') -> bitset; unknown codes are ignored"""
+    if isinstance(codes, str):
+        codes = codes.split(',')
+    bits = 0
+    for code in codes:
+        bits |= ALLERGEN_BITS.get(code.strip().upper(), 0)
+    return bits
+
+def allergen_codes(bits):
+    """Bitset -> allergen codes, in ALLERGEN_CODES order"""
+    return [code for code in ALLERGEN_CODES if bits & ALLERGEN_BITS[code]]
+
+def plain_number(value):
+    """20.0 -> 20, so whole numbers are written without a decimal point"""
+    return int(value) if float(value).is_integer() else value
+
+class MenuItem:
+    """Name, calories, macros in grams, vegetarian flag and allergen bits of one item
+
+    vegetarian is None when the source doesn't say; the CSV cell is then
+    left blank rather than claiming FALSE.
+    """
+
+    __slots__ = RECORD_FIELDS
+
+    def __init__(self, name, calories=0, protein=0.0, carbs=0.0, fats=0.0, vegetarian=False, allergens=0):
+        self.name: str = name
+        self.calories: int = int(calories)
+        self.protein: float = float(protein)
+        self.carbs: float = float(carbs)
+        self.fats: float = float(fats)
+        self.vegetarian: bool | None = None if vegetarian is None else bool(vegetarian)
+        self.allergens: int = allergens
+
+    @classmethod
+    def from_nutrislice(cls, name, nutrition):
+        """Nutrislice item name and nutrition dict (string values, e.g. 'Yes' and 'M,S,W')"""
+        return cls(
+            (name or '').strip(),
+            parse_number(nutrition.get('calories'), integer=True),
+            parse_number(nutrition.get('protein')),
+            parse_number(nutrition.get('carbs')),
+            parse_number(nutrition.get('fats')),
+            nutrition.get('vegetarian') == 'Yes',
+            allergen_bits(nutrition.get('allergens') or '')
+        )
+
+    @classmethod
+    def from_starbucks(cls, name, nutrition):
+        """Starbucks product name and nutrition dict (ints and a list of allergen codes)"""
+        # Starbucks pages don't say whether a product is vegetarian
+        return cls(name, nutrition['calories'], nutrition['protein'], nutrition['carbs'], nutrition['fats'],
+                   None, allergen_bits(nutrition['allergens']))
+
+    @classmethod
+    def from_dict(cls, item):
+        """menuItems entry, as populateMenus.js stores it"""
+        nutrition = item['nutrition']
+        return cls(item['itemName'], item['calories'], nutrition['protein'], nutrition['carbs'], nutrition['fats'],
+                   item['vegetarian'], allergen_bits(item['allergens']))
+
+    @classmethod
+    def from_record(cls, record):
+        """Values in RECORD_FIELDS order, as to_record returns them"""
+        return cls(*record)
+
+    @classmethod
+    def from_row(cls, row):
+        """Menus CSV row, read the way populateMenus.js reads it"""
+        return cls.from_dict(menu_item_from_row(row))
+
+    @property
+    def allergen_list(self):
+        return allergen_codes(self.allergens)
+
+    def to_row(self):
+        """Menus CSV row keyed by MENU_FIELDS"""
+        return {
+            'Item Name': self.name,
+            'Calories': self.calories,
+            'Protein': plain_number(self.protein),
+            'Carbohydrates': plain_number(self.carbs),
+            'Fats': plain_number(self.fats),
+            'Vegetarian': '' if self.vegetarian is None else 'TRUE' if self.vegetarian else 'FALSE',
+            # Sorted, as the Nutrislice scraper has always written them
+            'Allergens': ','.join(sorted(self.allergen_list))
+        }
+
+    def to_dict(self):
+        """menuItems entry, as populateMenus.js stores it"""
+        return {
+            'itemName': self.name,
+            'calories': self.calories,
+            'nutrition': {
+                'protein': plain_number(self.protein),
+                'carbs': plain_number(self.carbs),
+                'fats': plain_number(self.fats)
+            },
+            # populateMenus.js stores a blank Vegetarian cell as false
+            'vegetarian': bool(self.vegetarian),
+            'allergens': self.allergen_list
+        }
+
+    def to_record(self):
+        """Values in RECORD_FIELDS order, for JSONL and the scrape caches"""
+        return [self.name, self.calories, plain_number(self.protein), plain_number(self.carbs),
+                plain_number(self.fats), self.vegetarian, self.allergens]
+
+    def __eq__(self, other):
+        if not isinstance(other, MenuItem):
+            return NotImplemented
+        return self.to_record() == other.to_record()
+
+    def __repr__(self):
+        return f"MenuItem({', '.join(repr(value) for value in self.to_record())})"
+
+def write_atomically(path, mode, write, **open_kwargs):
+    """Call write(f) on a temp file beside path, then swap it in so readers never see half a file"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, mode, **open_kwargs) as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+def write_menu_csv(path, items):
+    """Write items to a Menus CSV atomically so populateMenus.js never reads half a file"""
+    def write(f):
+        writer = csv.DictWriter(f, fieldnames=MENU_FIELDS)
+        writer.writeheader()
+        writer.writerows(item.to_row() for item in items)
+    write_atomically(path, 'w', write, newline='', encoding='utf-8')
+
+def read_menu_csv(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return [item for item in map(MenuItem.from_row, csv.DictReader(f)) if item.name]
+
+def write_jsonl(path, items):
+    def write(f):
+        for item in items:
+            f.write(json.dumps(item.to_record(), ensure_ascii=False, separators=(',', ':')) + '\n')
+    write_atomically(path, 'w', write, encoding='utf-8')
+
+def read_jsonl(path):
+    with open(path, encoding='utf-8') as f:
+        return [MenuItem.from_record(json.loads(line)) for line in f if line.strip()]
+
+def vegetarian_flags(vegetarian):
+    if vegetarian is None:
+        return VEGETARIAN_UNKNOWN_FLAG
+    return VEGETARIAN_FLAG if vegetarian else 0
+
+def write_binary(path, items):
+    items = list(items)
+
+    def write(f):
+        f.write(BINARY_HEADER.pack(BINARY_MAGIC, len(items)))
+        for item in items:
+            name = item.name.encode('utf-8')
+            f.write(BINARY_RECORD.pack(
+                max(0, item.calories), item.protein, item.carbs, item.fats,
+                vegetarian_flags(item.vegetarian), item.allergens, len(name)
+            ))
+            f.write(name)
+    write_atomically(path, 'wb', write)
+
+def read_binary(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    magic, count = BINARY_HEADER.unpack_from(data)
+    if magic != BINARY_MAGIC:
+        raise ValueError(f"{path} is not a binary menu file")
+
+    items = []
+    offset = BINARY_HEADER.size
+    for _ in range(count):
+        calories, protein, carbs, fats, flags, allergens, name_length = BINARY_RECORD.unpack_from(data, offset)
+        offset += BINARY_RECORD.size
+        name = data[offset:offset + name_length].decode('utf-8')
+        offset += name_length
+        # Macros are stored as float32; round off the representation error
+        vegetarian = None if flags & VEGETARIAN_UNKNOWN_FLAG else flags & VEGETARIAN_FLAG
+        items.append(MenuItem(name, calories, round(protein, 2), round(carbs, 2), round(fats, 2), vegetarian, allergens))
+    return items
+
+WRITERS = {'.csv': write_menu_csv, '.jsonl': write_jsonl, '.bin': write_binary}
+READERS = {'.csv': read_menu_csv, '.jsonl': read_jsonl, '.bin': read_binary}
+
+def menu_format(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in WRITERS:
+        raise ValueError(f"{path}: unknown menu file type, expected one of {', '.join(WRITERS)}")
+    return extension
+
+def write_menu_items(path, items):
+    """Write items as CSV, JSONL or binary, by path's extension"""
+    WRITERS[menu_format(path)](path, items)
+
+def read_menu_items(path):
+    """Read a CSV, JSONL or binary menu file, by path's extension"""
+    return READERS[menu_format(path)](path)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert a menu file between CSV, JSONL and binary")
+    parser.add_argument('source', help="menu file to read (.csv, .jsonl or .bin)")
+    parser.add_argument('target', help="menu file to write (.csv, .jsonl or .bin)")
+    args = parser.parse_args(argv)
+
+    try:
+        items = read_menu_items(args.source)
+        write_menu_items(args.target, items)
+    except ValueError as e:
+        parser.error(str(e))
+    print(f"Wrote {len(items)} items to {args.target} ({os.path.getsize(args.target)} bytes, "
+          f"from {os.path.getsize(args.source)})")
+
+if __name__ == "__main__":
+    main()
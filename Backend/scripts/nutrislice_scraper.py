@@ -1,36 +1,155 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from bs4 import BeautifulSoup
-import csv
-import time
-
-def setup_driver():
-    """Set up Chrome driver with headless options"""
-    chrome_options = Options()
-    chrome_options.add_argument('--headless')
-    chrome_options.add_argument('--disable-gpu')
-    chrome_options.add_argument('--no-sandbox')
-    chrome_options.add_argument('--disable-dev-shm-usage')
-    chrome_options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36')
-    
-    driver = webdriver.Chrome(options=chrome_options)
-    return driver
-
-def click_view_menus_button(driver):
+# Selenium, BeautifulSoup and requests are imported where they are used, so
+# API-only runs and --help never load the browser stack
+from scraper_common import ALLERGEN_MAP, create_chrome_driver, create_http_session, load_page
+from run_metrics import metrics_for, report_path, write_json_report, write_prometheus_textfile
+from page_cache import PageCache, content_hash, DEFAULT_CACHE_PATH
+from crawl_checkpoint import Checkpoint, StreamingCSVWriter
+from fetch_control import CONTROLLER, CircuitOpenError
+from item_store import ItemStore, normalize_text
+from parse_pipeline import DEFAULT_PARSE_WORKERS, ParsePipeline, parse_pool
+from driver_recycler import DEFAULT_MAX_PAGES, DEFAULT_MAX_RSS_MB, DriverRecycler
+from menu_csv import MENU_FIELDS
+from menu_item import MenuItem, write_menu_csv
+from urllib.parse import urlparse
+from datetime import date, timedelta
+import argparse
+import os
+import json
+import re
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+# Public menu page, e.g. https://cpp.nutrislice.com/menu/centerpointe-dining-commons/lunch/2025-11-24
+MENU_URL_TEMPLATE = "https://{district}.nutrislice.com/menu/{location}/{meal}/{date}"
+
+# Single-page mode default: CPP Centerpointe Dining Commons lunch menu
+DEFAULT_MENU_URL = "https://cpp.nutrislice.com/menu/centerpointe-dining-commons/lunch/2025-11-24"
+
+# Weekly menu endpoint used by the Nutrislice web app itself
+API_URL_TEMPLATE = "{api_base}/menu/api/weeks/school/{school}/menu-type/{menu_type}/{year}/{month:02d}/{day:02d}/"
+
+MODAL_SELECTOR = '.nutrition-container'
+MENU_ITEM_SELECTOR = '.menu-item-wrapper[data-testid^="menu-item-"]'
+
+MERGED_CSV_FIELDS = ['Location', 'Meal', 'Date'] + MENU_FIELDS
+
+# Phase timings for this run (see run_metrics.py)
+METRICS = metrics_for('nutrislice')
+
+# Calories row shows a number once the modal's values have been filled in
+CALORIES_POPULATED = re.compile(r'\d')
+
+# Numeric part of values like "20g" or "1.5g"
+NUMBER_PATTERN = re.compile(r'(\d+(?:\.\d+)?)')
+
+# Outer HTML of the open modal only: the dialog that holds the nutrition
+# container (serving size, allergen and food icons live beside it)
+MODAL_HTML_SCRIPT = """
+var container = document.querySelector(arguments[0]);
+if (!container) { return null; }
+var root = container.closest('[role="dialog"], .modal, mat-dialog-container, .cdk-overlay-pane') || container;
+return root.outerHTML;
+"""
+
+# Every menu tile's name plus, where the page's state holds it, the tile's
+# food record (the same shape the menu API returns), as one JSON object
+# {source, tiles}. Records come from Angular's transfer state, the JSON the
+# server-rendered app embeds in <script id="ng-state"> (older builds:
+# "<app id>-state", with &q; for quotes), and otherwise, only in development
+# builds that expose it, from Angular's ng debugging API. Private view data
+# such as __ngContext__ isn't read: production builds keep an index there.
+# source names where records came from, or is null when neither exists.
+MENU_STATE_SCRIPT = """
+var tiles = document.querySelectorAll(arguments[0]);
+function clean(name) { return String(name || '').trim().toLowerCase(); }
+function isFood(value) {
+  return value && typeof value === 'object' && !value.nodeType
+    && value.rounded_nutrition_info && typeof value.name === 'string';
+}
+function children(value) {
+  return Array.isArray(value) ? value : Object.keys(value).map(function (key) { return value[key]; });
+}
+function collectFoods(value, depth, foods, seen) {
+  if (!value || typeof value !== 'object' || value.nodeType || seen.has(value)) { return; }
+  seen.add(value);
+  if (isFood(value)) {
+    if (!(clean(value.name) in foods)) { foods[clean(value.name)] = value; }
+    return;
+  }
+  if (depth === 0) { return; }
+  children(value).forEach(function (child) { collectFoods(child, depth - 1, foods, seen); });
+}
+function transferState() {
+  var script = document.querySelector('script#ng-state, script[id$="-state"][type="application/json"]');
+  if (!script) { return null; }
+  var text = script.textContent;
+  try { return JSON.parse(text); } catch (e) {}
+  try {
+    return JSON.parse(text.replace(/&q;/g, '"').replace(/&s;/g, "'").replace(/&l;/g, '<')
+      .replace(/&g;/g, '>').replace(/&a;/g, '&'));
+  } catch (e) { return null; }
+}
+var foods = {};
+var source = null;
+var state = transferState();
+if (state) {
+  collectFoods(state, 12, foods, new Set());
+  source = 'transfer_state';
+}
+var ng = window.ng;
+if (!Object.keys(foods).length && ng && ng.getComponent) {
+  Array.prototype.forEach.call(tiles, function (tile) {
+    var nodes = [tile].concat(Array.prototype.slice.call(tile.querySelectorAll('*'), 0, 50));
+    nodes.forEach(function (node) {
+      [ng.getComponent, ng.getContext].forEach(function (lookup) {
+        try { collectFoods(lookup(node), 3, foods, new Set()); } catch (e) {}
+      });
+    });
+  });
+  source = 'debug_api';
+}
+return JSON.stringify({source: source, tiles: Array.prototype.map.call(tiles, function (tile) {
+  var name = tile.getAttribute('data-testid').split('menu-item-').join('');
+  var food = foods[clean(name)];
+  return [name, food && {
+    name: food.name,
+    rounded_nutrition_info: food.rounded_nutrition_info,
+    serving_size_info: food.serving_size_info || null,
+    icons: {food_icons: ((food.icons || {}).food_icons || []).map(function (icon) {
+      return {name: icon.name, synced_name: icon.synced_name};
+    })}
+  }];
+})});
+"""
+
+class MenuPageError(Exception):
+    """A menu page couldn't be opened or never showed its menu"""
+
+def setup_driver(lean=False):
+    """Set up Chrome driver with headless options (see create_chrome_driver for lean)"""
+    return create_chrome_driver(METRICS, lean=lean)
+
+def click_view_menus_button(driver, timeout=None):
     """Click the 'View Menus' button on the splash page"""
+    from selenium.webdriver.common.by import By
+    from selenium.common.exceptions import TimeoutException
+    from wait_engine import waits_for, element_clickable, element_present
+    
+    waits = waits_for(driver)
     try:
-        wait = WebDriverWait(driver, 10)
-        view_menus_btn = wait.until(
-            EC.element_to_be_clickable((By.CSS_SELECTOR, 'button[data-testid="view-menus-button"]'))
+        view_menus_btn = waits.until(
+            'view_menus',
+            element_clickable((By.CSS_SELECTOR, 'button[data-testid="view-menus-button"]')),
+            timeout
         )
         view_menus_btn.click()
         print("Clicked 'View Menus' button")
-        time.sleep(3)  # Wait for menu to load
+        # Wait for the menu itself rather than a fixed delay
+        waits.maybe('menu_items', element_present((By.CSS_SELECTOR, '.menu-item-wrapper')))
         return True
     except TimeoutException:
         print("Could not find 'View Menus' button")
@@ -38,281 +157,834 @@ def click_view_menus_button(driver):
 
 def parse_allergens(soup):
     """Parse allergen icons and return comma-separated codes"""
-    allergen_map = {
-        'wheat': 'W',
-        'soy': 'S',
-        'milk': 'M',
-        'egg': 'E',
-        'fish': 'F',
-        'shellfish': 'SF',
-        'peanut': 'P',
-        'tree nut': 'T',
-        'treenut': 'T',
-        'sesame': 'SS'
-    }
-    
     allergens = []
     # Find allergen icons
     allergen_items = soup.find_all('li', {'aria-label': lambda x: x and 'contains' in x.lower()})
     
     for item in allergen_items:
         aria_label = item.get('aria-label', '').lower()
-        for allergen_name, code in allergen_map.items():
+        for allergen_name, code in ALLERGEN_MAP.items():
             if allergen_name in aria_label:
                 allergens.append(code)
                 break
     
     return ','.join(sorted(set(allergens)))
 
-def extract_nutrition_from_modal(driver, item_name, save_first_modal=False):
-    """Extract nutrition information from the opened modal"""
+def read_modal_html(driver, save_first_modal=False):
+    """Wait for the opened modal's values and return its HTML, or None on timeout"""
+    from selenium.webdriver.common.by import By
+    from selenium.common.exceptions import TimeoutException
+    from wait_engine import waits_for, element_present, text_matches
+    
+    waits = waits_for(driver)
     try:
-        wait = WebDriverWait(driver, 10)
-        # Wait for nutrition facts to load
-        wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, '.nutrition-container')))
-        time.sleep(2)  # Additional wait for values to populate
-        
-        # Save first modal HTML for inspection
-        if save_first_modal:
-            with open('nutrislice_modal.html', 'w', encoding='utf-8') as f:
-                f.write(driver.page_source)
-            print(f"  Saved modal HTML to nutrislice_modal.html")
-        
-        soup = BeautifulSoup(driver.page_source, 'html.parser')
-        
-        nutrition_data = {
-            'calories': '',
-            'protein': '',
-            'carbs': '',
-            'fats': '',
-            'vegetarian': '',
-            'allergens': '',
-            'serving_size': ''
-        }
-        
-        # Extract serving size
-        serving_size_div = soup.find('div', class_='serving-size')
-        if serving_size_div:
-            # Get the bold divs which contain the serving size value
-            bold_divs = serving_size_div.find_all('div', class_='bold')
-            if len(bold_divs) >= 2:
-                nutrition_data['serving_size'] = bold_divs[1].get_text(strip=True)
-        
-        # Extract calories
-        calories_div = soup.find('div', class_='calories-row')
-        if calories_div:
-            # Get all divs in calories-row
-            divs = calories_div.find_all('div', recursive=False)
-            for div in divs:
-                text = div.get_text(strip=True)
-                if text.isdigit():
-                    nutrition_data['calories'] = text
-                    break
-        
-        # Extract other nutrition values from nutrition-label spans
-        saturated_fat = 0
-        trans_fat = 0
-        
-        nutrition_rows = soup.find_all('div', class_='nutrition-label')
-        for row in nutrition_rows:
-            spans = row.find_all('span')
-            if len(spans) >= 2:
-                label = spans[0].get_text(strip=True).lower()
-                value = spans[1].get_text(strip=True)
-                
-                # Extract numeric value from strings like "20g"
-                import re
-                numeric_match = re.search(r'(\d+(?:\.\d+)?)', value)
-                if numeric_match:
-                    numeric_value = numeric_match.group(1)
-                    
-                    if 'protein' in label:
-                        nutrition_data['protein'] = numeric_value
-                    elif 'total carbohydrate' in label:
-                        nutrition_data['carbs'] = numeric_value
-                    elif 'total fat' in label and not nutrition_data['fats']:  # Only get total fat, not saturated
-                        nutrition_data['fats'] = numeric_value
-                    elif 'saturated fat' in label:
-                        saturated_fat = float(numeric_value)
-                    elif 'trans fat' in label:
-                        trans_fat = float(numeric_value)
-        
-        # If Total Fat wasn't found, calculate it from saturated + trans fat
-        if not nutrition_data['fats'] and (saturated_fat > 0 or trans_fat > 0):
-            total_fat = saturated_fat + trans_fat
-            nutrition_data['fats'] = str(int(total_fat) if total_fat == int(total_fat) else total_fat)
-        
-        # Parse allergens
-        nutrition_data['allergens'] = parse_allergens(soup)
-        
-        # Check for vegetarian indicator - look for vegan/vegetarian icons
-        food_icons = soup.find('menus-food-icons')
-        if food_icons:
-            icon_text = food_icons.get_text().lower()
-            if 'vegan' in icon_text or 'vegetarian' in icon_text:
-                nutrition_data['vegetarian'] = 'Yes'
-        
-        # Skip items with all zero nutrition values
-        if (nutrition_data['calories'] == '0' and 
-            nutrition_data['protein'] == '0' and 
-            nutrition_data['carbs'] == '0' and 
-            (nutrition_data['fats'] == '0' or not nutrition_data['fats'])):
-            print(f"  Skipping {item_name} - all nutrition values are zero")
-            return None
-        
-        return nutrition_data
+        # Wait for nutrition facts to load, then for the values to populate
+        with METRICS.phase('modal_open'):
+            waits.until('modal_open', element_present((By.CSS_SELECTOR, MODAL_SELECTOR)))
+            waits.maybe('modal_values', text_matches((By.CSS_SELECTOR, f'{MODAL_SELECTOR} .calories-row'), CALORIES_POPULATED))
     except TimeoutException:
         print(f"  Timeout waiting for nutrition data to load")
         return None
+    
+    # Only the open modal is serialized and parsed, not the whole page
+    modal_html = driver.execute_script(MODAL_HTML_SCRIPT, MODAL_SELECTOR) or driver.page_source
+    
+    # Save first modal HTML for inspection
+    if save_first_modal:
+        with open('nutrislice_modal.html', 'w', encoding='utf-8') as f:
+            f.write(modal_html)
+        print(f"  Saved modal HTML to nutrislice_modal.html")
+    
+    return modal_html
+
+def extract_nutrition_from_modal(driver, item_name, save_first_modal=False):
+    """Extract nutrition information from the opened modal"""
+    try:
+        modal_html = read_modal_html(driver, save_first_modal)
+        if modal_html is None:
+            return None
+        with METRICS.phase('html_parse'):
+            return parse_nutrition_html(modal_html, item_name)
     except Exception as e:
         print(f"  Error extracting nutrition: {e}")
         return None
 
-def click_menu_item_and_extract(driver, item_element, item_name, is_first=False):
-    """Click a menu item and extract its nutrition info"""
+def has_nutrition(nutrition_data):
+    """False for items whose calories, protein, carbs and fat are all zero"""
+    return not (nutrition_data['calories'] == '0' and
+                nutrition_data['protein'] == '0' and
+                nutrition_data['carbs'] == '0' and
+                (nutrition_data['fats'] == '0' or not nutrition_data['fats']))
+
+def nutrislice_item(item_name, nutrition_data):
+    """MenuItem for a parsed modal or API food, named with its serving size"""
+    serving_size = nutrition_data['serving_size']
+    name = f"{item_name} ({serving_size})" if serving_size else item_name
+    return MenuItem.from_nutrislice(name, nutrition_data)
+
+def parse_nutrition_html(html, item_name=''):
+    """Parse a nutrition modal's HTML into a MenuItem named with its serving size
+    
+    Returns None for items with all zero nutrition values. Module-level so
+    it can run in the parse pool (see parse_pipeline.py).
+    """
+    from bs4 import BeautifulSoup
+    
+    soup = BeautifulSoup(html, HTML_PARSER)
+    
+    nutrition_data = {
+        'calories': '',
+        'protein': '',
+        'carbs': '',
+        'fats': '',
+        'vegetarian': '',
+        'allergens': '',
+        'serving_size': ''
+    }
+    
+    # Extract serving size
+    serving_size_div = soup.find('div', class_='serving-size')
+    if serving_size_div:
+        # Get the bold divs which contain the serving size value
+        bold_divs = serving_size_div.find_all('div', class_='bold')
+        if len(bold_divs) >= 2:
+            nutrition_data['serving_size'] = bold_divs[1].get_text(strip=True)
+    
+    # Extract calories
+    calories_div = soup.find('div', class_='calories-row')
+    if calories_div:
+        # Get all divs in calories-row
+        divs = calories_div.find_all('div', recursive=False)
+        for div in divs:
+            text = div.get_text(strip=True)
+            if text.isdigit():
+                nutrition_data['calories'] = text
+                break
+    
+    # Extract other nutrition values from nutrition-label spans
+    saturated_fat = 0
+    trans_fat = 0
+    
+    nutrition_rows = soup.find_all('div', class_='nutrition-label')
+    for row in nutrition_rows:
+        spans = row.find_all('span')
+        if len(spans) >= 2:
+            label = spans[0].get_text(strip=True).lower()
+            value = spans[1].get_text(strip=True)
+            
+            # Extract numeric value from strings like "20g"
+            numeric_match = NUMBER_PATTERN.search(value)
+            if numeric_match:
+                numeric_value = numeric_match.group(1)
+                
+                if 'protein' in label:
+                    nutrition_data['protein'] = numeric_value
+                elif 'total carbohydrate' in label:
+                    nutrition_data['carbs'] = numeric_value
+                elif 'total fat' in label and not nutrition_data['fats']:  # Only get total fat, not saturated
+                    nutrition_data['fats'] = numeric_value
+                elif 'saturated fat' in label:
+                    saturated_fat = float(numeric_value)
+                elif 'trans fat' in label:
+                    trans_fat = float(numeric_value)
+    
+    # If Total Fat wasn't found, calculate it from saturated + trans fat
+    if not nutrition_data['fats'] and (saturated_fat > 0 or trans_fat > 0):
+        total_fat = saturated_fat + trans_fat
+        nutrition_data['fats'] = str(int(total_fat) if total_fat == int(total_fat) else total_fat)
+    
+    # Parse allergens
+    with METRICS.phase('allergen_parse'):
+        nutrition_data['allergens'] = parse_allergens(soup)
+    
+    # Check for vegetarian indicator - look for vegan/vegetarian icons
+    food_icons = soup.find('menus-food-icons')
+    if food_icons:
+        icon_text = food_icons.get_text().lower()
+        if 'vegan' in icon_text or 'vegetarian' in icon_text:
+            nutrition_data['vegetarian'] = 'Yes'
+    
+    # Skip items with all zero nutrition values
+    if not has_nutrition(nutrition_data):
+        print(f"  Skipping {item_name} - all nutrition values are zero")
+        return None
+    
+    return nutrislice_item(item_name, nutrition_data)
+
+def open_item_modal(driver, item_element, item_name, is_first=False):
+    """Click a menu item, read its modal's HTML and close the modal again"""
+    from selenium.webdriver.common.by import By
+    from wait_engine import waits_for, element_in_viewport, element_clickable, element_gone
+    
+    waits = waits_for(driver)
     try:
         # Scroll item into view
         driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", item_element)
-        time.sleep(0.5)
+        waits.maybe('scroll', element_in_viewport(item_element))
         
-        # Click the item
-        item_element.click()
+        # Click the item; read_modal_html waits for the modal
+        waits.until('item_clickable', element_clickable(item_element)).click()
         print(f"  Clicked: {item_name}")
-        time.sleep(1)
         
-        # Extract nutrition from modal
-        nutrition_data = extract_nutrition_from_modal(driver, item_name, save_first_modal=is_first)
+        modal_html = read_modal_html(driver, save_first_modal=is_first)
         
         # Close modal (look for close button)
-        try:
-            close_btn = driver.find_element(By.CSS_SELECTOR, 'button.close, button[aria-label*="Close"], .modal button[class*="close"]')
-            close_btn.click()
-            time.sleep(0.5)
-        except:
-            # If no close button, try pressing Escape
-            from selenium.webdriver.common.keys import Keys
-            driver.find_element(By.TAG_NAME, 'body').send_keys(Keys.ESCAPE)
-            time.sleep(0.5)
-        
-        if nutrition_data:
-            # Add serving size to item name
-            if nutrition_data.get('serving_size'):
-                nutrition_data['name'] = f"{item_name} ({nutrition_data['serving_size']})"
-            else:
-                nutrition_data['name'] = item_name
-            return nutrition_data
+        with METRICS.phase('modal_close'):
+            try:
+                close_btn = driver.find_element(By.CSS_SELECTOR, 'button.close, button[aria-label*="Close"], .modal button[class*="close"]')
+                close_btn.click()
+            except:
+                # If no close button, try pressing Escape
+                from selenium.webdriver.common.keys import Keys
+                driver.find_element(By.TAG_NAME, 'body').send_keys(Keys.ESCAPE)
+            waits.maybe('modal_close', element_gone((By.CSS_SELECTOR, MODAL_SELECTOR)))
         
+        return modal_html
     except Exception as e:
         print(f"    Error processing {item_name}: {e}")
     
     return None
 
-def extract_menu_items(driver):
-    """Extract menu items from the page"""
-    wait = WebDriverWait(driver, 10)
+def click_menu_item_and_extract(driver, item_element, item_name, is_first=False):
+    """Click a menu item and extract its nutrition info"""
+    modal_html = open_item_modal(driver, item_element, item_name, is_first)
+    if modal_html is None:
+        return None
+    
+    try:
+        with METRICS.phase('html_parse'):
+            return parse_nutrition_html(modal_html, item_name)
+    except Exception as e:
+        print(f"    Error processing {item_name}: {e}")
+        return None
+
+def menu_location(url):
+    """'<host>/<location>' of a menu URL, the scope of its tiles' item store aliases"""
+    parsed = parse_menu_url(url)
+    return f"{urlparse(url).netloc}/{parsed[1] if parsed else ''}"
+
+def item_alias(location, item_name):
+    """Item store alias for a menu tile, known before its modal is opened
     
-    # Wait for menu items to load
+    The tile shows no serving size, so the alias is scoped to the location
+    (see menu_location): a dish served in other portions elsewhere isn't
+    reused from there. Its other meals and dates still share it.
+    """
+    return f"nutrislice:{location}:{normalize_text(item_name)}"
+
+def store_item(store, location, base_name, item):
+    """Record a scraped item in the item store, under its tile's alias as well as its name"""
+    # item.name already carries the serving size, so it is the whole fingerprint
+    store.put(item.name, '', item.to_record(), 'nutrislice', aliases=[item_alias(location, base_name)])
+
+def get_cached_menu(cache, url):
+    """A page's MenuItems from the page cache while fresh, else None"""
+    records = cache.get_fresh(url)
+    return None if records is None else [MenuItem.from_record(record) for record in records]
+
+def put_cached_menu(cache, url, menu_items, new_hash=None):
+    cache.put(url, [item.to_record() for item in menu_items], new_hash)
+
+def extract_menu_items(driver, store=None, parse_workers=0, reopen=None, location=''):
+    """Extract menu items from the page
+    
+    Every tile's name and, where the page's app state has it, its food
+    record are read with a single script call. Those items are mapped
+    like menu API records, and only tiles without one have their modal
+    opened. With an item store, tiles whose dish is already known at this
+    location (see menu_location), from any date or meal, are taken from
+    the store instead.
+    
+    With parse_workers, modal HTML is parsed in a process pool while the
+    driver moves on to the next tile; items keep the page's tile order.
+    reopen(), if given, is called after each modal and may return a fresh
+    driver back on the same page, which carries on from the next tile.
+    """
+    from selenium.webdriver.common.by import By
+    from selenium.common.exceptions import TimeoutException
+    from wait_engine import waits_for, element_present, network_idle
+    
+    waits = waits_for(driver)
+    
+    # Wait for menu items to load and for the page to stop fetching
     try:
-        wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, '.menu-item-wrapper')))
-        time.sleep(2)
+        waits.until('menu_items', element_present((By.CSS_SELECTOR, '.menu-item-wrapper')))
+        waits.maybe('network_idle', network_idle())
     except TimeoutException:
-        print("Menu items didn't load in time")
-        return []
+        raise MenuPageError("Menu items didn't load in time")
     
     print("Finding menu items...")
     
-    # Find all menu item wrappers
-    menu_item_elements = driver.find_elements(By.CSS_SELECTOR, '.menu-item-wrapper[data-testid^="menu-item-"]')
+    # One round trip for every tile's name and whatever nutrition the page already holds
+    with METRICS.phase('bulk_extract'):
+        page_state = json.loads(driver.execute_script(MENU_STATE_SCRIPT, MENU_ITEM_SELECTOR) or '{}')
+    tiles = page_state.get('tiles', [])
     
-    print(f"Found {len(menu_item_elements)} menu items")
+    in_page = sum(1 for _, food in tiles if food)
+    print(f"Found {len(tiles)} menu items, {in_page} with nutrition in the page")
+    METRICS.add('items_in_page', in_page)
+    if in_page < len(tiles):
+        # Every tile without a record costs a modal; say why so a site change shows up in the logs
+        source = page_state.get('source')
+        reason = f"not in the page's {source.replace('_', ' ')}" if source else "no page state found"
+        print(f"  {len(tiles) - in_page} items {reason}, opening their modals")
+        METRICS.add('state_fallbacks', len(tiles) - in_page)
     
     menu_items = []
+    elements = None
     
-    # Process all items
-    for i, item_element in enumerate(menu_item_elements):
-        # Extract item name from data-testid
-        data_testid = item_element.get_attribute('data-testid')
-        item_name = data_testid.replace('menu-item-', '') if data_testid else f"Unknown Item {i+1}"
-        
-        print(f"\nProcessing ({i+1}/{len(menu_item_elements)}): {item_name}")
+    def write_item(key, item):
+        # Writer stage: runs in tile order, off the driver's thread
+        item_name, fresh = key
+        if item:
+            menu_items.append(item)
+            if store and fresh:
+                store_item(store, location, item_name, item)
+    
+    with ParsePipeline(parse_pool(parse_workers), write_item, metrics=METRICS) as pipeline:
+        for i, (item_name, food) in enumerate(tiles):
+            known = store.get_by_alias(item_alias(location, item_name)) if store else None
+            if known:
+                pipeline.ready((item_name, False), MenuItem.from_record(known))
+                continue
+            
+            if food:
+                item = food_to_menu_item(food)
+                if item is None:
+                    print(f"  Skipping {item_name} - all nutrition values are zero")
+                    continue
+                pipeline.ready((item_name, True), item)
+                continue
+            
+            # Not in the page state; open this tile's modal
+            print(f"\nProcessing ({i+1}/{len(tiles)}): {item_name}")
+            if elements is None:
+                elements = driver.find_elements(By.CSS_SELECTOR, MENU_ITEM_SELECTOR)
+            if i >= len(elements):
+                print(f"  Tile is no longer on the page, skipping")
+                continue
+            METRICS.add('items_from_modal', 1)
+            modal_html = open_item_modal(driver, elements[i], item_name, is_first=(i==0))
+            if modal_html is not None:
+                pipeline.submit((item_name, True), parse_nutrition_html, modal_html, item_name)
+            
+            fresh = reopen() if reopen else None
+            if fresh is not None:
+                driver = fresh
+                elements = None
+    
+    return menu_items
+
+def parse_menu_url(url):
+    """Split a Nutrislice menu URL into (api_base, school, menu_type, date)"""
+    parsed = urlparse(url)
+    parts = [p for p in parsed.path.split('/') if p]
+    
+    # Expected path: /menu/<school>/<menu-type>/<yyyy-mm-dd>
+    if len(parts) < 3 or parts[0] != 'menu':
+        return None
+    
+    school, menu_type = parts[1], parts[2]
+    menu_date = date.fromisoformat(parts[3]) if len(parts) > 3 else date.today()
+    
+    # cpp.nutrislice.com -> cpp.api.nutrislice.com
+    district = parsed.netloc.split('.')[0]
+    api_base = f"{parsed.scheme}://{district}.api.nutrislice.com"
+    return api_base, school, menu_type, menu_date
+
+def format_number(value):
+    """Format an API number the way the modal shows it ('20' rather than '20.0')"""
+    if value is None or value == '':
+        return ''
+    value = float(value)
+    rounded = round(value)
+    return str(int(rounded)) if abs(value - rounded) < 1e-9 else str(round(value, 1))
+
+def food_to_menu_item(food):
+    """Map a Nutrislice API food record to the MenuItem its modal parses to, or None if all zero"""
+    info = food.get('rounded_nutrition_info') or {}
+    
+    nutrition_data = {
+        'calories': format_number(info.get('calories')),
+        'protein': format_number(info.get('g_protein')),
+        'carbs': format_number(info.get('g_carbs')),
+        'fats': format_number(info.get('g_fat')),
+        'vegetarian': '',
+        'allergens': '',
+        'serving_size': ''
+    }
+    
+    # If Total Fat wasn't given, calculate it from saturated + trans fat
+    if not nutrition_data['fats']:
+        saturated_fat = float(info.get('g_saturated_fat') or 0)
+        trans_fat = float(info.get('g_trans_fat') or 0)
+        if saturated_fat > 0 or trans_fat > 0:
+            nutrition_data['fats'] = format_number(saturated_fat + trans_fat)
+    
+    # Serving size, e.g. "1 each" or "3 ounce cooked weight"
+    serving_info = food.get('serving_size_info') or {}
+    amount = serving_info.get('serving_size_amount') or ''
+    unit = serving_info.get('serving_size_unit') or ''
+    nutrition_data['serving_size'] = f"{amount} {unit}".strip()
+    
+    # Allergens and vegetarian/vegan flags both come through as food icons
+    allergens = []
+    for icon in food.get('icons', {}).get('food_icons', []):
+        icon_name = (icon.get('synced_name') or icon.get('name') or '').lower()
+        if 'vegan' in icon_name or 'vegetarian' in icon_name:
+            nutrition_data['vegetarian'] = 'Yes'
+            continue
+        for allergen_name, code in ALLERGEN_MAP.items():
+            if allergen_name in icon_name:
+                allergens.append(code)
+                break
+    nutrition_data['allergens'] = ','.join(sorted(set(allergens)))
+    
+    # Skip items with all zero nutrition values
+    if not has_nutrition(nutrition_data):
+        return None
+    
+    return nutrislice_item(food.get('name', '').strip(), nutrition_data)
+
+def find_menu_day(week, menu_date):
+    """Return the entry for menu_date from a weekly API response, or None"""
+    return next((d for d in week.get('days', []) if d.get('date') == menu_date.isoformat()), None)
+
+def fetch_menu_from_api(url, session=None, api_base=None, week_cache=None, cache=None, store=None):
+    """Fetch a menu day from the Nutrislice weekly JSON API.
+    
+    Returns a list of MenuItems, or None if the API is unavailable so the
+    caller can fall back to Selenium. api_base overrides the API host, which
+    lets the fetch run against a local server serving recorded JSON.
+    Passing a week_cache dict lets other days of the same week reuse the
+    response instead of fetching it again. With a page cache, a day whose
+    content hash hasn't changed reuses its stored items instead of being
+    mapped again. Newly mapped items are recorded in store, if given.
+    """
+    import requests
+    
+    parsed = parse_menu_url(url)
+    if not parsed:
+        print(f"Not a Nutrislice menu URL: {url}")
+        return None
+    
+    default_base, school, menu_type, menu_date = parsed
+    api_url = API_URL_TEMPLATE.format(
+        api_base=(api_base or default_base).rstrip('/'),
+        school=school,
+        menu_type=menu_type,
+        year=menu_date.year,
+        month=menu_date.month,
+        day=menu_date.day
+    )
+    
+    # Nutrislice weeks run Sunday to Saturday
+    week_start = menu_date - timedelta(days=(menu_date.weekday() + 1) % 7)
+    cache_key = (api_base or default_base, school, menu_type, week_start)
+    
+    day = None
+    if week_cache is not None and cache_key in week_cache:
+        day = find_menu_day(week_cache[cache_key], menu_date)
+    
+    if day is None:
+        own_session = session is None
+        if own_session:
+            session = create_http_session(accept='application/json')
         
-        # Click and extract nutrition
-        nutrition_data = click_menu_item_and_extract(driver, item_element, item_name, is_first=(i==0))
+        try:
+            with METRICS.phase('api_fetch'):
+                response = CONTROLLER.get(session, api_url, METRICS.source, timeout=15)
+            if response.status_code != 200:
+                print(f"Menu API returned {response.status_code} for {api_url}")
+                return None
+            week = response.json()
+        except (requests.RequestException, ValueError, CircuitOpenError) as e:
+            print(f"Menu API unavailable: {e}")
+            return None
+        finally:
+            if own_session:
+                session.close()
         
-        if nutrition_data:
-            menu_items.append(nutrition_data)
+        if week_cache is not None:
+            week_cache[cache_key] = week
+        day = find_menu_day(week, menu_date)
+    
+    if day is None:
+        print(f"Menu API has no entry for {menu_date.isoformat()}")
+        return None
+    
+    day_hash = content_hash(json.dumps(day, sort_keys=True))
+    if cache:
+        cached = cache.get_unchanged(url, day_hash)
+        if cached is not None:
+            print(f"Menu unchanged since last run ({len(cached)} items)")
+            METRICS.add('tier_http', 1)
+            return [MenuItem.from_record(record) for record in cached]
+    
+    menu_items = []
+    with METRICS.phase('api_parse'):
+        for entry in day.get('menu_items', []):
+            food = entry.get('food')
+            if entry.get('is_section_title') or not food:
+                continue
+            item = food_to_menu_item(food)
+            if item is None:
+                print(f"  Skipping {food.get('name', 'Unknown')} - all nutrition values are zero")
+                continue
+            menu_items.append(item)
+            if store:
+                store_item(store, menu_location(url), food.get('name', '').strip(), item)
     
+    print(f"Fetched {len(menu_items)} items from menu API")
+    METRICS.add('tier_http', 1)
+    if cache:
+        put_cached_menu(cache, url, menu_items, day_hash)
     return menu_items
 
-def scrape_nutrislice_menu(url):
+def open_menu_page(driver, url, warm=False):
+    """Load a menu page and get past the splash screen.
+    
+    A warm driver has already dismissed the splash once, so the 'View Menus'
+    button usually isn't shown again; only wait briefly for it in that case.
+    """
+    from selenium.webdriver.common.by import By
+    from wait_engine import waits_for, element_present
+    
+    load_page(driver, url, METRICS)
+    print("Page loaded")
+    
+    if click_view_menus_button(driver, timeout=2 if warm else None):
+        return True
+    
+    # No splash on a warm session is fine as long as the menu is there
+    return bool(warm and waits_for(driver).maybe('menu_items', element_present((By.CSS_SELECTOR, '.menu-item-wrapper'))))
+
+def scrape_menu_page(driver, url, warm=False, store=None, parse_workers=0, recycler=None):
+    """Scrape one menu page with an already running driver
+    
+    With the DriverRecycler that owns driver, a browser that outgrows its
+    memory limit partway through the menu is replaced, and the new one
+    reopens the page and carries on from the next tile.
+    
+    Raises MenuPageError if the page doesn't open (or reopen) or its menu
+    never loads, so a failed page isn't mistaken for one with no items and
+    a batch doesn't checkpoint it.
+    """
+    if not open_menu_page(driver, url, warm):
+        print("Failed to access menu. Saving page for inspection...")
+        with open('nutrislice_error.html', 'w', encoding='utf-8') as f:
+            f.write(driver.page_source)
+        raise MenuPageError(f"Failed to access menu at {url}")
+    
+    def reopen():
+        reason = recycler.memory_due()
+        if not reason:
+            return None
+        fresh = recycler.recycle(reason)
+        if not open_menu_page(fresh, url):
+            raise MenuPageError(f"Failed to reopen the menu at {url} after recycling the browser")
+        return fresh
+    
+    menu_items = extract_menu_items(driver, store, parse_workers, reopen if recycler else None, menu_location(url))
+    METRICS.add('tier_browser', 1)
+    return menu_items
+
+def scrape_nutrislice_menu(url, use_api=True, api_base=None, session=None, cache=None, store=None, lean=False, parse_workers=0,
+                           max_browser_mb=DEFAULT_MAX_RSS_MB):
     """Main scraping function"""
     print(f"Starting Nutrislice scraper for: {url}")
     
-    driver = setup_driver()
+    if cache:
+        menu_items = get_cached_menu(cache, url)
+        if menu_items is not None:
+            print(f"Using {len(menu_items)} cached items")
+            METRICS.add('tier_cache', 1)
+            METRICS.add_items(len(menu_items))
+            return menu_items
+    
+    # Try the JSON API first; only start Chrome when it isn't available
+    if use_api:
+        menu_items = fetch_menu_from_api(url, session=session, api_base=api_base, cache=cache, store=store)
+        if menu_items is not None:
+            METRICS.add_items(len(menu_items))
+            return menu_items
+        print("Falling back to Selenium scraping")
+    
+    wait_records = []
+    recycler = DriverRecycler(lambda: setup_driver(lean), METRICS, max_rss_mb=max_browser_mb,
+                              on_quit=lambda driver: keep_wait_records(driver, wait_records))
     menu_items = []
     
     try:
-        # Load the page
-        driver.get(url)
-        print("Page loaded")
-        time.sleep(2)
-        
-        # Click the "View Menus" button
-        if not click_view_menus_button(driver):
-            print("Failed to access menu. Saving page for inspection...")
-            with open('nutrislice_error.html', 'w', encoding='utf-8') as f:
-                f.write(driver.page_source)
-            return []
-        
-        # Extract menu items
-        menu_items = extract_menu_items(driver)
-        
+        menu_items = scrape_menu_page(recycler.get(), url, store=store, parse_workers=parse_workers, recycler=recycler)
+        if cache and menu_items:
+            put_cached_menu(cache, url, menu_items)
     except Exception as e:
         print(f"Error during scraping: {e}")
+        METRICS.fail('page')
     finally:
-        driver.quit()
+        from wait_engine import print_wait_summary
+        recycler.quit()
+        print_wait_summary(wait_records)
     
+    METRICS.add_items(len(menu_items))
     return menu_items
 
+def keep_wait_records(driver, records):
+    """Save a driver's wait records before it quits, for one summary across recycled browsers"""
+    from wait_engine import waits_for
+    records.extend(waits_for(driver).records)
+
+def date_range(start_date, days):
+    """Return the list of days dates starting at start_date"""
+    return [start_date + timedelta(days=offset) for offset in range(days)]
+
+def scrape_nutrislice_batch(locations, meals, dates, district='cpp', use_api=True, api_base=None, cache=None,
+                            skip=None, on_page=None, store=None, lean=False, parse_workers=0,
+                            recycle_pages=DEFAULT_MAX_PAGES, max_browser_mb=DEFAULT_MAX_RSS_MB):
+    """Scrape every (location, meal, date) combination.
+    
+    All pages share one HTTP session and week cache, and at most one Chrome
+    instance, which is started on the first page the API can't serve and
+    then kept warm for the rest of the batch. Chrome is replaced every
+    recycle_pages browser pages or once it uses more than max_browser_mb;
+    the new one keeps the cookies and clicks through View Menus again on
+    its first page, and the batch carries on where it was.
+    
+    Returns {(location, meal, date): [MenuItems]}. If on_page is given,
+    each successfully scraped page is passed to
+    on_page(location, meal, date, url, items) instead and nothing is kept,
+    so memory doesn't grow with the number of pages. Pages whose URL is in
+    skip are not scraped at all. Items are shared through store, so a
+    dish seen on one page isn't opened again on the next.
+    """
+    session = create_http_session(accept='application/json')
+    week_cache = {}
+    wait_records = []
+    recycler = DriverRecycler(lambda: setup_driver(lean), METRICS, recycle_pages, max_browser_mb,
+                              on_quit=lambda driver: keep_wait_records(driver, wait_records))
+    warm_driver = None
+    results = {}
+    
+    jobs = [(location, meal, menu_date) for location in locations for meal in meals for menu_date in dates]
+    
+    try:
+        for i, (location, meal, menu_date) in enumerate(jobs, 1):
+            url = MENU_URL_TEMPLATE.format(district=district, location=location, meal=meal, date=menu_date.isoformat())
+            print(f"\n[{i}/{len(jobs)}] {location} / {meal} / {menu_date.isoformat()}")
+            
+            if skip is not None and url in skip:
+                print("Already finished in an earlier run, skipping")
+                continue
+            
+            failed = False
+            menu_items = get_cached_menu(cache, url) if cache else None
+            if menu_items is not None:
+                print(f"Using {len(menu_items)} cached items")
+                METRICS.add('tier_cache', 1)
+            elif use_api:
+                menu_items = fetch_menu_from_api(url, session=session, api_base=api_base, week_cache=week_cache,
+                                                 cache=cache, store=store)
+            
+            if menu_items is None:
+                try:
+                    driver = recycler.get()
+                    menu_items = scrape_menu_page(driver, url, warm=driver is warm_driver, store=store,
+                                                  parse_workers=parse_workers, recycler=recycler)
+                    if menu_items:
+                        # Past the splash; a browser recycled mid-page has been through it too
+                        warm_driver = recycler.driver
+                    if cache and menu_items:
+                        put_cached_menu(cache, url, menu_items)
+                except Exception as e:
+                    print(f"Error during scraping: {e}")
+                    METRICS.fail('page')
+                    menu_items = []
+                    failed = True
+            
+            METRICS.add_items(len(menu_items))
+            if on_page is None:
+                results[(location, meal, menu_date)] = menu_items
+            elif not failed:
+                on_page(location, meal, menu_date, url, menu_items)
+    finally:
+        from wait_engine import print_wait_summary
+        session.close()
+        recycler.quit()
+        print_wait_summary(wait_records)
+    
+    return results
+
 def save_to_csv(menu_items, filename='nutrislice_menu.csv'):
-    """Save menu items to CSV"""
+    """Save MenuItems to CSV"""
     if not menu_items:
         print("No items to save")
         return
     
-    with open(filename, 'w', newline='', encoding='utf-8') as f:
-        fieldnames = ['Item Name', 'Calories', 'Protein', 'Carbs', 'Fats', 'Vegetarian', 'Allergens']
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        
-        writer.writeheader()
-        for item in menu_items:
-            writer.writerow({
-                'Item Name': item.get('name', ''),
-                'Calories': item.get('calories', ''),
-                'Protein': item.get('protein', ''),
-                'Carbs': item.get('carbs', ''),
-                'Fats': item.get('fats', ''),
-                'Vegetarian': item.get('vegetarian', ''),
-                'Allergens': item.get('allergens', '')
-            })
+    with METRICS.phase('csv_write'):
+        write_menu_csv(filename, menu_items)
     
     print(f"\nSaved {len(menu_items)} items to {filename}")
 
-if __name__ == "__main__":
-    # URL for CPP Centerpointe Dining Commons lunch menu
-    url = "https://cpp.nutrislice.com/menu/centerpointe-dining-commons/lunch/2025-11-24"
+def batch_filename(location, meal, menu_date):
+    """Per-page output name, e.g. centerpointe-dining-commons_lunch_2025-11-24.csv"""
+    return f"{location}_{meal}_{menu_date.isoformat()}.csv"
+
+class BatchOutput:
+    """Streams batch pages to per-page CSVs and/or one merged CSV as they finish.
+    
+    Finished page URLs are checkpointed (in the merged file's sidecar, or in
+    output_dir/.batch.checkpoint without one), so a resumed batch skips
+    them. Used as a context manager; the merged CSV is only moved into place
+    and the checkpoint deleted once the whole batch has run.
+    """
     
-    # Scrape the menu
-    items = scrape_nutrislice_menu(url)
+    def __init__(self, output_dir=None, merged_file=None, resume=False):
+        self.output_dir = output_dir
+        self.pages = 0
+        self.items = 0
+        self.merged = StreamingCSVWriter(merged_file, MERGED_CSV_FIELDS, resume) if merged_file else None
+        self.checkpoint = None
+        
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+            if self.merged is None:
+                self.checkpoint = Checkpoint(os.path.join(output_dir, '.batch.checkpoint'), resume)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        if self.merged:
+            self.merged.__exit__(exc_type, exc, tb)
+        if self.checkpoint:
+            if exc_type is None:
+                self.checkpoint.remove()
+            else:
+                self.checkpoint.close()
+        return False
+    
+    def __contains__(self, url):
+        if self.merged:
+            return self.merged.is_done(url)
+        return self.checkpoint is not None and url in self.checkpoint
+    
+    def write_page(self, location, meal, menu_date, url, menu_items):
+        """Write one finished page, then checkpoint it"""
+        if self.output_dir:
+            save_to_csv(menu_items, os.path.join(self.output_dir, batch_filename(location, meal, menu_date)))
+        
+        if self.merged:
+            with METRICS.phase('csv_write'):
+                self.merged.write_rows(url, [
+                    dict(item.to_row(), Location=location, Meal=meal, Date=menu_date.isoformat())
+                    for item in menu_items
+                ])
+        else:
+            self.checkpoint.mark_done(url)
+        
+        self.pages += 1
+        self.items += len(menu_items)
+
+def add_arguments(parser):
+    """Command-line options for a Nutrislice run (also used by scrape.py)"""
+    parser.add_argument('--url', help="scrape a single menu page URL")
+    parser.add_argument('--output', default='nutrislice_menu.csv', help="CSV file for --url mode")
+    parser.add_argument('--district', default='cpp', help="Nutrislice subdomain (default: cpp)")
+    parser.add_argument('--locations', nargs='+', help="location slugs, e.g. centerpointe-dining-commons")
+    parser.add_argument('--meals', nargs='+', default=['breakfast', 'lunch', 'dinner'], help="meal types (default: breakfast lunch dinner)")
+    parser.add_argument('--start', type=date.fromisoformat, default=date.today(), help="first date, YYYY-MM-DD (default: today)")
+    parser.add_argument('--days', type=int, default=1, help="number of consecutive days (default: 1)")
+    parser.add_argument('--output-dir', help="write one CSV per location/meal/date into this directory")
+    parser.add_argument('--merged', help="write every batch item into this single CSV")
+    parser.add_argument('--no-api', action='store_true', help="skip the JSON API and always use Selenium")
+    parser.add_argument('--lean', action='store_true', help="block images, fonts, media and trackers in Chrome and load pages eagerly")
+    parser.add_argument('--recycle-pages', type=int, default=DEFAULT_MAX_PAGES, help=f"restart Chrome after this many browser pages (0 = never, default: {DEFAULT_MAX_PAGES})")
+    parser.add_argument('--max-browser-mb', type=int, default=DEFAULT_MAX_RSS_MB, help=f"restart Chrome, even mid-menu, once its memory passes this many MB (0 = never, default: {DEFAULT_MAX_RSS_MB})")
+    parser.add_argument('--parse-workers', type=int, default=DEFAULT_PARSE_WORKERS,
+                        help=f"processes parsing item modals while the browser opens the next (0 = parse inline, default: {DEFAULT_PARSE_WORKERS})")
+    parser.add_argument('--api-base', help="override the menu API host, e.g. a local test server")
+    parser.add_argument('--cache', default=DEFAULT_CACHE_PATH, help=f"page cache file (default: {DEFAULT_CACHE_PATH})")
+    parser.add_argument('--cache-ttl', type=float, default=12, help="hours before cached menus are re-checked (default: 12)")
+    parser.add_argument('--item-ttl', type=float, default=7, help="days a known dish's nutrition is reused (default: 7)")
+    parser.add_argument('--no-cache', action='store_true', help="fetch every menu and open every item again")
+    parser.add_argument('--resume', action='store_true', help="continue an interrupted batch from its checkpoint")
+    parser.add_argument('--dry-run', action='store_true', help="list the pages that would be scraped and exit")
+    parser.add_argument('--report', default=report_path('nutrislice_report.json'), help="JSON run report with per-phase timings (default: reports/nutrislice_report.json)")
+    parser.add_argument('--prometheus', help="also write metrics to this Prometheus textfile")
+
+def print_plan(args):
+    """--dry-run: show which pages a run would scrape and how"""
+    mode = 'browser only' if args.no_api else 'menu API, browser fallback'
+    if args.locations:
+        dates = date_range(args.start, args.days)
+        urls = [
+            MENU_URL_TEMPLATE.format(district=args.district, location=location, meal=meal, date=menu_date.isoformat())
+            for location in args.locations for meal in args.meals for menu_date in dates
+        ]
+        print(f"{len(urls)} pages ({mode}) -> {args.merged or args.output_dir or '.'}")
+    else:
+        urls = [args.url or DEFAULT_MENU_URL]
+        print(f"1 page ({mode}) -> {args.output}")
+    for url in urls:
+        print(f"  {url}")
+
+def run(args):
+    """Scrape a single page (--url) or a location/meal/date batch (--locations)"""
+    if args.dry_run:
+        print_plan(args)
+        return
     
-    print(f"\nTotal items found: {len(items)}")
+    cache = None if args.no_cache else PageCache(args.cache, ttl=args.cache_ttl * 3600)
+    store = None if args.no_cache else ItemStore(args.cache, ttl=args.item_ttl * 24 * 3600)
     
-    if items:
-        print("\nSample items:")
-        for item in items[:5]:
-            print(f"  - {item.get('name', 'Unknown')}")
+    if args.locations:
+        if not args.output_dir and not args.merged:
+            args.output_dir = '.'
         
-        # Save to CSV
-        save_to_csv(items)
+        # Pages are written as they finish rather than held until the end
+        with BatchOutput(args.output_dir, args.merged, resume=args.resume) as output:
+            scrape_nutrislice_batch(
+                args.locations, args.meals, date_range(args.start, args.days),
+                district=args.district, use_api=not args.no_api, api_base=args.api_base, cache=cache,
+                skip=output, on_page=output.write_page, store=store, lean=args.lean,
+                parse_workers=args.parse_workers, recycle_pages=args.recycle_pages, max_browser_mb=args.max_browser_mb
+            )
+        
+        print(f"\nTotal items found: {output.items} across {output.pages} pages")
     else:
-        print("\nNo items found. Check the saved HTML files to understand the page structure.")
+        url = args.url or DEFAULT_MENU_URL
+        
+        # Scrape the menu
+        items = scrape_nutrislice_menu(url, use_api=not args.no_api, api_base=args.api_base, cache=cache, store=store,
+                                       lean=args.lean, parse_workers=args.parse_workers, max_browser_mb=args.max_browser_mb)
+        
+        print(f"\nTotal items found: {len(items)}")
+        
+        if items:
+            print("\nSample items:")
+            for item in items[:5]:
+                print(f"  - {item.name}")
+            
+            # Save to CSV
+            save_to_csv(items, args.output)
+        else:
+            print("\nNo items found. Check the saved HTML files to understand the page structure.")
+    
+    if cache:
+        cache.print_summary()
+        cache.close()
+    if store:
+        store.print_summary()
+        store.close()
+    
+    CONTROLLER.print_summary()
+    METRICS.print_summary()
+    write_json_report(args.report, [METRICS])
+    if args.prometheus:
+        write_prometheus_textfile(args.prometheus, [METRICS])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape Nutrislice menus to CSV")
+    add_arguments(parser)
+    run(parser.parse_args())
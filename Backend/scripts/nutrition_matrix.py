@@ -0,0 +1,272 @@
+"""Columnar nutrition dataset and vectorized meal-plan search.
+
+Every menu item from Menus/*.csv becomes one row across a set of NumPy
+columns: calories/protein/carbs/fats as float32, a vegetarian bitmask,
+and an allergen bitset (one bit per allergen code). Filtering a whole
+menu for a user is then a couple of array operations, and candidate
+plans are scored as whole arrays of item combinations rather than one
+item at a time, so many users can be planned in one pass.
+
+    python nutrition_matrix.py build                        # writes menus.npz
+    python nutrition_matrix.py plan --calories 2000 --protein 150 --carbs 200 --fats 65 \\
+        --restrictions Vegetarian Nut-Free
+"""
+from itertools import combinations
+import argparse
+import json
+import os
+
+import numpy as np
+
+from menu_item import allergen_bits, allergen_codes, read_menu_csv
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+MENUS_DIR = os.path.join(SCRIPTS_DIR, 'Menus')
+RESTAURANT_IDS_FILE = os.path.join(SCRIPTS_DIR, 'restaurant_ids.json')
+DEFAULT_DATASET = 'menus.npz'
+
+# Settings restrictions -> allergen codes the item must not contain
+RESTRICTION_ALLERGENS = {
+    'Vegan': ['E', 'M'],
+    'Gluten-Free': ['W'],
+    'Dairy-Free': ['M'],
+    'Nut-Free': ['P', 'T'],
+    'Shellfish-Free': ['SF']
+}
+
+# Restrictions that also require the vegetarian flag
+VEGETARIAN_RESTRICTIONS = {'Vegetarian', 'Vegan'}
+
+# Same floor as /generate: anything smaller isn't a meal
+MIN_CALORIES = 50
+
+MACROS = ['calories', 'protein', 'carbs', 'fats']
+
+# Calories matter most when ranking plans that all fit the calorie goal
+MACRO_WEIGHTS = np.array([2.0, 1.0, 0.5, 0.5], dtype=np.float32)
+
+def restriction_mask(restrictions):
+    """Return (allergen bits to avoid, whether items must be vegetarian)"""
+    codes = []
+    for restriction in restrictions:
+        # Plain allergen codes ('W', 'P') work as restrictions too
+        codes.extend(RESTRICTION_ALLERGENS.get(restriction, [restriction]))
+    return allergen_bits(codes), any(r in VEGETARIAN_RESTRICTIONS for r in restrictions)
+
+class NutritionMatrix:
+    """Menu items as parallel NumPy columns.
+
+    nutrients is an (n, 4) float32 array in MACROS order. vegetarian is a
+    bool array (stored packed on disk) and allergens a uint16 bitset per
+    item. restaurant holds an index into restaurant_ids.
+    """
+
+    def __init__(self, names, restaurant, restaurant_ids, nutrients, vegetarian, allergens):
+        self.names = names
+        self.restaurant = restaurant
+        self.restaurant_ids = restaurant_ids
+        self.nutrients = nutrients
+        self.vegetarian = vegetarian
+        self.allergens = allergens
+
+    def __len__(self):
+        return len(self.names)
+
+    @classmethod
+    def from_menus(cls, menus_dir=MENUS_DIR, id_map=None):
+        """Build the matrix from every mapped CSV in menus_dir"""
+        if id_map is None:
+            with open(RESTAURANT_IDS_FILE, encoding='utf-8') as f:
+                id_map = json.load(f)
+
+        names, restaurant, nutrients, vegetarian, allergens = [], [], [], [], []
+        restaurant_ids = []
+        for filename, restaurant_id in sorted(id_map.items()):
+            path = os.path.join(menus_dir, filename)
+            if not os.path.exists(path):
+                continue
+            restaurant_ids.append(restaurant_id)
+            for item in read_menu_csv(path):
+                names.append(item.name)
+                restaurant.append(len(restaurant_ids) - 1)
+                nutrients.append((item.calories, item.protein, item.carbs, item.fats))
+                vegetarian.append(item.vegetarian)
+                allergens.append(item.allergens)
+
+        return cls(
+            np.array(names, dtype=str),
+            np.array(restaurant, dtype=np.uint16),
+            np.array(restaurant_ids, dtype=str),
+            np.array(nutrients, dtype=np.float32).reshape(-1, len(MACROS)),
+            np.array(vegetarian, dtype=bool),
+            np.array(allergens, dtype=np.uint16)
+        )
+
+    def save(self, path=DEFAULT_DATASET):
+        """Write the columns to a compressed .npz, bit-packing the vegetarian mask"""
+        tmp_path = f"{path}.tmp.npz"
+        np.savez_compressed(
+            tmp_path,
+            names=self.names,
+            restaurant=self.restaurant,
+            restaurant_ids=self.restaurant_ids,
+            nutrients=self.nutrients,
+            vegetarian=np.packbits(self.vegetarian),
+            allergens=self.allergens
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=DEFAULT_DATASET):
+        with np.load(path) as data:
+            count = len(data['names'])
+            return cls(
+                data['names'],
+                data['restaurant'],
+                data['restaurant_ids'],
+                data['nutrients'],
+                np.unpackbits(data['vegetarian'], count=count).astype(bool),
+                data['allergens']
+            )
+
+    def allowed(self, restrictions=(), exclude=None):
+        """Bool mask of items a user with these restrictions can be offered"""
+        avoid, vegetarian_only = restriction_mask(restrictions)
+        mask = (self.allergens & avoid) == 0
+        mask &= self.nutrients[:, 0] >= MIN_CALORIES
+        if vegetarian_only:
+            mask &= self.vegetarian
+        if exclude is not None:
+            mask[exclude] = False
+        return mask
+
+    def allowed_batch(self, restriction_lists):
+        """(users, items) bool matrix of allowed items, one row per restriction list"""
+        masks = [restriction_mask(restrictions) for restrictions in restriction_lists]
+        avoid = np.array([m[0] for m in masks], dtype=np.uint16)
+        vegetarian_only = np.array([m[1] for m in masks], dtype=bool)
+        allowed = (self.allergens[None, :] & avoid[:, None]) == 0
+        allowed &= (self.nutrients[:, 0] >= MIN_CALORIES)[None, :]
+        allowed &= ~vegetarian_only[:, None] | self.vegetarian[None, :]
+        return allowed
+
+    def item(self, index):
+        """One row back as a plain dict"""
+        calories, protein, carbs, fats = (float(v) for v in self.nutrients[index])
+        bits = int(self.allergens[index])
+        return {
+            'itemName': str(self.names[index]),
+            'restaurantId': str(self.restaurant_ids[self.restaurant[index]]),
+            'calories': calories,
+            'nutrition': {'protein': protein, 'carbs': carbs, 'fats': fats},
+            'vegetarian': bool(self.vegetarian[index]),
+            'allergens': allergen_codes(bits)
+        }
+
+_combination_cache = {}
+
+def combination_indices(pool_size, items):
+    """(C(pool_size, items), items) array of index combinations, cached per shape"""
+    key = (pool_size, items)
+    if key not in _combination_cache:
+        flat = np.fromiter(
+            (i for combo in combinations(range(pool_size), items) for i in combo),
+            dtype=np.int32
+        )
+        _combination_cache[key] = flat.reshape(-1, items)
+    return _combination_cache[key]
+
+def candidate_pool(matrix, allowed, calorie_goal, items, pool_size):
+    """Allowed items whose calories are closest (in ratio) to an even share of the goal"""
+    indices = np.flatnonzero(allowed)
+    if len(indices) <= pool_size:
+        return indices
+    share = calorie_goal / items
+    distance = np.abs(np.log(matrix.nutrients[indices, 0] / share))
+    return indices[np.argpartition(distance, pool_size)[:pool_size]]
+
+def solve(matrix, goal, restrictions=(), items=4, pool_size=40, top=5, tolerance=0.05, exclude=None, allowed=None):
+    """Return up to top plans of exactly `items` distinct items for one user.
+
+    goal is {'calories', 'protein', 'carbs', 'fats'}. Plans must land
+    within tolerance of the calorie goal and are ranked by weighted
+    relative error across all four targets. Each plan is
+    {'items': [row indices], 'totals': {...}, 'error': float}.
+    """
+    if allowed is None:
+        allowed = matrix.allowed(restrictions, exclude)
+    target = np.array([goal[m] for m in MACROS], dtype=np.float32)
+
+    pool = candidate_pool(matrix, allowed, target[0], items, pool_size)
+    if len(pool) < items:
+        return []
+
+    # Every combination of the pool at once: (combos, items) -> (combos, 4) totals
+    combos = pool[combination_indices(len(pool), items)]
+    totals = matrix.nutrients[combos].sum(axis=1)
+
+    feasible = np.abs(totals[:, 0] - target[0]) <= tolerance * target[0]
+    if not feasible.any():
+        return []
+    combos, totals = combos[feasible], totals[feasible]
+
+    error = (np.abs(totals - target) / np.maximum(target, 1)) @ MACRO_WEIGHTS
+    best = np.argsort(error)[:top]
+    return [
+        {
+            'items': combos[i].tolist(),
+            'totals': dict(zip(MACROS, (round(float(v), 1) for v in totals[i]))),
+            'error': round(float(error[i]), 4)
+        }
+        for i in best
+    ]
+
+def solve_batch(matrix, users, **options):
+    """Plan for many users; users is a list of {'goal': {...}, 'restrictions': [...]}.
+
+    Allowed-item masks for every user come from one broadcast over the
+    allergen and vegetarian columns, and combination index arrays are
+    shared between users with the same pool size.
+    """
+    allowed = matrix.allowed_batch([user.get('restrictions', []) for user in users])
+    return [solve(matrix, user['goal'], allowed=allowed[row], **options) for row, user in enumerate(users)]
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the columnar nutrition dataset and search meal plans")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build = subparsers.add_parser('build', help="write the dataset from Menus/*.csv")
+    build.add_argument('--menus-dir', default=MENUS_DIR, help="directory holding the menu CSVs")
+    build.add_argument('--output', default=DEFAULT_DATASET, help=f"dataset file (default: {DEFAULT_DATASET})")
+
+    plan = subparsers.add_parser('plan', help="print the best plans for one goal")
+    plan.add_argument('--dataset', default=DEFAULT_DATASET, help=f"dataset file (default: {DEFAULT_DATASET})")
+    for macro, default in zip(MACROS, (2000, 150, 200, 65)):
+        plan.add_argument(f'--{macro}', type=float, default=default, help=f"daily {macro} goal (default: {default})")
+    plan.add_argument('--restrictions', nargs='*', default=[], help="e.g. Vegetarian Gluten-Free Nut-Free")
+    plan.add_argument('--items', type=int, default=4, help="items per plan (default: 4)")
+    plan.add_argument('--pool', type=int, default=40, help="candidate items searched per user (default: 40)")
+    plan.add_argument('--top', type=int, default=5, help="plans to print (default: 5)")
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        matrix = NutritionMatrix.from_menus(args.menus_dir)
+        matrix.save(args.output)
+        print(f"Wrote {len(matrix)} items from {len(matrix.restaurant_ids)} menus to {args.output}")
+        return
+
+    matrix = NutritionMatrix.load(args.dataset)
+    goal = {macro: getattr(args, macro) for macro in MACROS}
+    plans = solve(matrix, goal, args.restrictions, items=args.items, pool_size=args.pool, top=args.top)
+    if not plans:
+        print("No plan within 5% of the calorie goal")
+    for rank, plan in enumerate(plans, 1):
+        totals = plan['totals']
+        print(f"\n#{rank}  {totals['calories']:.0f} cal  P {totals['protein']:.0f}g  C {totals['carbs']:.0f}g  "
+              f"F {totals['fats']:.0f}g  (error {plan['error']})")
+        for index in plan['items']:
+            item = matrix.item(index)
+            print(f"  - {item['itemName']} ({item['calories']:.0f} cal)")
+
+if __name__ == "__main__":
+    main()
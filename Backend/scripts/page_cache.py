@@ -0,0 +1,143 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+DEFAULT_CACHE_PATH = '.scrape_cache.db'
+
+# Entries younger than this are served without touching the network
+DEFAULT_TTL = 12 * 3600
+
+# Entries older than this are deleted outright, fresh or not
+DEFAULT_MAX_AGE = 14 * 24 * 3600
+
+# Least recently used entries are evicted once the cache grows past this
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+def content_hash(text):
+    """Return a stable hash of page or API content"""
+    if isinstance(text, str):
+        text = text.encode('utf-8')
+    return hashlib.sha256(text).hexdigest()
+
+class PageCache:
+    """Persistent URL-keyed cache of parsed scrape results.
+
+    Each entry stores the parsed value together with the hash of the raw
+    content it came from. Fresh entries (younger than ttl) are returned
+    without fetching; stale ones can be revalidated by fetching the raw
+    content and comparing hashes, which skips re-parsing unchanged pages.
+    Safe to share between scraper worker threads.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL, max_age=DEFAULT_MAX_AGE, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.ttl = ttl
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.stats = {'hits': 0, 'misses': 0, 'unchanged': 0, 'changed': 0, 'evicted': 0}
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "key TEXT PRIMARY KEY, content_hash TEXT, value TEXT, size INTEGER, "
+            "stored_at REAL, accessed_at REAL)"
+        )
+        self.conn.commit()
+        self.evict()
+
+    def lookup(self, key):
+        """Return the raw entry dict for key (or None) without touching the stats"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT content_hash, value, stored_at FROM pages WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            'content_hash': row[0],
+            'value': json.loads(row[1]),
+            'fresh': time.time() - row[2] < self.ttl
+        }
+
+    def get_fresh(self, key):
+        """Return the cached value if it is still within the TTL, counting a hit or miss"""
+        entry = self.lookup(key)
+        if entry and entry['fresh']:
+            self.touch(key)
+            self.count('hits')
+            return entry['value']
+        self.count('misses')
+        return None
+
+    def get_unchanged(self, key, new_hash):
+        """Return the cached value if its content hash equals new_hash, else None.
+
+        Call this after fetching raw content for a stale entry; a match
+        means the page hasn't changed and the stored value can be reused.
+        """
+        entry = self.lookup(key)
+        if entry and entry['content_hash'] == new_hash:
+            # Unchanged content: restart its TTL so the next run skips the fetch
+            with self.lock:
+                now = time.time()
+                self.conn.execute("UPDATE pages SET stored_at = ?, accessed_at = ? WHERE key = ?", (now, now, key))
+                self.conn.commit()
+            self.count('unchanged')
+            return entry['value']
+        if entry:
+            self.count('changed')
+        return None
+
+    def put(self, key, value, new_hash=None):
+        """Store a parsed value for key along with the hash of its raw content"""
+        data = json.dumps(value)
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO pages (key, content_hash, value, size, stored_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, new_hash, data, len(data), now, now)
+            )
+            self.conn.commit()
+
+    def touch(self, key):
+        """Mark key as recently used for LRU eviction"""
+        with self.lock:
+            self.conn.execute("UPDATE pages SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self.conn.commit()
+
+    def count(self, stat):
+        with self.lock:
+            self.stats[stat] += 1
+
+    def evict(self):
+        """Drop entries past max_age, then least recently used ones over max_bytes"""
+        with self.lock:
+            cursor = self.conn.execute("DELETE FROM pages WHERE stored_at < ?", (time.time() - self.max_age,))
+            evicted = cursor.rowcount
+
+            total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+            if total > self.max_bytes:
+                rows = self.conn.execute("SELECT key, size FROM pages ORDER BY accessed_at").fetchall()
+                for key, size in rows:
+                    if total <= self.max_bytes:
+                        break
+                    self.conn.execute("DELETE FROM pages WHERE key = ?", (key,))
+                    total -= size
+                    evicted += 1
+
+            self.conn.commit()
+            self.stats['evicted'] += evicted
+
+    def print_summary(self):
+        """Print hit/miss counts for this run"""
+        stats = self.stats
+        print(f"\nCache: {stats['hits']} hits, {stats['misses']} misses "
+              f"({stats['unchanged']} unchanged, {stats['changed']} changed), {stats['evicted']} evicted")
+
+    def close(self):
+        self.evict()
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,126 @@
+"""Overlap page fetching with HTML parsing.
+
+BeautifulSoup parsing is CPU-bound and holds the GIL, so a browser or
+HTTP worker that parses its own pages sits idle while it does. Pages are
+instead parsed in a shared process pool: a ParsePipeline lets a fetching
+thread hand off raw HTML and move straight on to the next page, while a
+writer thread collects the parsed results in submission order. The
+queue between them is bounded, so a fast fetcher blocks rather than
+piling up pages in memory. Parse functions must be module-level (they
+are pickled into the pool); timings they record stay in the worker
+process.
+
+With no pool (parse_workers=0) everything runs inline, as before.
+"""
+from concurrent.futures import Future
+import atexit
+import os
+import queue
+import threading
+
+DEFAULT_PARSE_WORKERS = min(4, os.cpu_count() or 1)
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def parse_pool(workers):
+    """Process pool with `workers` parsers, shared across the run; None to parse inline"""
+    if workers <= 0:
+        return None
+    # Imported here so --help and API-only runs don't load multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    import multiprocessing
+    
+    with _pools_lock:
+        if workers not in _pools:
+            # spawn rather than fork: the scrapers fork from threaded code
+            _pools[workers] = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn'))
+        return _pools[workers]
+
+@atexit.register
+def shutdown_pools():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.shutdown(cancel_futures=True)
+        _pools.clear()
+
+def run_parse(pool, parse, *args):
+    """parse(*args) in pool, or inline without one, and wait for the result"""
+    if pool is None:
+        return parse(*args)
+    return pool.submit(parse, *args).result()
+
+class ParsePipeline:
+    """Ordered fetch -> parse -> write stages around a parse pool.
+
+    submit() queues raw HTML for parse(*args) and returns immediately;
+    ready() queues a value the fetcher already has (a cached item, say)
+    so it keeps its place in the order. on_result(key, result) is called
+    from the writer thread in submission order, with None for a parse
+    that raised. At most max_pending pages are in flight. Used as a
+    context manager; leaving it waits for every page to be written.
+    Inline parses are timed as the 'html_parse' phase of metrics, if given.
+    """
+
+    def __init__(self, pool, on_result, max_pending=8, metrics=None):
+        self.pool = pool
+        self.metrics = metrics
+        self.on_result = on_result
+        self.pending = queue.Queue(maxsize=max_pending)
+        self.error = None
+        self.writer = threading.Thread(target=self.write_loop, daemon=True)
+        self.writer.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def submit(self, key, parse, *args):
+        """Queue parse(*args) for key; blocks while max_pending pages are in flight"""
+        if self.pool is None:
+            future = Future()
+            try:
+                if self.metrics is None:
+                    future.set_result(parse(*args))
+                else:
+                    with self.metrics.phase('html_parse'):
+                        future.set_result(parse(*args))
+            except Exception as e:
+                future.set_exception(e)
+        else:
+            future = self.pool.submit(parse, *args)
+        self.pending.put((key, future))
+
+    def ready(self, key, value):
+        """Queue an already known result for key"""
+        future = Future()
+        future.set_result(value)
+        self.pending.put((key, future))
+
+    def write_loop(self):
+        while True:
+            entry = self.pending.get()
+            if entry is None:
+                return
+            key, future = entry
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"  Parse failed ({key}): {e}")
+                result = None
+            try:
+                self.on_result(key, result)
+            except Exception as e:
+                # Keep draining so the fetcher never blocks on a dead writer
+                self.error = self.error or e
+
+    def close(self):
+        """Wait until every queued page has been written; re-raise a writer error"""
+        if self.writer.is_alive():
+            self.pending.put(None)
+            self.writer.join()
+        if self.error:
+            raise self.error
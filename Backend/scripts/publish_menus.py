@@ -0,0 +1,220 @@
+"""Publish scraped menus to MongoDB as per-restaurant deltas.
+
+populateMenus.js replaces a restaurant's whole menuItems array on every
+run. This compares each Menus/*.csv with the menuItems stored for its ID
+in restaurant_ids.json and sends only the added, changed and removed
+items, as one ordered bulk write per restaurant. Every CSV row is kept, as
+populateMenus.js keeps it, and read the same way. Rows are matched with
+stored items by itemName and, for names a menu repeats, by their order
+among the rows of that name.
+
+    python publish_menus.py                               # every mapped CSV in Menus/
+    python publish_menus.py starbucks_menu.csv --dry-run  # show the delta only
+
+publish_menu() takes any pymongo-style collection, so it runs the same
+against a local mongod (--mongo-uri mongodb://localhost:27017/bronco) or
+an in-memory stand-in such as mongomock.
+"""
+from datetime import datetime, timezone
+import argparse
+import json
+import os
+import sys
+
+import bson
+from bson import ObjectId
+from pymongo import MongoClient, UpdateOne
+
+from menu_csv import load_menu_csv
+from run_metrics import metrics_for
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+MENUS_DIR = os.path.join(SCRIPTS_DIR, 'Menus')
+RESTAURANT_IDS_FILE = os.path.join(SCRIPTS_DIR, 'restaurant_ids.json')
+ENV_FILE = os.path.join(os.path.dirname(SCRIPTS_DIR), '.env')
+
+METRICS = metrics_for('publish')
+
+def index_by_occurrence(items):
+    """{(itemName, n): item}, where n counts the earlier items with the same name
+
+    Menus repeat names with different nutrition (sizes, sides), and
+    populateMenus.js keeps every row, so the n-th row of a name is matched
+    with the n-th stored item of that name rather than collapsed into one.
+    """
+    seen = {}
+    index = {}
+    for item in items:
+        name = item.get('itemName')
+        occurrence = seen.get(name, 0)
+        seen[name] = occurrence + 1
+        index[(name, occurrence)] = item
+    return index
+
+def changed_fields(stored, new):
+    """Return the fields of new that differ from the stored item"""
+    changes = {}
+    for field in ('calories', 'vegetarian', 'allergens'):
+        if stored.get(field) != new[field]:
+            changes[field] = new[field]
+    stored_nutrition = stored.get('nutrition') or {}
+    if any(stored_nutrition.get(key) != value for key, value in new['nutrition'].items()):
+        changes['nutrition'] = new['nutrition']
+    return changes
+
+def diff_menu(stored_items, new_items):
+    """Return (added items, {stored item _id: changed fields}, removed item _ids)
+
+    Stored items are addressed by the _id mongoose gives every subdocument,
+    so rows sharing a name are updated and removed one at a time.
+    """
+    new = index_by_occurrence(new_items)
+    stored = index_by_occurrence(stored_items)
+
+    added = [item for key, item in new.items() if key not in stored]
+    updated = {}
+    for key, item in new.items():
+        if key in stored:
+            changes = changed_fields(stored[key], item)
+            if changes:
+                updated[stored[key]['_id']] = changes
+    removed = [item['_id'] for key, item in stored.items() if key not in new]
+    return added, updated, removed
+
+def with_ids(items):
+    # Mongoose gives every subdocument an _id; do the same so later deltas can address them
+    return [dict(item, _id=ObjectId()) for item in items]
+
+def build_operations(restaurant_id, added, updated, removed, replace=None):
+    """Bulk write operations for one restaurant's delta, plus their BSON size
+
+    With replace, the whole menuItems array is set to those items instead.
+    """
+    statements = []
+    if replace is not None:
+        statements.append(({'_id': restaurant_id}, {'$set': {'menuItems': with_ids(replace)}}))
+    if removed:
+        statements.append(({'_id': restaurant_id}, {'$pull': {'menuItems': {'_id': {'$in': removed}}}}))
+    for item_id, changes in updated.items():
+        # Matching the item's _id makes the positional $ hit exactly that item
+        statements.append((
+            {'_id': restaurant_id, 'menuItems._id': item_id},
+            {'$set': {f'menuItems.$.{field}': value for field, value in changes.items()}}
+        ))
+    if added:
+        statements.append(({'_id': restaurant_id}, {'$push': {'menuItems': {'$each': with_ids(added)}}}))
+    if statements:
+        # Keep the timestamps mongoose maintains in step with the change
+        statements.append(({'_id': restaurant_id}, {'$set': {'updatedAt': datetime.now(timezone.utc)}}))
+
+    operations = [UpdateOne(query, update) for query, update in statements]
+    size = sum(len(bson.encode({'q': query, 'u': update})) for query, update in statements)
+    return operations, size
+
+def publish_menu(collection, restaurant_id, items, dry_run=False):
+    """Bring one restaurant's stored menuItems in line with items.
+
+    Returns a dict with the counts of added/updated/removed items, the
+    number of operations and bytes sent, and the documents modified.
+    """
+    result = {'restaurant_id': str(restaurant_id), 'name': '', 'status': 'ok', 'added': 0, 'updated': 0,
+              'removed': 0, 'operations': 0, 'bytes': 0, 'documents': 0}
+    restaurant_id = ObjectId(restaurant_id)
+
+    with METRICS.phase('db_read'):
+        restaurant = collection.find_one({'_id': restaurant_id}, {'name': 1, 'menuItems': 1})
+    if restaurant is None:
+        result['status'] = 'missing'
+        return result
+    result['name'] = restaurant.get('name', '')
+
+    stored_items = restaurant.get('menuItems') or []
+    if all('_id' in item for item in stored_items):
+        added, updated, removed = diff_menu(stored_items, items)
+        operations, size = build_operations(restaurant_id, added, updated, removed)
+    else:
+        # Items written without an _id can't be addressed one at a time; replace them all once
+        added, updated, removed = items, {}, stored_items
+        operations, size = build_operations(restaurant_id, [], {}, [], replace=items)
+    result.update(added=len(added), updated=len(updated), removed=len(removed),
+                  operations=len(operations), bytes=size)
+
+    if not operations:
+        result['status'] = 'unchanged'
+    elif dry_run:
+        result['status'] = 'dry-run'
+    else:
+        with METRICS.phase('db_write'):
+            write = collection.bulk_write(operations, ordered=True)
+        result['documents'] = 1 if write.modified_count else 0
+    return result
+
+def load_mongo_uri():
+    """MONGO_URI from the environment, else from Backend/.env like the Node scripts"""
+    uri = os.environ.get('MONGO_URI')
+    if uri or not os.path.exists(ENV_FILE):
+        return uri
+    with open(ENV_FILE, encoding='utf-8') as f:
+        for line in f:
+            key, _, value = line.strip().partition('=')
+            if key.strip() == 'MONGO_URI':
+                return value.strip().strip('"\'')
+    return None
+
+def restaurants_collection(client):
+    # Same database mongoose connects to: the one named in the URI, else "test"
+    return client.get_default_database(default='test')['restaurants']
+
+def publish_files(collection, filenames, menus_dir=MENUS_DIR, dry_run=False):
+    """Publish Menus CSVs by their restaurant_ids.json filename; returns per-file results"""
+    with open(RESTAURANT_IDS_FILE, encoding='utf-8') as f:
+        id_map = json.load(f)
+
+    results = []
+    for filename in filenames:
+        restaurant_id = id_map.get(filename)
+        if not restaurant_id:
+            print(f"⚠️ No ID mapping for {filename}, skipping")
+            continue
+        items = load_menu_csv(os.path.join(menus_dir, filename))
+        result = publish_menu(collection, restaurant_id, items, dry_run=dry_run)
+        result['file'] = filename
+        results.append(result)
+        if result['status'] == 'missing':
+            print(f"⚠️ Restaurant with ID {restaurant_id} not found ({filename})")
+    return results
+
+def print_publish_summary(results):
+    print("\n" + "="*60)
+    print("PUBLISH SUMMARY")
+    print("="*60)
+    for r in results:
+        print(f"{r['file']:<36} {r['status']:<9} +{r['added']:<4} ~{r['updated']:<4} -{r['removed']:<4} "
+              f"{r['operations']:>2} ops {r['bytes']:>8} bytes")
+    print(f"\nTotal: {sum(r['documents'] for r in results)} documents, "
+          f"{sum(r['operations'] for r in results)} operations, {sum(r['bytes'] for r in results)} bytes written")
+
+def main():
+    parser = argparse.ArgumentParser(description="Publish Menus/*.csv to MongoDB as per-restaurant deltas")
+    parser.add_argument('files', nargs='*', help="menu CSV filenames (default: every mapped CSV in Menus/)")
+    parser.add_argument('--menus-dir', default=MENUS_DIR, help="directory holding the menu CSVs")
+    parser.add_argument('--mongo-uri', default=load_mongo_uri(), help="MongoDB connection string (default: MONGO_URI)")
+    parser.add_argument('--dry-run', action='store_true', help="compute and report the deltas without writing")
+    args = parser.parse_args()
+
+    if not args.mongo_uri:
+        parser.error("no MongoDB URI: set MONGO_URI or pass --mongo-uri")
+
+    filenames = args.files or sorted(f for f in os.listdir(args.menus_dir) if f.endswith('.csv'))
+    client = MongoClient(args.mongo_uri)
+    try:
+        results = publish_files(restaurants_collection(client), filenames, args.menus_dir, args.dry_run)
+    finally:
+        client.close()
+
+    print_publish_summary(results)
+    if any(r['status'] == 'missing' for r in results):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
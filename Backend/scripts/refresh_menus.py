@@ -0,0 +1,258 @@
+"""Refresh every scraped menu in Menus/ in one run.
+
+Each scraper is wrapped in a MenuSource plugin that says which Menus/*.csv
+files (the keys of restaurant_ids.json) it produces. Sources run
+concurrently, a failing source never touches its files or stops the
+others, and the files are written in the schema populateMenus.js reads.
+
+    python refresh_menus.py                      # all registered sources
+    python refresh_menus.py --only starbucks     # just one
+    python refresh_menus.py --publish            # then push the deltas to MongoDB
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+from menu_item import write_menu_csv
+from run_metrics import all_metrics, report_path, write_json_report, write_prometheus_textfile
+from page_cache import PageCache, DEFAULT_CACHE_PATH
+from item_store import ItemStore, normalize_text
+from fetch_control import CONTROLLER
+from parse_pipeline import DEFAULT_PARSE_WORKERS
+from driver_recycler import DEFAULT_MAX_PAGES, DEFAULT_MAX_RSS_MB
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+MENUS_DIR = os.path.join(SCRIPTS_DIR, 'Menus')
+RESTAURANT_IDS_FILE = os.path.join(SCRIPTS_DIR, 'restaurant_ids.json')
+
+SOURCES = {}
+
+def register_source(source):
+    """Add a MenuSource to the runner"""
+    SOURCES[source.name] = source
+    return source
+
+class MenuSource:
+    """Plugin interface: scrape() returns {menu filename: [MenuItem]}"""
+    name = ''
+    filenames = []
+
+    def scrape(self, options):
+        raise NotImplementedError
+
+class NutrisliceSource(MenuSource):
+    """Centerpointe breakfast/lunch/dinner from Nutrislice, one batch crawl"""
+
+    def __init__(self, name, location, meal_files, district='cpp'):
+        self.name = name
+        self.location = location
+        self.meal_files = meal_files
+        self.district = district
+        self.filenames = list(meal_files.values())
+
+    def scrape(self, options):
+        import nutrislice_scraper
+
+        menu_date = options.date
+        results = nutrislice_scraper.scrape_nutrislice_batch(
+            [self.location], list(self.meal_files), [menu_date],
+            district=self.district, cache=options.cache, store=options.store, lean=options.lean,
+            parse_workers=options.parse_workers, recycle_pages=options.recycle_pages, max_browser_mb=options.max_browser_mb
+        )
+        return {
+            filename: results.get((self.location, meal, menu_date), [])
+            for meal, filename in self.meal_files.items()
+        }
+
+class StarbucksSource(MenuSource):
+    name = 'starbucks'
+    filenames = ['starbucks_menu.csv']
+
+    def scrape(self, options):
+        from starbucks_scraper import StarbucksScraper
+
+        scraper = StarbucksScraper(workers=options.workers, cache=options.cache, store=options.store, lean=options.lean,
+                                   parse_workers=options.parse_workers, recycle_pages=options.recycle_pages,
+                                   max_browser_mb=options.max_browser_mb)
+        items = scraper.scrape_menu()
+        return {'starbucks_menu.csv': items}
+
+register_source(NutrisliceSource('centerpointe', 'centerpointe-dining-commons', {
+    'breakfast': 'centerpointe_breakfast_menu.csv',
+    'lunch': 'centerpointe_lunch_menu.csv',
+    'dinner': 'centerpointe_dinner_menu.csv'
+}))
+register_source(StarbucksSource())
+
+def previous_vegetarian_flags(path):
+    """{normalized item name: vegetarian} from the TRUE/FALSE cells of an existing Menus CSV"""
+    if not os.path.exists(path):
+        return {}
+    flags = {}
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        for row in csv.DictReader(f):
+            value = (row.get('Vegetarian') or '').strip().upper()
+            if value in ('TRUE', 'FALSE'):
+                flags.setdefault(normalize_text(row.get('Item Name')), value == 'TRUE')
+    return flags
+
+def carry_over_vegetarian(path, items):
+    """Fill in vegetarian flags the source couldn't tell from the file being replaced
+
+    Returns how many items are still unknown; their cells are left blank.
+    """
+    unknown = [item for item in items if item.vegetarian is None]
+    if not unknown:
+        return 0
+    flags = previous_vegetarian_flags(path)
+    for item in unknown:
+        item.vegetarian = flags.get(normalize_text(item.name))
+    return sum(1 for item in unknown if item.vegetarian is None)
+
+def run_source(source, options, known_files):
+    """Scrape one source and write its files; never raises"""
+    start = time.perf_counter()
+    result = {'source': source.name, 'status': 'ok', 'items': 0, 'files': [], 'error': ''}
+
+    try:
+        menus = source.scrape(options)
+        for filename, items in menus.items():
+            if filename not in known_files:
+                print(f"⚠️ {source.name}: {filename} is not in restaurant_ids.json, skipping")
+                continue
+            if not items:
+                # Keep yesterday's menu rather than publishing an empty one
+                print(f"⚠️ {source.name}: no items for {filename}, keeping existing file")
+                result['status'] = 'partial'
+                continue
+            path = os.path.join(options.menus_dir, filename)
+            unknown = carry_over_vegetarian(path, items)
+            if unknown:
+                print(f"⚠️ {source.name}: {unknown} new items in {filename} have no vegetarian flag, left blank")
+            write_menu_csv(path, items)
+            result['files'].append(filename)
+            result['items'] += len(items)
+    except Exception as e:
+        result['status'] = 'failed'
+        result['error'] = str(e)
+        print(f"✗ {source.name} failed: {e}")
+
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+def print_run_summary(results, known_files, wall_seconds):
+    print("\n" + "="*60)
+    print("MENU REFRESH SUMMARY")
+    print("="*60)
+    for result in results:
+        marker = {'ok': '✓', 'partial': '~', 'failed': '✗'}[result['status']]
+        details = [', '.join(result['files'])] if result['files'] else []
+        if result['error']:
+            details.append(f"error: {result['error']}")
+        print(f"{marker} {result['source']:<14} {result['status']:<8} {result['items']:>5} items  "
+              f"{result['seconds']:>7.1f}s  {'; '.join(details)}")
+
+    covered = {filename for source in SOURCES.values() for filename in source.filenames}
+    manual = sorted(set(known_files) - covered)
+    if manual:
+        print(f"\nNo scraper registered (left as is): {', '.join(manual)}")
+    print(f"\nTotal: {sum(r['items'] for r in results)} items in {wall_seconds:.1f}s")
+
+def publish_refreshed(results, options):
+    """Send only what changed in the files this run wrote to MongoDB"""
+    import publish_menus
+    from pymongo import MongoClient
+
+    filenames = [filename for result in results for filename in result['files']]
+    if not filenames:
+        print("Nothing refreshed, skipping publish")
+        return
+
+    client = MongoClient(options.mongo_uri or publish_menus.load_mongo_uri())
+    try:
+        published = publish_menus.publish_files(publish_menus.restaurants_collection(client), filenames, options.menus_dir)
+    finally:
+        client.close()
+    publish_menus.print_publish_summary(published)
+
+def add_arguments(parser):
+    """Command-line options for a refresh run (also used by scrape.py)"""
+    parser.add_argument('--only', nargs='+', choices=sorted(SOURCES), help="refresh only these sources")
+    parser.add_argument('--concurrency', type=int, default=len(SOURCES), help="sources to run at once (default: all)")
+    parser.add_argument('--workers', type=int, default=2, help="product workers for sources that support them (default: 2)")
+    parser.add_argument('--date', type=date.fromisoformat, default=date.today(), help="menu date for dated sources (default: today)")
+    parser.add_argument('--lean', action='store_true', help="run browsers in lean mode (no images, fonts, media or trackers)")
+    parser.add_argument('--recycle-pages', type=int, default=DEFAULT_MAX_PAGES, help=f"restart each browser after this many pages (0 = never, default: {DEFAULT_MAX_PAGES})")
+    parser.add_argument('--max-browser-mb', type=int, default=DEFAULT_MAX_RSS_MB, help=f"restart a browser whose memory passes this many MB (0 = never, default: {DEFAULT_MAX_RSS_MB})")
+    parser.add_argument('--parse-workers', type=int, default=DEFAULT_PARSE_WORKERS,
+                        help=f"processes parsing pages while the scrapers keep fetching, shared by all sources (0 = parse inline, default: {DEFAULT_PARSE_WORKERS})")
+    parser.add_argument('--menus-dir', default=MENUS_DIR, help="directory to write menu CSVs into")
+    parser.add_argument('--cache', default=DEFAULT_CACHE_PATH, help=f"page cache file (default: {DEFAULT_CACHE_PATH})")
+    parser.add_argument('--cache-ttl', type=float, default=12, help="hours before cached pages are re-checked (default: 12)")
+    parser.add_argument('--item-ttl', type=float, default=7, help="days a known dish or product's nutrition is reused (default: 7)")
+    parser.add_argument('--no-cache', action='store_true', help="fetch and parse every page")
+    parser.add_argument('--report', default=report_path('refresh_report.json'), help="JSON run report with per-phase timings (default: reports/refresh_report.json)")
+    parser.add_argument('--prometheus', help="also write metrics to this Prometheus textfile")
+    parser.add_argument('--dataset', help="also write the columnar nutrition dataset (.npz, see nutrition_matrix.py)")
+    parser.add_argument('--publish', action='store_true', help="publish the refreshed menus to MongoDB (see publish_menus.py)")
+    parser.add_argument('--mongo-uri', help="MongoDB connection string for --publish (default: MONGO_URI)")
+    parser.add_argument('--dry-run', action='store_true', help="list the sources and files a run would refresh and exit")
+
+def run(args):
+    """Refresh the selected sources, then write the dataset and publish if asked"""
+    with open(RESTAURANT_IDS_FILE, encoding='utf-8') as f:
+        known_files = json.load(f)
+
+    if args.dry_run:
+        for name in args.only or SOURCES:
+            print(f"{name}: {', '.join(SOURCES[name].filenames)}")
+        print(f"-> {args.menus_dir} for {args.date.isoformat()}{', then publish' if args.publish else ''}")
+        return
+
+    cache_path = args.cache
+    args.cache = None if args.no_cache else PageCache(cache_path, ttl=args.cache_ttl * 3600)
+    args.store = None if args.no_cache else ItemStore(cache_path, ttl=args.item_ttl * 24 * 3600)
+    sources = [SOURCES[name] for name in (args.only or SOURCES)]
+
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as pool:
+            results = list(pool.map(lambda source: run_source(source, args, known_files), sources))
+    finally:
+        if args.cache:
+            args.cache.print_summary()
+            args.cache.close()
+        if args.store:
+            args.store.print_summary()
+            args.store.close()
+
+    print_run_summary(results, known_files, time.perf_counter() - start)
+    CONTROLLER.print_summary()
+    
+    if args.dataset:
+        from nutrition_matrix import NutritionMatrix
+        matrix = NutritionMatrix.from_menus(args.menus_dir)
+        matrix.save(args.dataset)
+        print(f"Wrote {len(matrix)} items to {args.dataset}")
+    
+    if args.publish:
+        publish_refreshed(results, args)
+    write_json_report(args.report, all_metrics())
+    if args.prometheus:
+        write_prometheus_textfile(args.prometheus, all_metrics())
+
+    if any(result['status'] == 'failed' for result in results):
+        sys.exit(1)
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh every scraped menu CSV in Menus/")
+    add_arguments(parser)
+    run(parser.parse_args())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+import json
+import os
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Run reports go here by default, out of the working tree's way (see .gitignore)
+REPORTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'reports')
+
+# Latest durations kept per phase for its percentiles. Counts, totals and
+# maxima cover every sample, so a long-lived daemon's metrics stay bounded.
+MAX_PHASE_SAMPLES = 4096
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+def python_peak_rss_mb():
+    """Peak resident memory of this whole process in MB, or None where unavailable"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS, kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+class PhaseStats:
+    """Count, total and max of a phase's durations, plus its latest MAX_PHASE_SAMPLES"""
+
+    __slots__ = ['count', 'total', 'max', 'samples']
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = deque(maxlen=MAX_PHASE_SAMPLES)
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.samples.append(seconds)
+
+class RunMetrics:
+    """Per-phase timings, failures and item counts for one scraper source.
+
+    Phases are free-form names such as 'driver_startup', 'page_load',
+    'modal_open', 'html_parse' or 'csv_write'. Counters total other
+    per-run quantities such as 'page_bytes'; peaks keep the highest
+    value seen, such as 'browser_rss_mb'. Safe to share between worker
+    threads.
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.durations = {}
+        self.failures = {}
+        self.counters = {}
+        self.peaks = {}
+        self.items = 0
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name):
+        """Time the enclosed block; an exception counts as a failure and is re-raised"""
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.record(name, time.perf_counter() - start, ok=False)
+            raise
+        self.record(name, time.perf_counter() - start)
+
+    def record(self, name, seconds, ok=True):
+        with self.lock:
+            self.durations.setdefault(name, PhaseStats()).add(seconds)
+            self.failures.setdefault(name, 0)
+            if not ok:
+                self.failures[name] += 1
+
+    def fail(self, name):
+        """Count a failure for a phase that didn't raise (e.g. a parse that found nothing)"""
+        with self.lock:
+            self.failures[name] = self.failures.get(name, 0) + 1
+            self.durations.setdefault(name, PhaseStats())
+
+    def reset(self):
+        """Forget everything recorded so far and restart the wall clock"""
+        with self.lock:
+            self.started_at = time.time()
+            self.start = time.perf_counter()
+            self.durations = {}
+            self.failures = {}
+            self.counters = {}
+            self.peaks = {}
+            self.items = 0
+
+    def add(self, counter, value):
+        """Add value to a named counter"""
+        with self.lock:
+            self.counters[counter] = self.counters.get(counter, 0) + value
+
+    def peak(self, name, value):
+        """Keep the highest value seen for a named peak"""
+        with self.lock:
+            self.peaks[name] = max(value, self.peaks.get(name, value))
+
+    def add_items(self, count=1):
+        with self.lock:
+            self.items += count
+
+    def report(self):
+        """Return the run as a JSON-serializable dict"""
+        with self.lock:
+            wall = time.perf_counter() - self.start
+            phases = {}
+            for name, stats in self.durations.items():
+                # Percentiles are over the latest samples only
+                values = sorted(stats.samples)
+                phases[name] = {
+                    'count': stats.count,
+                    'failures': self.failures.get(name, 0),
+                    'total_seconds': round(stats.total, 4),
+                    'p50_seconds': round(percentile(values, 0.50), 4),
+                    'p95_seconds': round(percentile(values, 0.95), 4),
+                    'max_seconds': round(stats.max, 4),
+                    'per_sec': round(stats.count / wall, 3) if wall else 0.0
+                }
+            report = {
+                'source': self.source,
+                'started_at': datetime.fromtimestamp(self.started_at, timezone.utc).isoformat(),
+                'wall_seconds': round(wall, 3),
+                'items': self.items,
+                'items_per_sec': round(self.items / wall, 3) if wall else 0.0,
+                'phases': phases,
+                'counters': dict(self.counters),
+                'peaks': {name: round(value, 1) for name, value in self.peaks.items()}
+            }
+            python_peak = python_peak_rss_mb()
+            if python_peak is not None:
+                report['peaks']['python_rss_mb'] = round(max(python_peak, self.peaks.get('python_rss_mb', 0)), 1)
+            return report
+
+    def print_summary(self):
+        """Print the slowest phases by total time"""
+        report = self.report()
+        print(f"\nPhase timings ({self.source}): {report['items']} items in {report['wall_seconds']:.1f}s "
+              f"({report['items_per_sec']:.2f} items/sec)")
+        for name, phase in sorted(report['phases'].items(), key=lambda p: -p[1]['total_seconds']):
+            print(f"  {name:<24} n={phase['count']:<5} p50 {phase['p50_seconds']:.3f}s  p95 {phase['p95_seconds']:.3f}s  "
+                  f"max {phase['max_seconds']:.3f}s  total {phase['total_seconds']:.1f}s  failures {phase['failures']}")
+        for name, value in sorted(report['counters'].items()):
+            print(f"  {name:<24} {value}")
+        for name, value in sorted(report['peaks'].items()):
+            print(f"  {name:<24} peak {value}")
+
+def metrics_for(source):
+    """Return the RunMetrics for source, creating it on first use"""
+    with _registry_lock:
+        metrics = _registry.get(source)
+        if metrics is None:
+            metrics = RunMetrics(source)
+            _registry[source] = metrics
+        return metrics
+
+def all_metrics():
+    with _registry_lock:
+        return list(_registry.values())
+
+def report_path(filename):
+    """Default location of a run report file, in REPORTS_DIR"""
+    return os.path.join(REPORTS_DIR, filename)
+
+def write_atomic(path, text):
+    """Write text to path via a temp file so readers never see a partial file"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+def write_json_report(path, metrics_list=None):
+    """Write every source's report to a JSON file"""
+    metrics_list = metrics_list if metrics_list is not None else all_metrics()
+    report = {
+        'generated_at': datetime.now(timezone.utc).isoformat(),
+        'sources': {m.source: m.report() for m in metrics_list}
+    }
+    write_atomic(path, json.dumps(report, indent=2) + '\n')
+    print(f"Wrote run report to {path}")
+
+def prometheus_text(metrics_list=None):
+    """Render reports in the Prometheus text exposition format"""
+    metrics_list = metrics_list if metrics_list is not None else all_metrics()
+    lines = [
+        '# HELP scraper_phase_seconds Duration of scraper phases.',
+        '# TYPE scraper_phase_seconds summary',
+    ]
+    failure_lines = [
+        '# HELP scraper_phase_failures_total Failed scraper phase runs.',
+        '# TYPE scraper_phase_failures_total counter',
+    ]
+    items_lines = [
+        '# HELP scraper_items Menu items scraped in the last run.',
+        '# TYPE scraper_items gauge',
+    ]
+    rate_lines = [
+        '# HELP scraper_items_per_second Items scraped per second in the last run.',
+        '# TYPE scraper_items_per_second gauge',
+    ]
+    wall_lines = [
+        '# HELP scraper_run_seconds Wall time of the last run.',
+        '# TYPE scraper_run_seconds gauge',
+    ]
+    counter_lines = [
+        '# HELP scraper_counter Per-run scraper counters such as page bytes, reset every run.',
+        '# TYPE scraper_counter gauge',
+    ]
+    peak_lines = [
+        '# HELP scraper_peak Highest value seen in the last run, such as browser RSS in MB.',
+        '# TYPE scraper_peak gauge',
+    ]
+
+    for metrics in metrics_list:
+        report = metrics.report()
+        source = report['source']
+        for name, phase in report['phases'].items():
+            labels = f'source="{source}",phase="{name}"'
+            lines.append(f'scraper_phase_seconds{{{labels},quantile="0.5"}} {phase["p50_seconds"]}')
+            lines.append(f'scraper_phase_seconds{{{labels},quantile="0.95"}} {phase["p95_seconds"]}')
+            lines.append(f'scraper_phase_seconds{{{labels},quantile="1"}} {phase["max_seconds"]}')
+            lines.append(f'scraper_phase_seconds_sum{{{labels}}} {phase["total_seconds"]}')
+            lines.append(f'scraper_phase_seconds_count{{{labels}}} {phase["count"]}')
+            failure_lines.append(f'scraper_phase_failures_total{{{labels}}} {phase["failures"]}')
+        items_lines.append(f'scraper_items{{source="{source}"}} {report["items"]}')
+        rate_lines.append(f'scraper_items_per_second{{source="{source}"}} {report["items_per_sec"]}')
+        wall_lines.append(f'scraper_run_seconds{{source="{source}"}} {report["wall_seconds"]}')
+        for name, value in report['counters'].items():
+            counter_lines.append(f'scraper_counter{{source="{source}",counter="{name}"}} {value}')
+        for name, value in report['peaks'].items():
+            peak_lines.append(f'scraper_peak{{source="{source}",peak="{name}"}} {value}')
+
+    return '\n'.join(lines + failure_lines + items_lines + rate_lines + wall_lines + counter_lines + peak_lines) + '\n'
+
+def write_prometheus_textfile(path, metrics_list=None):
+    """Write a textfile for the node_exporter textfile collector"""
+    write_atomic(path, prometheus_text(metrics_list))
+    print(f"Wrote Prometheus metrics to {path}")
@@ -0,0 +1,71 @@
+"""One command-line entry point for the menu scrapers.
+
+    python scrape.py nutrislice --locations centerpointe-dining-commons --days 7 --merged week.csv
+    python scrape.py nutrislice --url https://cpp.nutrislice.com/menu/.../lunch/2025-11-24 --dry-run
+    python scrape.py starbucks --workers 4 --output starbucks_menu.csv
+    python scrape.py all --only centerpointe --publish
+    python scrape.py bench parsers --only starbucks
+    python scrape.py bench startup
+    python scrape.py bench e2e --sizes 100 --latency 0.05
+
+Each subcommand takes the same options as the script it runs
+(nutrislice_scraper.py, starbucks_scraper.py, refresh_menus.py). Those
+modules keep Selenium, BeautifulSoup and requests out of their imports,
+so --help, --dry-run and API-only runs start without loading the browser
+stack; benchmarks/bench_startup.py fails if that regresses.
+"""
+import argparse
+import os
+import sys
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+BENCH_DIR = os.path.join(SCRIPTS_DIR, 'benchmarks')
+
+# bench suite -> module in benchmarks/
+BENCH_SUITES = {
+    'parsers': 'bench_parsers',
+    'browser': 'bench_browser',
+    'startup': 'bench_startup',
+    'e2e': 'bench_e2e'
+}
+
+def run_bench(args):
+    """Run one benchmark script with the rest of the command line"""
+    import importlib
+
+    sys.path.insert(0, BENCH_DIR)
+    importlib.import_module(BENCH_SUITES[args.suite]).main(args.bench_args)
+
+def build_parser():
+    import nutrislice_scraper
+    import starbucks_scraper
+    import refresh_menus
+
+    parser = argparse.ArgumentParser(description="Scrape menus, refresh Menus/ and run benchmarks")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    nutrislice = subparsers.add_parser('nutrislice', help="scrape Nutrislice menu pages to CSV")
+    nutrislice_scraper.add_arguments(nutrislice)
+    nutrislice.set_defaults(handler=nutrislice_scraper.run)
+
+    starbucks = subparsers.add_parser('starbucks', help="scrape the Starbucks menu to CSV")
+    starbucks_scraper.add_arguments(starbucks)
+    starbucks.set_defaults(handler=starbucks_scraper.run)
+
+    refresh = subparsers.add_parser('all', help="refresh every scraped menu in Menus/")
+    refresh_menus.add_arguments(refresh)
+    refresh.set_defaults(handler=refresh_menus.run)
+
+    bench = subparsers.add_parser('bench', help="run a benchmark (see benchmarks/)")
+    bench.add_argument('suite', choices=sorted(BENCH_SUITES), help="which benchmark to run")
+    bench.add_argument('bench_args', nargs=argparse.REMAINDER, help="options for the benchmark, e.g. --update-baseline")
+    bench.set_defaults(handler=run_bench)
+
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.handler(args)
+
+if __name__ == "__main__":
+    main()
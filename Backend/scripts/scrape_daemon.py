@@ -0,0 +1,432 @@
+"""Long-lived scraper with warm browser sessions and a local job API.
+
+Imports, Chrome startup, the Nutrislice 'View Menus' splash and the
+Starbucks cookie banner are paid once when the daemon starts. Jobs are
+queued per source and run on that source's warm sessions, so a refresh
+requested by the backend or cron costs only the scrape itself.
+
+    python scrape_daemon.py                          # HTTP on 127.0.0.1:8642
+    python scrape_daemon.py --socket /tmp/scrape.sock
+
+    curl -X POST localhost:8642/jobs -d '{"source": "nutrislice", "location": "centerpointe-dining-commons",
+                                          "meal": "lunch", "date": "2025-11-24"}'
+    curl localhost:8642/jobs/<id>
+    curl -X POST 'localhost:8642/jobs?wait=60' -d '{"source": "starbucks"}'   # block until done
+    curl localhost:8642/health
+    curl localhost:8642/metrics                      # Prometheus text
+"""
+from collections import OrderedDict
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+import argparse
+import itertools
+import json
+import os
+import queue
+import signal
+import socketserver
+import threading
+import time
+
+import nutrislice_scraper
+from starbucks_scraper import StarbucksScraper
+from page_cache import PageCache, DEFAULT_CACHE_PATH
+from item_store import ItemStore
+from run_metrics import all_metrics, prometheus_text
+from wait_engine import waits_for
+from scraper_common import create_http_session, load_page
+
+DEFAULT_PORT = 8642
+
+# Finished jobs kept for GET /jobs/<id> before the oldest are dropped
+MAX_FINISHED_JOBS = 500
+
+# Weekly API responses kept per Nutrislice session
+MAX_CACHED_WEEKS = 64
+
+# Longest a POST /jobs?wait=<seconds> request blocks
+MAX_WAIT_SECONDS = 600
+
+class Job:
+    """One scrape request and, once it has run, its result"""
+    _ids = itertools.count(1)
+
+    def __init__(self, spec):
+        self.id = str(next(Job._ids))
+        self.spec = spec
+        self.status = 'queued'
+        self.items = None
+        self.error = ''
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.done = threading.Event()
+
+    def to_dict(self, include_items=True):
+        result = {
+            'id': self.id,
+            'status': self.status,
+            'spec': self.spec,
+            'queued_seconds': round((self.started or time.time()) - self.created, 3),
+            'run_seconds': round((self.finished or time.time()) - self.started, 3) if self.started else 0.0,
+            'error': self.error
+        }
+        if include_items and self.items is not None:
+            result['count'] = len(self.items)
+            result['items'] = self.items
+        return result
+
+def check_spec(source, spec, fields):
+    """Raise ValueError unless spec only has source and fields, each field a non-empty string"""
+    unknown = sorted(set(spec) - set(fields) - {'source'})
+    if unknown:
+        raise ValueError(f"{source} jobs don't take {', '.join(unknown)}")
+    for key in fields:
+        if key in spec and not (isinstance(spec[key], str) and spec[key].strip()):
+            raise ValueError(f"{key} must be a non-empty string")
+
+class NutrisliceSession:
+    """A warm Nutrislice worker: HTTP session and week cache, plus a browser past the splash"""
+    source = 'nutrislice'
+
+    def __init__(self, options):
+        self.options = options
+        self.session = create_http_session(accept='application/json')
+        self.week_cache = {}
+        self.driver = None
+        self.warm = False
+
+    def warm_up(self):
+        """Start the browser and dismiss the 'View Menus' splash once"""
+        self.driver = nutrislice_scraper.setup_driver(self.options.lean)
+        url = nutrislice_scraper.MENU_URL_TEMPLATE.format(
+            district=self.options.district, location=self.options.warm_location,
+            meal='lunch', date=date.today().isoformat()
+        )
+        self.warm = nutrislice_scraper.open_menu_page(self.driver, url)
+
+    @staticmethod
+    def validate(spec):
+        check_spec('nutrislice', spec, ['location', 'meal', 'date', 'district'])
+        missing = [key for key in ('location', 'meal') if key not in spec]
+        if missing:
+            raise ValueError(f"nutrislice jobs need {', '.join(missing)}")
+        try:
+            date.fromisoformat(spec.setdefault('date', date.today().isoformat()))
+        except ValueError:
+            raise ValueError(f"date must be YYYY-MM-DD, not {spec['date']!r}")
+
+    def run(self, spec):
+        url = nutrislice_scraper.MENU_URL_TEMPLATE.format(
+            district=spec.get('district', self.options.district), location=spec['location'],
+            meal=spec['meal'], date=spec['date']
+        )
+        cache, store = self.options.cache, self.options.store
+
+        if self.driver is not None:
+            # Per-job waits; the warm browser carries over
+            waits_for(self.driver).records.clear()
+
+        menu_items = nutrislice_scraper.get_cached_menu(cache, url) if cache else None
+        if menu_items is None and self.options.use_api:
+            if len(self.week_cache) > MAX_CACHED_WEEKS:
+                self.week_cache.clear()
+            menu_items = nutrislice_scraper.fetch_menu_from_api(
+                url, session=self.session, api_base=self.options.api_base, week_cache=self.week_cache,
+                cache=cache, store=store
+            )
+
+        if menu_items is None:
+            if self.driver is None:
+                self.warm_up()
+            menu_items = nutrislice_scraper.scrape_menu_page(self.driver, url, warm=self.warm, store=store)
+            self.warm = self.warm or bool(menu_items)
+            if cache and menu_items:
+                nutrislice_scraper.put_cached_menu(cache, url, menu_items)
+
+        nutrislice_scraper.METRICS.add_items(len(menu_items))
+        return [item.to_dict() for item in menu_items]
+
+    def reset(self):
+        """Drop a browser that may be broken; the next job that needs one starts fresh"""
+        self.quit_driver()
+        self.warm = False
+
+    def quit_driver(self):
+        if self.driver is not None:
+            waits_for(self.driver).records.clear()
+            try:
+                self.driver.quit()
+            except Exception:
+                pass
+            self.driver = None
+
+    def close(self):
+        self.quit_driver()
+        self.session.close()
+
+class StarbucksSession:
+    """A warm Starbucks worker: scraper with its HTTP session, a browser past the cookie banner
+    and the product workers' browsers, all kept between jobs"""
+    source = 'starbucks'
+
+    def __init__(self, options):
+        self.scraper = StarbucksScraper(workers=options.workers, cache=options.cache, store=options.store, lean=options.lean,
+                                        keep_browsers=True)
+        self.driver = None
+
+    def warm_up(self):
+        """Start the browser, open the menu and accept cookies once"""
+        self.driver = self.scraper.setup_driver()
+        load_page(self.driver, self.scraper.menu_url, self.scraper.metrics)
+        self.scraper.accept_cookies(self.driver)
+
+    @staticmethod
+    def validate(spec):
+        # A job always scrapes the whole menu
+        check_spec('starbucks', spec, [])
+
+    def run(self, spec):
+        if self.driver is None:
+            self.warm_up()
+        # Per-job state; the warm browser and HTTP session carry over
+        self.scraper.wait_records = []
+        waits_for(self.driver).records.clear()
+        # Job results are served as JSON, in the menuItems shape
+        return [item.to_dict() for item in self.scraper.scrape_menu(driver=self.driver)]
+
+    def reset(self):
+        self.scraper.close_browsers()
+        if self.driver is not None:
+            try:
+                self.driver.quit()
+            except Exception:
+                pass
+            self.driver = None
+
+    def close(self):
+        self.reset()
+
+SESSION_TYPES = {'nutrislice': NutrisliceSession, 'starbucks': StarbucksSession}
+
+class ScrapeDaemon:
+    """Per-source job queues, each drained by that source's warm sessions"""
+
+    def __init__(self, options):
+        self.options = options
+        self.queues = {source: queue.Queue() for source in SESSION_TYPES}
+        self.jobs = OrderedDict()
+        self.jobs_lock = threading.Lock()
+        self.sessions = []
+        self.threads = []
+
+    def start(self):
+        for source, session_type in SESSION_TYPES.items():
+            for _ in range(self.options.sessions):
+                session = session_type(self.options)
+                self.sessions.append(session)
+                thread = threading.Thread(target=self.session_loop, args=(session, source in self.options.warm), daemon=True)
+                thread.start()
+                self.threads.append(thread)
+
+    def submit(self, spec):
+        """Validate and queue a job spec; raises ValueError for a bad spec"""
+        source = spec.get('source')
+        if not isinstance(source, str) or source not in SESSION_TYPES:
+            raise ValueError(f"source must be one of: {', '.join(sorted(SESSION_TYPES))}")
+        SESSION_TYPES[source].validate(spec)
+
+        job = Job(spec)
+        with self.jobs_lock:
+            self.jobs[job.id] = job
+            self.prune_jobs()
+        self.queues[source].put(job)
+        return job
+
+    def prune_jobs(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.done.is_set()]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[job_id]
+
+    def get(self, job_id):
+        with self.jobs_lock:
+            return self.jobs.get(job_id)
+
+    def session_loop(self, session, warm):
+        if warm:
+            try:
+                session.warm_up()
+                print(f"✓ {session.source} session warm")
+            except Exception as e:
+                print(f"⚠️ {session.source} warm-up failed, will retry on first job: {e}")
+                session.reset()
+
+        jobs = self.queues[session.source]
+        while True:
+            job = jobs.get()
+            if job is None:
+                break
+            job.status = 'running'
+            job.started = time.time()
+            try:
+                job.items = session.run(job.spec)
+                job.status = 'done'
+            except Exception as e:
+                job.status = 'failed'
+                job.error = str(e)
+                print(f"✗ job {job.id} ({session.source}) failed: {e}")
+                session.reset()
+            job.finished = time.time()
+            job.done.set()
+
+    def health(self):
+        with self.jobs_lock:
+            statuses = [job.status for job in self.jobs.values()]
+        return {
+            'queued': {source: q.qsize() for source, q in self.queues.items()},
+            'sessions': [
+                {'source': s.source, 'browser': getattr(s, 'driver', None) is not None} for s in self.sessions
+            ],
+            'jobs': {status: statuses.count(status) for status in sorted(set(statuses))}
+        }
+
+    def stop(self):
+        for source, q in self.queues.items():
+            for _ in range(self.options.sessions):
+                q.put(None)
+        for thread in self.threads:
+            thread.join(timeout=30)
+        for session in self.sessions:
+            session.close()
+
+def parse_wait(values):
+    """?wait= seconds, capped at MAX_WAIT_SECONDS; raises ValueError unless a number >= 0"""
+    if not values:
+        return 0.0
+    try:
+        wait = float(values[0])
+    except ValueError:
+        raise ValueError(f"wait must be a number of seconds, not {values[0]!r}")
+    if not wait >= 0:
+        raise ValueError("wait must be a number of seconds >= 0")
+    return min(wait, MAX_WAIT_SECONDS)
+
+class JobRequestHandler(BaseHTTPRequestHandler):
+    """JSON API: POST /jobs, GET /jobs/<id>, GET /health, GET /metrics"""
+    daemon = None
+
+    def address_string(self):
+        # Unix socket clients have no address
+        return self.client_address[0] if self.client_address else 'local'
+
+    def send_json(self, status, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        path = urlsplit(self.path).path.rstrip('/')
+        if path == '/health':
+            self.send_json(200, self.daemon.health())
+        elif path == '/metrics':
+            data = prometheus_text(all_metrics()).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        elif path.startswith('/jobs/'):
+            job = self.daemon.get(path.split('/')[-1])
+            if job is None:
+                self.send_json(404, {'error': 'no such job'})
+            else:
+                self.send_json(200, job.to_dict())
+        else:
+            self.send_json(404, {'error': 'not found'})
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        if url.path.rstrip('/') != '/jobs':
+            self.send_json(404, {'error': 'not found'})
+            return
+
+        try:
+            wait = parse_wait(parse_qs(url.query).get('wait'))
+            length = int(self.headers.get('Content-Length') or 0)
+            spec = json.loads(self.rfile.read(length) or b'{}')
+            if not isinstance(spec, dict):
+                raise ValueError("job spec must be a JSON object")
+            job = self.daemon.submit(spec)
+        except ValueError as e:
+            self.send_json(400, {'error': str(e)})
+            return
+
+        if wait:
+            job.done.wait(wait)
+        self.send_json(200 if job.done.is_set() else 202, job.to_dict())
+
+    def log_message(self, format, *args):
+        print(f"[api] {self.address_string()} {format % args}")
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+def main():
+    parser = argparse.ArgumentParser(description="Warm scraping daemon with a local job API")
+    parser.add_argument('--host', default='127.0.0.1', help="HTTP bind address (default: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f"HTTP port (default: {DEFAULT_PORT})")
+    parser.add_argument('--socket', help="serve on this Unix socket instead of HTTP")
+    parser.add_argument('--sessions', type=int, default=1, help="warm sessions per source (default: 1)")
+    parser.add_argument('--warm', nargs='*', default=sorted(SESSION_TYPES), choices=sorted(SESSION_TYPES),
+                        help="sources whose browsers start at launch (default: all)")
+    parser.add_argument('--district', default='cpp', help="Nutrislice subdomain (default: cpp)")
+    parser.add_argument('--warm-location', default='centerpointe-dining-commons', help="Nutrislice page used to get past the splash")
+    parser.add_argument('--workers', type=int, default=2, help="Starbucks product workers per job (default: 2)")
+    parser.add_argument('--no-api', action='store_true', help="skip the Nutrislice JSON API")
+    parser.add_argument('--api-base', help="override the Nutrislice API host")
+    parser.add_argument('--lean', action='store_true', help="run browsers in lean mode")
+    parser.add_argument('--cache', default=DEFAULT_CACHE_PATH, help=f"page cache file (default: {DEFAULT_CACHE_PATH})")
+    parser.add_argument('--no-cache', action='store_true', help="fetch every page")
+    args = parser.parse_args()
+
+    args.use_api = not args.no_api
+    cache_path = args.cache
+    args.cache = None if args.no_cache else PageCache(cache_path)
+    args.store = None if args.no_cache else ItemStore(cache_path)
+
+    daemon = ScrapeDaemon(args)
+    JobRequestHandler.daemon = daemon
+    if args.socket:
+        if os.path.exists(args.socket):
+            os.remove(args.socket)
+        server = UnixHTTPServer(args.socket, JobRequestHandler)
+        print(f"Listening on {args.socket}")
+    else:
+        server = ThreadingHTTPServer((args.host, args.port), JobRequestHandler)
+        print(f"Listening on http://{args.host}:{args.port}")
+
+    def stop_on_term(signum, frame):
+        raise KeyboardInterrupt
+    signal.signal(signal.SIGTERM, stop_on_term)
+
+    daemon.start()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down")
+    finally:
+        server.server_close()
+        daemon.stop()
+        if args.cache:
+            args.cache.close()
+        if args.store:
+            args.store.close()
+        if args.socket and os.path.exists(args.socket):
+            os.remove(args.socket)
+
+if __name__ == "__main__":
+    main()
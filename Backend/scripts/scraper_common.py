@@ -0,0 +1,110 @@
+# Selenium and requests are imported inside the functions that need them,
+# so importing the scrapers (and --help) stays fast
+from fetch_control import CONTROLLER
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+
+# Allergen names as they appear on menu sites -> codes used in Menus/*.csv
+ALLERGEN_MAP = {
+    'egg': 'E',
+    'fish': 'F',
+    'milk': 'M',
+    'peanut': 'P',
+    'shellfish': 'SF',
+    'soy': 'S',
+    'tree nut': 'T',
+    'treenut': 'T',
+    'wheat': 'W',
+    'sesame': 'SS'
+}
+
+# Lean mode: resources a menu never needs to render. This includes the
+# sites' own fonts and icons; the scrapers read text and attributes only,
+# and bench_browser.py checks lean pages still show every menu item.
+HEAVY_RESOURCE_PATTERNS = [
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.avif', '*.svg', '*.ico',
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+    '*.mp4', '*.webm', '*.mp3', '*.m3u8'
+]
+
+# Lean mode: third-party analytics, ads and session-replay scripts
+TRACKER_PATTERNS = [
+    '*googletagmanager.com*', '*google-analytics.com*', '*doubleclick.net*', '*googlesyndication.com*',
+    '*facebook.net*', '*hotjar.com*', '*segment.io*', '*segment.com*', '*newrelic.com*', '*nr-data.net*',
+    '*optimizely.com*', '*fullstory.com*', '*quantummetric.com*', '*branch.io*', '*bat.bing.com*',
+    '*analytics.tiktok.com*', '*demdex.net*', '*omtrdc.net*', '*adobedtm.com*', '*sentry.io*'
+]
+
+LEAN_BLOCKED_PATTERNS = HEAVY_RESOURCE_PATTERNS + TRACKER_PATTERNS
+
+# Total bytes the page and its resources have transferred so far
+PAGE_BYTES_SCRIPT = """
+var entries = performance.getEntriesByType('navigation').concat(performance.getEntriesByType('resource'));
+return entries.reduce(function (total, entry) { return total + (entry.transferSize || 0); }, 0);
+"""
+
+def create_http_session(pool_size=10, accept='text/html,application/xhtml+xml'):
+    """Create a requests session with a pooled, keep-alive connection adapter"""
+    import requests
+    from requests.adapters import HTTPAdapter
+    
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update({
+        'User-Agent': USER_AGENT,
+        'Accept': accept
+    })
+    return session
+
+def create_chrome_driver(metrics=None, lean=False):
+    """Start headless Chrome, timing startup and wiring its waits into metrics
+    
+    With lean, images are disabled, heavy resources and trackers are
+    blocked over CDP (the same patterns for every site), and driver.get()
+    returns at DOMContentLoaded instead of waiting for the full load event.
+    """
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    from wait_engine import waits_for
+    
+    chrome_options = Options()
+    chrome_options.add_argument('--headless')
+    chrome_options.add_argument('--disable-gpu')
+    chrome_options.add_argument('--no-sandbox')
+    chrome_options.add_argument('--disable-dev-shm-usage')
+    chrome_options.add_argument(f'--user-agent={USER_AGENT}')
+    if lean:
+        chrome_options.page_load_strategy = 'eager'
+        chrome_options.add_argument('--blink-settings=imagesEnabled=false')
+        chrome_options.add_experimental_option('prefs', {'profile.managed_default_content_settings.images': 2})
+
+    if metrics is None:
+        driver = webdriver.Chrome(options=chrome_options)
+    else:
+        with metrics.phase('driver_startup'):
+            driver = webdriver.Chrome(options=chrome_options)
+    
+    driver.scraper_profile = 'lean' if lean else 'default'
+    if lean:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': LEAN_BLOCKED_PATTERNS})
+    waits_for(driver, metrics=metrics)
+    return driver
+
+def load_page(driver, url, metrics):
+    """driver.get(url), recording load time and bytes transferred per browser profile
+    
+    Lean drivers record 'page_load_lean' / 'page_bytes_lean' so a report
+    can set them against the default profile's 'page_load' / 'page_bytes'.
+    The load goes through the shared fetch controller under the metrics'
+    source, so browser loads count toward the host's rate limit too.
+    """
+    suffix = '_lean' if getattr(driver, 'scraper_profile', 'default') == 'lean' else ''
+    with metrics.phase(f'page_load{suffix}'):
+        CONTROLLER.call(metrics.source, url, lambda: driver.get(url))
+    try:
+        metrics.add(f'page_bytes{suffix}', int(driver.execute_script(PAGE_BYTES_SCRIPT) or 0))
+    except Exception:
+        pass
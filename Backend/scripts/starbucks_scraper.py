@@ -1,283 +1,737 @@
-import requests
-from bs4 import BeautifulSoup
+# Selenium, BeautifulSoup and requests are imported where they are used, so
+# importing this module (and --help) never loads them
 import json
 import re
-import csv
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
-import time
+from scraper_common import ALLERGEN_MAP, create_chrome_driver, create_http_session, load_page
+from run_metrics import metrics_for, report_path, write_json_report, write_prometheus_textfile
+from page_cache import PageCache, content_hash, DEFAULT_CACHE_PATH
+from crawl_checkpoint import StreamingCSVWriter
+from fetch_control import CONTROLLER, CircuitOpenError
+from tiered_fetch import TieredFetcher, selectors_present, url_pattern
+from parse_pipeline import DEFAULT_PARSE_WORKERS, parse_pool, run_parse
+from driver_recycler import DEFAULT_MAX_PAGES, DEFAULT_MAX_RSS_MB, DriverRecycler
+from item_store import ItemStore
+from menu_csv import MENU_FIELDS
+from menu_item import MenuItem, write_menu_csv
+from urllib.parse import urljoin, urlsplit, urlunsplit
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import threading
+import queue
+
+DEFAULT_BASE_URL = "https://www.starbucks.com"
+
+# Category pages are /menu/drinks/<name> or /menu/food/<name>; products /menu/product/<id>/<form>
+CATEGORY_PATH = re.compile(r'/menu/(?:drinks|food)/[A-Za-z0-9-]+(?![A-Za-z0-9-]|/[A-Za-z0-9])')
+PRODUCT_PATH = re.compile(r'/menu/product/\d+/[a-z0-9-]+')
+
+# Nutrition page markup the CSS fallback needs; without it the page is client-rendered
+NUTRITION_SELECTORS = ['[data-e2e="nutritionSection"]', '[data-e2e="calories"]']
+
+# Category pages fetched at once during discovery
+DISCOVERY_WORKERS = 8
 
 class StarbucksScraper:
-    def __init__(self):
-        self.base_url = "https://www.starbucks.com"
+    def __init__(self, workers=1, cache=None, store=None, lean=False, base_url=DEFAULT_BASE_URL, parse_workers=0,
+                 recycle_pages=DEFAULT_MAX_PAGES, max_browser_mb=DEFAULT_MAX_RSS_MB, keep_browsers=False):
+        self.base_url = base_url.rstrip('/')
         self.menu_url = f"{self.base_url}/menu"
         self.items = []
+        self.item_count = 0
+        self.sample_items = []
+        self.session = None
+        self.workers = max(1, workers)
+        self.wait_records = []
+        self.cache = cache
+        self.store = store
+        self.lean = lean
+        self.parse_workers = parse_workers
+        self.recycle_pages = recycle_pages
+        self.max_browser_mb = max_browser_mb
+        # With keep_browsers, product workers' browsers outlive scrape_menu (see close_browsers)
+        self.keep_browsers = keep_browsers
+        self.idle_recyclers = []
+        self.recyclers_lock = threading.Lock()
+        self.metrics = metrics_for('starbucks')
+        self.fetcher = TieredFetcher(self.metrics.source)
         
-    def setup_driver(self):
-        """Set up Selenium WebDriver with Chrome"""
-        chrome_options = Options()
-        chrome_options.add_argument('--headless')  # Run in background
-        chrome_options.add_argument('--no-sandbox')
-        chrome_options.add_argument('--disable-dev-shm-usage')
-        chrome_options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36')
+    def setup_session(self):
+        """Set up a pooled requests session for plain HTTP page fetches"""
+        return create_http_session()
         
-        driver = webdriver.Chrome(options=chrome_options)
-        return driver
+    def setup_driver(self):
+        """Set up Selenium WebDriver with Chrome (see create_chrome_driver for lean)"""
+        return create_chrome_driver(self.metrics, lean=self.lean)
     
     def parse_allergens(self, allergen_text):
         """Extract allergen codes from allergen text"""
-        allergen_map = {
-            'egg': 'E',
-            'fish': 'F',
-            'milk': 'M',
-            'peanut': 'P',
-            'shellfish': 'SF',
-            'soy': 'S',
-            'tree nut': 'T',
-            'treenut': 'T',
-            'wheat': 'W',
-            'sesame': 'SS'
-        }
-        
         allergens = []
         if not allergen_text:
             return allergens
         
         allergen_text_lower = allergen_text.lower()
-        for allergen, code in allergen_map.items():
+        for allergen, code in ALLERGEN_MAP.items():
             if allergen in allergen_text_lower:
                 if code not in allergens:
                     allergens.append(code)
         
         return allergens
     
-    def extract_nutrition_from_item(self, driver, item_url):
-        """Navigate to item nutrition page and extract nutrition information"""
+    def to_int(self, value):
+        """Read an int out of a state value like 190, "190", "7 g" or {"displayValue": "190"}"""
+        if isinstance(value, dict):
+            value = value.get('value', value.get('displayValue'))
+        if isinstance(value, bool) or value is None:
+            return 0
+        if isinstance(value, (int, float)):
+            return int(value)
+        match = re.findall(r'\d+', str(value))
+        return int(match[0]) if match else 0
+    
+    def extract_embedded_state(self, html):
+        """Return the JSON state objects the page embeds for client-side rendering"""
+        from bs4 import BeautifulSoup
+        
+        states = []
+        soup = BeautifulSoup(html, 'html.parser')
+        
+        for script in soup.find_all('script'):
+            text = script.string or ''
+            if not text:
+                continue
+            if script.get('type') == 'application/json' or script.get('id') == '__NEXT_DATA__':
+                try:
+                    states.append(json.loads(text))
+                except ValueError:
+                    pass
+                continue
+            # e.g. window.__BOOTSTRAP = {...}; or window.__INITIAL_STATE__ = {...};
+            match = re.search(r'window\.__[A-Za-z_]+\s*=\s*', text)
+            if match:
+                try:
+                    state, _ = json.JSONDecoder().raw_decode(text, match.end())
+                    states.append(state)
+                except ValueError:
+                    pass
+        
+        return states, soup
+    
+    def find_product_in_state(self, state):
+        """Walk a state object and return the first product dict carrying nutrition"""
+        stack = [state]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, dict):
+                if node.get('name') and ('nutrition' in node or 'sizes' in node):
+                    return node
+                stack.extend(reversed(list(node.values())))
+            elif isinstance(node, list):
+                stack.extend(reversed(node))
+        return None
+    
+    def nutrition_from_state(self, product):
+        """Build a nutrition dict from an embedded product record"""
+        nutrition = product.get('nutrition')
+        if not nutrition:
+            # Product-level records keep nutrition per size; use the default size
+            sizes = product.get('sizes') or []
+            default = next((size for size in sizes if size.get('default') or size.get('isDefault')), None)
+            size = default or (sizes[0] if sizes else {})
+            nutrition = size.get('nutrition')
+        if not isinstance(nutrition, dict):
+            return None
+        
+        nutrition_data = {
+            'calories': self.to_int(nutrition.get('calories')),
+            'protein': 0,
+            'carbs': 0,
+            'fats': 0,
+            'allergens': []
+        }
+        
+        # Macros are listed as facts such as {"displayName": "Total Fat", "value": 7}
+        facts = nutrition.get('additionalFacts') or nutrition.get('facts') or []
+        for fact in facts:
+            if not isinstance(fact, dict):
+                continue
+            label = str(fact.get('displayName') or fact.get('name') or '').lower()
+            if label == 'protein':
+                nutrition_data['protein'] = self.to_int(fact)
+            elif 'total carbohydrate' in label:
+                nutrition_data['carbs'] = self.to_int(fact)
+            elif label == 'total fat':
+                nutrition_data['fats'] = self.to_int(fact)
+        
+        allergen_text = nutrition.get('allergens') or product.get('allergens') or ''
+        if isinstance(allergen_text, list):
+            allergen_text = ' '.join(str(a.get('displayName', a) if isinstance(a, dict) else a) for a in allergen_text)
+        with self.metrics.phase('allergen_parse'):
+            nutrition_data['allergens'] = self.parse_allergens(str(allergen_text))
+        
+        return nutrition_data
+    
+    def extract_name_from_soup(self, soup):
+        """Read the product name from the page heading or title"""
+        name_elem = soup.find('h1')
+        if name_elem and name_elem.get_text(strip=True):
+            return name_elem.get_text(strip=True)
+        if soup.title and soup.title.string:
+            return soup.title.string.split('|')[0].strip()
+        return "Unknown Item"
+    
+    def parse_product_html(self, html):
+        """Return the MenuItem on a nutrition page's HTML, or None
+        
+        None means the HTML has neither usable embedded state nor the
+        nutrition panel, i.e. the page still needs rendering.
+        """
+        states, soup = self.extract_embedded_state(html)
+        
+        for state in states:
+            product = self.find_product_in_state(state)
+            if product:
+                nutrition = self.nutrition_from_state(product)
+                if nutrition:
+                    return MenuItem.from_starbucks(product['name'].strip(), nutrition)
+        
+        # No usable state; the markup only counts if the nutrition panel is in it.
+        # Once it is, all zeros are real values (brewed and iced teas, water)
+        if not selectors_present(soup, NUTRITION_SELECTORS):
+            return None
+        return MenuItem.from_starbucks(self.extract_name_from_soup(soup), self.parse_nutrition_soup(soup))
+    
+    def canonical_product_url(self, href):
+        """One URL per product and form: /menu/product/<id>/<hot|iced>
+        
+        Drops the query string, fragment and trailing slash, and any size or
+        /nutrition segment after the form, so size variants of a drink
+        collapse onto the same product.
+        """
+        parts = urlsplit(urljoin(self.base_url, href))
+        path = parts.path.rstrip('/').lower()
+        match = PRODUCT_PATH.search(path)
+        if match:
+            path = match.group(0)
+        return urlunsplit((parts.scheme, parts.netloc.lower(), path, '', ''))
+    
+    def product_alias(self, item_url):
+        return f"starbucks:{self.canonical_product_url(item_url)}"
+    
+    def remember_product(self, item_url, item):
+        """Record a fetched product in the item store; its form (hot/iced) is the serving"""
+        if self.store:
+            serving = self.canonical_product_url(item_url).rsplit('/', 1)[-1]
+            self.store.put(item.name, serving, item.to_record(), 'starbucks', aliases=[self.product_alias(item_url)])
+    
+    def fetch_product(self, item_url, get_driver=None, session=None):
+        """Fetch a product's nutrition page once and return its MenuItem, or None
+        
+        Goes through the tiered fetcher: the page is fetched over plain HTTP
+        and only loaded in the browser when neither its embedded JSON state
+        nor the nutrition panel selectors are in the HTML (or the pattern
+        has been needing the browser). get_driver is called only in that
+        case, so callers can start their browser lazily.
+        
+        With parse_workers, the HTML is parsed in the shared process pool
+        so the other product workers keep fetching meanwhile; this worker
+        waits for the result since it decides whether to escalate.
+        
+        With a cache, fresh entries skip the fetch entirely and stale ones
+        skip parsing when the page content hash hasn't changed. A product
+        the item store already knows is never fetched.
+        """
+        if self.store:
+            known = self.store.get_by_alias(self.product_alias(item_url))
+            if known:
+                self.fetcher.record('cache')
+                return MenuItem.from_record(known)
+        
+        nutrition_url = f"{item_url}/nutrition"
+        if self.cache:
+            cached = self.cache.get_fresh(nutrition_url)
+            if cached:
+                self.fetcher.record('cache')
+                return MenuItem.from_record(cached)
+        
+        if session is None:
+            if self.session is None:
+                self.session = self.setup_session()
+            session = self.session
+        
+        def parse(html):
+            page_hash = content_hash(html)
+            if self.cache:
+                cached = self.cache.get_unchanged(nutrition_url, page_hash)
+                if cached:
+                    return MenuItem.from_record(cached)
+            with self.metrics.phase('html_parse'):
+                if self.parse_workers:
+                    result = run_parse(parse_pool(self.parse_workers), parse_product_page, html)
+                else:
+                    result = self.parse_product_html(html)
+            if result is not None and self.cache:
+                self.cache.put(nutrition_url, result.to_record(), page_hash)
+            return result
+        
+        _, result = self.fetcher.fetch(nutrition_url, session, parse, get_driver, wait=self.wait_for_nutrition)
+        if result is not None:
+            self.remember_product(item_url, result)
+        return result
+    
+    def wait_for_nutrition(self, driver):
+        """Browser tier: wait for the client-rendered nutrition panel"""
+        from selenium.webdriver.common.by import By
+        from wait_engine import waits_for, element_present
+        
+        waits_for(driver).maybe('nutrition_section', element_present((By.CSS_SELECTOR, NUTRITION_SELECTORS[0])))
+    
+    def parse_nutrition_soup(self, soup):
+        """Extract nutrition information from a rendered nutrition page (CSS-class fallback)"""
+        nutrition_data = {
+            'calories': 0,
+            'protein': 0,
+            'carbs': 0,
+            'fats': 0,
+            'allergens': []
+        }
+        
+        # Extract calories from the data-e2e attribute
         try:
-            # Navigate to the nutrition page
-            nutrition_url = f"{item_url}/nutrition"
-            driver.get(nutrition_url)
-            time.sleep(2)  # Wait for page to load
-            
-            nutrition_data = {
-                'calories': 0,
-                'protein': 0,
-                'carbs': 0,
-                'fats': 0,
-                'allergens': []
-            }
-            
-            # Get page source and parse with BeautifulSoup for more reliable extraction
-            soup = BeautifulSoup(driver.page_source, 'html.parser')
-            
-            # Extract calories from the data-e2e attribute
+            calories_elem = soup.find('span', {'data-e2e': 'calories'})
+            if calories_elem:
+                calories_text = calories_elem.text.strip()
+                nutrition_data['calories'] = int(re.findall(r'\d+', calories_text)[0]) if re.findall(r'\d+', calories_text) else 0
+        except Exception as e:
+            print(f"    Could not extract calories: {e}")
+        
+        # Find the nutrition section
+        nutrition_section = soup.find('div', {'data-e2e': 'nutritionSection'})
+        
+        if nutrition_section:
+            # Extract Total Carbohydrates
             try:
-                calories_elem = soup.find('span', {'data-e2e': 'calories'})
-                if calories_elem:
-                    calories_text = calories_elem.text.strip()
-                    nutrition_data['calories'] = int(re.findall(r'\d+', calories_text)[0]) if re.findall(r'\d+', calories_text) else 0
+                for container in nutrition_section.find_all('li'):
+                    text_content = container.get_text()
+                    if 'Total Carbohydrates' in text_content:
+                        carbs_spans = container.find_all('span', class_='text-semibold')
+                        for span in carbs_spans:
+                            text = span.get_text().strip()
+                            if 'g' in text and text != 'Total Carbohydrates':
+                                carbs_match = re.findall(r'\d+', text)
+                                if carbs_match:
+                                    nutrition_data['carbs'] = int(carbs_match[0])
+                                break
+                        break
             except Exception as e:
-                print(f"    Could not extract calories: {e}")
-            
-            # Find the nutrition section
-            nutrition_section = soup.find('div', {'data-e2e': 'nutritionSection'})
-            
-            if nutrition_section:
-                # Extract Total Carbohydrates
-                try:
-                    for container in nutrition_section.find_all('li'):
-                        text_content = container.get_text()
-                        if 'Total Carbohydrates' in text_content:
-                            carbs_spans = container.find_all('span', class_='text-semibold')
-                            for span in carbs_spans:
-                                text = span.get_text().strip()
-                                if 'g' in text and text != 'Total Carbohydrates':
-                                    carbs_match = re.findall(r'\d+', text)
-                                    if carbs_match:
-                                        nutrition_data['carbs'] = int(carbs_match[0])
-                                    break
-                            break
-                except Exception as e:
-                    print(f"    Could not extract carbs: {e}")
-                
-                # Extract Protein
-                try:
-                    for container in nutrition_section.find_all('div', class_='container___Ds7kK'):
-                        text_content = container.get_text()
-                        if 'Protein' in text_content and 'Total' not in text_content:
-                            protein_spans = container.find_all('span', class_='text-semibold')
-                            for span in protein_spans:
-                                text = span.get_text().strip()
-                                if 'g' in text and text != 'Protein':
-                                    protein_match = re.findall(r'\d+', text)
-                                    if protein_match:
-                                        nutrition_data['protein'] = int(protein_match[0])
-                                    break
-                            break
-                except Exception as e:
-                    print(f"    Could not extract protein: {e}")
-                
-                # Extract Total Fat
-                try:
-                    for container in nutrition_section.find_all('li', class_='container___Ds7kK'):
-                        text_content = container.get_text()
-                        if 'Total Fat' in text_content:
-                            fat_spans = container.find_all('span', class_='text-semibold')
-                            for span in fat_spans:
-                                text = span.get_text().strip()
-                                if 'g' in text and text != 'Total Fat':
-                                    fat_match = re.findall(r'\d+', text)
-                                    if fat_match:
-                                        nutrition_data['fats'] = int(fat_match[0])
-                                    break
-                            break
-                except Exception as e:
-                    print(f"    Could not extract fats: {e}")
+                print(f"    Could not extract carbs: {e}")
             
-            # Extract allergens
+            # Extract Protein
             try:
-                allergens_section = soup.find('div', {'data-e2e': 'allergensSection'})
-                if allergens_section:
-                    allergen_p = allergens_section.find('p', class_='my1')
-                    if allergen_p:
-                        allergen_text = allergen_p.text.strip()
-                        nutrition_data['allergens'] = self.parse_allergens(allergen_text)
+                for container in nutrition_section.find_all('div', class_='container___Ds7kK'):
+                    text_content = container.get_text()
+                    if 'Protein' in text_content and 'Total' not in text_content:
+                        protein_spans = container.find_all('span', class_='text-semibold')
+                        for span in protein_spans:
+                            text = span.get_text().strip()
+                            if 'g' in text and text != 'Protein':
+                                protein_match = re.findall(r'\d+', text)
+                                if protein_match:
+                                    nutrition_data['protein'] = int(protein_match[0])
+                                break
+                        break
             except Exception as e:
-                print(f"    Could not extract allergens: {e}")
-            
-            return nutrition_data
+                print(f"    Could not extract protein: {e}")
             
+            # Extract Total Fat
+            try:
+                for container in nutrition_section.find_all('li', class_='container___Ds7kK'):
+                    text_content = container.get_text()
+                    if 'Total Fat' in text_content:
+                        fat_spans = container.find_all('span', class_='text-semibold')
+                        for span in fat_spans:
+                            text = span.get_text().strip()
+                            if 'g' in text and text != 'Total Fat':
+                                fat_match = re.findall(r'\d+', text)
+                                if fat_match:
+                                    nutrition_data['fats'] = int(fat_match[0])
+                                break
+                        break
+            except Exception as e:
+                print(f"    Could not extract fats: {e}")
+        
+        # Extract allergens
+        try:
+            allergens_section = soup.find('div', {'data-e2e': 'allergensSection'})
+            if allergens_section:
+                allergen_p = allergens_section.find('p', class_='my1')
+                if allergen_p:
+                    allergen_text = allergen_p.text.strip()
+                    with self.metrics.phase('allergen_parse'):
+                        nutrition_data['allergens'] = self.parse_allergens(allergen_text)
         except Exception as e:
-            print(f"    Error extracting nutrition from {nutrition_url}: {e}")
-            return None
+            print(f"    Could not extract allergens: {e}")
+        
+        return nutrition_data
     
-    def scrape_menu(self):
-        """Scrape all menu items from Starbucks menu page"""
-        driver = self.setup_driver()
+    def scrape_menu(self, writer=None, driver=None):
+        """Scrape all menu items from Starbucks menu page
+        
+        With a StreamingCSVWriter, each item is written out as soon as it is
+        scraped instead of being kept in self.items, and products the
+        writer's checkpoint already has are skipped. An already running
+        driver (e.g. a warm daemon session) is used for discovery and left
+        running.
+        """
+        discovery_key = f"discovery:{self.menu_url}"
+        item_links = self.cache.get_fresh(discovery_key) if self.cache else None
+        
+        if item_links:
+            print(f"Using {len(item_links)} cached product links")
+        else:
+            item_links = self.discover_products(driver)
+            if self.cache and item_links:
+                self.cache.put(discovery_key, item_links)
+        
+        if writer is None:
+            self.items = self.scrape_products(item_links)
+            self.item_count = len(self.items)
+            self.sample_items = self.items[:3]
+        else:
+            remaining = [item_url for item_url in item_links if not writer.is_done(item_url)]
+            if len(remaining) < len(item_links):
+                print(f"Skipping {len(item_links) - len(remaining)} products finished in an earlier run")
+            self.scrape_products(remaining, emit=lambda item_url, item: self.write_item(writer, item_url, item))
+        if self.wait_records:
+            from wait_engine import print_wait_summary
+            print_wait_summary(self.wait_records)
+        if self.cache:
+            self.cache.print_summary()
+        return self.items
+    
+    def accept_cookies(self, driver):
+        """Dismiss the cookie banner once per browser session"""
+        if getattr(driver, 'cookies_accepted', False):
+            return
+        from selenium.webdriver.common.by import By
+        from wait_engine import waits_for, element_clickable, element_gone
         
+        waits = waits_for(driver)
+        cookie_locator = (By.XPATH, "//*[contains(text(), 'Accept') or contains(text(), 'accept')]")
         try:
-            print(f"Loading menu page: {self.menu_url}")
-            driver.get(self.menu_url)
-            time.sleep(3)  # Wait for page to load
-            
-            # Accept cookies if popup appears
-            try:
-                accept_button = WebDriverWait(driver, 3).until(
-                    EC.element_to_be_clickable((By.XPATH, "//*[contains(text(), 'Accept') or contains(text(), 'accept')]"))
-                )
-                accept_button.click()
-                time.sleep(1)
-            except:
-                pass
-            
-            # Find all category links directly from main menu page
-            # Looking for links like /menu/drinks/cold-coffee, /menu/food/bakery, etc.
-            all_category_urls = []
-            
-            try:
-                # Find links that match the pattern /menu/drinks/* or /menu/food/*
-                links = driver.find_elements(By.CSS_SELECTOR, "a[href*='/menu/']")
-                
-                for link in links:
-                    href = link.get_attribute('href')
-                    if href:
-                        # Check if it's a category link (3 parts: menu/drinks/category or menu/food/category)
-                        path = href.replace(self.base_url, '')
-                        parts = [p for p in path.split('/') if p]
-                        
-                        # Should be exactly 3 parts: ['menu', 'drinks'/'food', 'category-name']
-                        if len(parts) == 3 and parts[0] == 'menu' and parts[1] in ['drinks', 'food']:
-                            if href not in all_category_urls:
-                                all_category_urls.append(href)
-                                print(f"  Found category: {parts[1]}/{parts[2]}")
-                
-                print(f"\nTotal categories found: {len(all_category_urls)}")
+            accept_button = waits.until('cookie_banner', element_clickable(cookie_locator))
+            accept_button.click()
+            waits.maybe('cookie_banner', element_gone(cookie_locator))
+        except:
+            pass
+        # Accepted or never shown, either way there's nothing to wait for next time
+        driver.cookies_accepted = True
+    
+    def discover_products(self, driver=None):
+        """Find every product URL by walking the menu's category pages
+        
+        The menu and category pages are fetched over pooled HTTP, the
+        categories concurrently, and links are read straight out of the
+        HTML and embedded state. Only categories whose HTML carries no
+        product links (rendered client-side) are loaded in the browser,
+        where all links on the page are read with one script call. An
+        already running driver is used for that fallback and left running.
+        """
+        session = create_http_session(pool_size=max(self.workers, DISCOVERY_WORKERS))
+        try:
+            with self.metrics.phase('discovery'):
+                category_urls = self.http_category_urls(session)
+                if category_urls:
+                    category_links = self.http_category_products(session, category_urls)
+                else:
+                    category_links = {}
                 
-            except Exception as e:
-                print(f"Error finding categories: {e}")
+                # The menu itself or some categories need JS; read those in the browser
+                pending = [url for url in category_urls if not category_links.get(url)]
+                if not category_urls or pending:
+                    try:
+                        browser_urls, browser_links = self.browser_discovery(driver, pending if category_urls else None)
+                    except Exception as e:
+                        # Keep whatever HTTP found rather than losing the whole run
+                        print(f"Browser discovery failed: {e}")
+                        browser_urls, browser_links = [], {}
+                    if not category_urls:
+                        category_urls = browser_urls
+                    category_links.update(browser_links)
+        finally:
+            session.close()
+        
+        # Products are linked from several categories; dedupe on the canonical URL
+        item_links = []
+        seen_links = set()
+        for category_url in category_urls:
+            for item_url in category_links.get(category_url, []):
+                if item_url not in seen_links:
+                    seen_links.add(item_url)
+                    item_links.append(item_url)
+        
+        print(f"\n{'='*50}")
+        print(f"Total unique products found: {len(item_links)}")
+        print(f"{'='*50}\n")
+        return item_links
+    
+    def links_in_html(self, html, pattern, canonical):
+        """Canonical URLs of every path matching pattern in html, in page order
+        
+        Reads anchors and embedded JSON state alike, so it also catches
+        links the page only renders client-side.
+        """
+        # JSON state escapes slashes as \/
+        html = html.replace('\\/', '/')
+        urls = []
+        seen = set()
+        for match in pattern.finditer(html):
+            url = canonical(urljoin(self.base_url, match.group(0)))
+            if url not in seen:
+                seen.add(url)
+                urls.append(url)
+        return urls
+    
+    def canonical_category_url(self, href):
+        parts = urlsplit(href)
+        return urlunsplit((parts.scheme, parts.netloc.lower(), parts.path.rstrip('/').lower(), '', ''))
+    
+    def category_pattern(self):
+        """Tier-report pattern shared by every category page"""
+        return f"{urlsplit(self.base_url).netloc}/menu/{{category}}"
+    
+    def http_category_urls(self, session):
+        """Category URLs linked from the menu page, or [] if it can't be read over HTTP"""
+        import requests
+        
+        print(f"Loading menu page: {self.menu_url}")
+        try:
+            with self.metrics.phase('http_fetch'):
+                response = CONTROLLER.get(session, self.menu_url, self.metrics.source, timeout=15)
+            response.raise_for_status()
+        except (requests.RequestException, CircuitOpenError) as e:
+            print(f"  HTTP fetch of the menu failed, using browser: {e}")
+            return []
+        category_urls = self.links_in_html(response.text, CATEGORY_PATH, self.canonical_category_url)
+        if category_urls:
+            self.fetcher.record('http', url_pattern(self.menu_url))
+        for category_url in category_urls:
+            print(f"  Found category: {'/'.join(category_url.split('/')[-2:])}")
+        print(f"\nTotal categories found: {len(category_urls)}")
+        return category_urls
+    
+    def http_category_products(self, session, category_urls):
+        """Fetch category pages concurrently; return {category_url: [product urls]}"""
+        import requests
+        
+        def fetch(category_url):
+            try:
+                with self.metrics.phase('http_fetch'):
+                    response = CONTROLLER.get(session, category_url, self.metrics.source, timeout=15)
+                response.raise_for_status()
+            except (requests.RequestException, CircuitOpenError) as e:
+                print(f"  HTTP fetch failed ({category_url}): {e}")
+                return []
+            return self.links_in_html(response.text, PRODUCT_PATH, self.canonical_product_url)
+        
+        with ThreadPoolExecutor(max_workers=min(DISCOVERY_WORKERS, len(category_urls))) as pool:
+            results = dict(zip(category_urls, pool.map(fetch, category_urls)))
+        for category_url, links in results.items():
+            print(f"  {category_url.split('/')[-1]}: {len(links)} products")
+            if links:
+                self.fetcher.record('http', self.category_pattern())
+        return results
+    
+    def browser_links(self, driver, selector):
+        """Every matching link's resolved href, read with one script call"""
+        hrefs = driver.execute_script(
+            "return Array.from(document.querySelectorAll(arguments[0]), a => a.href);", selector
+        )
+        return [href for href in hrefs or [] if href]
+    
+    def browser_discovery(self, driver=None, category_urls=None):
+        """Read category and product links in the browser
+        
+        With category_urls=None the categories are read off the menu page
+        first. Returns (category_urls, {category_url: [product urls]}).
+        """
+        from selenium.webdriver.common.by import By
+        from wait_engine import waits_for, element_present
+        
+        own_driver = driver is None
+        if own_driver:
+            driver = self.setup_driver()
+        waits = waits_for(driver)
+        records_before = len(waits.records)
+        category_links = {}
+        
+        try:
+            if category_urls is None:
+                print(f"Loading menu page in browser: {self.menu_url}")
+                load_page(driver, self.menu_url, self.metrics)
+                waits.maybe('category_links', element_present((By.CSS_SELECTOR, "a[href*='/menu/']")))
+                self.accept_cookies(driver)
+                hrefs = '\n'.join(self.browser_links(driver, "a[href*='/menu/']"))
+                category_urls = self.links_in_html(hrefs, CATEGORY_PATH, self.canonical_category_url)
+                self.fetcher.record('browser', url_pattern(self.menu_url))
+                print(f"Total categories found: {len(category_urls)}")
             
-            # Now scrape products from each category
-            item_links = []
-            for category_url in all_category_urls:
-                category_name = category_url.split('/')[-1]
-                print(f"\nLoading category: {category_name}")
-                driver.get(category_url)
-                time.sleep(2)
-                
+            for category_url in category_urls:
+                print(f"Loading category in browser: {category_url.split('/')[-1]}")
                 try:
-                    # Find all product links in this category
-                    links = driver.find_elements(By.CSS_SELECTOR, "a[href*='/menu/product/']")
-                    
-                    category_items = 0
-                    for link in links:
-                        href = link.get_attribute('href')
-                        if href and href not in item_links:
-                            item_links.append(href)
-                            category_items += 1
-                    
-                    print(f"  Found {category_items} products")
-                    
+                    load_page(driver, category_url, self.metrics)
+                    self.accept_cookies(driver)
+                    waits.maybe('category_links', element_present((By.CSS_SELECTOR, "a[href*='/menu/product/']")))
+                    hrefs = '\n'.join(self.browser_links(driver, "a[href*='/menu/product/']"))
+                    category_links[category_url] = self.links_in_html(hrefs, PRODUCT_PATH, self.canonical_product_url)
+                    self.fetcher.record('browser', self.category_pattern())
+                    print(f"  Found {len(category_links[category_url])} products")
                 except Exception as e:
                     print(f"  Error finding products: {e}")
-            
-            print(f"\n{'='*50}")
-            print(f"Total unique products found: {len(item_links)}")
-            print(f"{'='*50}\n")
-            
-            # Scrape each item
-            for idx, item_url in enumerate(item_links, 1):
-                product_name = item_url.split('/')[-1]
-                print(f"[{idx}/{len(item_links)}] {product_name}")
+        finally:
+            self.wait_records.extend(waits.records[records_before:])
+            if own_driver:
+                driver.quit()
+        
+        return category_urls, category_links
+    
+    def scrape_product(self, idx, total, item_url, get_driver, session):
+        """Scrape one product and return its MenuItem, or None on failure"""
+        product_name = item_url.split('/')[-1]
+        print(f"[{idx}/{total}] {product_name}")
+        
+        # One fetch per product: name and nutrition come from the same page
+        item = self.fetch_product(item_url, get_driver, session)
+        
+        if item is None:
+            print(f"  ✗ Could not extract nutrition data ({product_name})")
+            self.metrics.fail('product')
+            return None
+        
+        allergen_str = ','.join(item.allergen_list) or 'None'
+        print(f"  ✓ {item.name} - {item.calories} cal, P:{item.protein:g}g C:{item.carbs:g}g F:{item.fats:g}g | Allergens: {allergen_str}")
+        self.metrics.add_items()
+        return item
+    
+    def write_item(self, writer, item_url, item):
+        """Stream one scraped item to writer, keeping only a few samples in memory"""
+        with self.metrics.phase('csv_write'):
+            writer.write_rows(item_url, [item.to_row()])
+        self.item_count += 1
+        if len(self.sample_items) < 3:
+            self.sample_items.append(item)
+    
+    def product_worker(self, jobs, deliver, total):
+        """Pull (index, url) jobs off the shared queue until it is empty
+        
+        Each worker owns its HTTP session and its browser. The browser is only
+        started if a product needs the Selenium fallback, is recycled after
+        self.recycle_pages browser pages or past self.max_browser_mb (keeping
+        its cookies) and is restarted after a crash. It is shut down when the
+        worker exits, unless self.keep_browsers hands it to the next scrape.
+        """
+        session = self.setup_session()
+        recycler = self.worker_recycler()
+        
+        try:
+            while True:
+                try:
+                    idx, item_url = jobs.get_nowait()
+                except queue.Empty:
+                    break
                 
                 try:
-                    driver.get(item_url)
-                    time.sleep(2)
-                    
-                    # Extract item name
-                    item_name = ""
-                    try:
-                        name_elem = driver.find_element(By.CSS_SELECTOR, "h1, [class*='product-name'], [class*='ProductName']")
-                        item_name = name_elem.text.strip()
-                    except:
-                        # Try alternate selector
-                        try:
-                            item_name = driver.title.split('|')[0].strip()
-                        except:
-                            item_name = "Unknown Item"
-                    
-                    # Extract nutrition data
-                    nutrition = self.extract_nutrition_from_item(driver, item_url)
-                    
-                    if nutrition:
-                        item_data = {
-                            'itemName': item_name,
-                            'calories': nutrition['calories'],
-                            'nutrition': {
-                                'protein': nutrition['protein'],
-                                'carbs': nutrition['carbs'],
-                                'fats': nutrition['fats']
-                            },
-                            'vegetarian': False,  # Would need additional logic to determine
-                            'allergens': nutrition['allergens']
-                        }
-                        
-                        self.items.append(item_data)
-                        allergen_str = ','.join(nutrition['allergens']) if nutrition['allergens'] else 'None'
-                        print(f"  ✓ {item_name} - {nutrition['calories']} cal, P:{nutrition['protein']}g C:{nutrition['carbs']}g F:{nutrition['fats']}g | Allergens: {allergen_str}")
-                    else:
-                        print(f"  ✗ Could not extract nutrition data")
-                    
+                    item = self.scrape_product(idx + 1, total, item_url, recycler.get, session)
+                except CircuitOpenError as e:
+                    # The site is refusing us, not the browser misbehaving; keep the driver
+                    item = None
+                    print(f"  ✗ Skipped ({item_url}): {e}")
+                    self.metrics.fail('product')
                 except Exception as e:
-                    print(f"  ✗ Error: {e}")
-                    continue
-            
+                    item = None
+                    print(f"  ✗ Error ({item_url}): {e}")
+                    self.metrics.fail('product')
+                    # The browser may be in a bad state; start a fresh one for the next product
+                    recycler.quit()
+                deliver(idx, item)
         finally:
-            driver.quit()
+            self.release_recycler(recycler)
+            session.close()
+    
+    def worker_recycler(self):
+        """A product worker's DriverRecycler, kept from an earlier scrape if there is one"""
+        from wait_engine import waits_for
         
-        return self.items
+        with self.recyclers_lock:
+            if self.idle_recyclers:
+                return self.idle_recyclers.pop()
+        return DriverRecycler(
+            self.setup_driver, self.metrics, self.recycle_pages, self.max_browser_mb,
+            on_quit=lambda driver: self.wait_records.extend(waits_for(driver).records)
+        )
+    
+    def release_recycler(self, recycler):
+        """Quit a finished worker's browser, or keep it running with keep_browsers"""
+        from wait_engine import waits_for
+        
+        if not self.keep_browsers:
+            recycler.quit()
+            return
+        if recycler.driver is not None:
+            # Hand this scrape its waits now so the kept browser starts the next one empty
+            records = waits_for(recycler.driver).records
+            self.wait_records.extend(records)
+            records.clear()
+        with self.recyclers_lock:
+            self.idle_recyclers.append(recycler)
+    
+    def close_browsers(self):
+        """Quit the product browsers kept between scrapes"""
+        with self.recyclers_lock:
+            recyclers, self.idle_recyclers = self.idle_recyclers, []
+        for recycler in recyclers:
+            recycler.quit()
+    
+    def scrape_products(self, item_links, emit=None):
+        """Scrape products across self.workers workers, keeping item_links order
+        
+        Finished items are passed to emit(item_url, item) in item_links order;
+        only products that finish ahead of an earlier, slower one are held
+        back. Without emit, the items are collected and returned.
+        """
+        jobs = queue.Queue()
+        for idx, item_url in enumerate(item_links):
+            jobs.put((idx, item_url))
+        
+        collected = []
+        if emit is None:
+            emit = lambda item_url, item: collected.append(item)
+        
+        pending = {}
+        order = {'next': 0}
+        lock = threading.Lock()
+        
+        def deliver(idx, item):
+            with lock:
+                pending[idx] = item
+                while order['next'] in pending:
+                    ready = pending.pop(order['next'])
+                    if ready:
+                        emit(item_links[order['next']], ready)
+                    order['next'] += 1
+        
+        workers = min(self.workers, len(item_links)) or 1
+        print(f"Scraping {len(item_links)} products with {workers} worker(s)")
+        
+        threads = [
+            threading.Thread(target=self.product_worker, args=(jobs, deliver, len(item_links)), daemon=True)
+            for _ in range(workers)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        return collected
     
     def save_to_csv(self, filename='starbucks_menu.csv'):
         """Save scraped items to CSV file"""
@@ -285,31 +739,8 @@ class StarbucksScraper:
             print("No items to save")
             return
         
-        with open(filename, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            
-            # Write header
-            writer.writerow([
-                'Item Name',
-                'Calories',
-                'Protein (g)',
-                'Carbs (g)',
-                'Fats (g)',
-                'Vegetarian',
-                'Allergens'
-            ])
-            
-            # Write data rows
-            for item in self.items:
-                writer.writerow([
-                    item['itemName'],
-                    item['calories'],
-                    item['nutrition']['protein'],
-                    item['nutrition']['carbs'],
-                    item['nutrition']['fats'],
-                    'Yes' if item['vegetarian'] else 'No',
-                    ', '.join(item['allergens']) if item['allergens'] else ''
-                ])
+        with self.metrics.phase('csv_write'):
+            write_menu_csv(filename, self.items)
         
         print(f"\n✓ Saved {len(self.items)} items to {filename}")
     
@@ -318,23 +749,82 @@ class StarbucksScraper:
         print("\n" + "="*50)
         print(f"SCRAPING SUMMARY")
         print("="*50)
-        print(f"Total items scraped: {len(self.items)}")
+        print(f"Total items scraped: {self.item_count}")
         print(f"\nSample items:")
-        for item in self.items[:3]:
-            print(f"\n- {item['itemName']}")
-            print(f"  Calories: {item['calories']}")
-            print(f"  Protein: {item['nutrition']['protein']}g")
-            print(f"  Carbs: {item['nutrition']['carbs']}g")
-            print(f"  Fats: {item['nutrition']['fats']}g")
-            print(f"  Allergens: {', '.join(item['allergens']) if item['allergens'] else 'None'}")
+        for item in self.sample_items:
+            print(f"\n- {item.name}")
+            print(f"  Calories: {item.calories}")
+            print(f"  Protein: {item.protein:g}g")
+            print(f"  Carbs: {item.carbs:g}g")
+            print(f"  Fats: {item.fats:g}g")
+            print(f"  Allergens: {', '.join(item.allergen_list) or 'None'}")
 
-if __name__ == "__main__":
+# Parser instance of a parse pool process, made on its first page
+_page_parser = None
+
+def parse_product_page(html):
+    """StarbucksScraper.parse_product_html as a module-level function for the parse pool"""
+    global _page_parser
+    if _page_parser is None:
+        _page_parser = StarbucksScraper()
+    return _page_parser.parse_product_html(html)
+
+def add_arguments(parser):
+    """Command-line options for a Starbucks run (also used by scrape.py)"""
+    parser.add_argument('--workers', type=int, default=4, help="parallel product workers; the fetch controller adapts how many requests are in flight (default: 4)")
+    parser.add_argument('--parse-workers', type=int, default=DEFAULT_PARSE_WORKERS,
+                        help=f"processes parsing product pages while workers keep fetching (0 = parse inline, default: {DEFAULT_PARSE_WORKERS})")
+    parser.add_argument('--output', default='starbucks_menu.csv', help="CSV file to write")
+    parser.add_argument('--base-url', default=DEFAULT_BASE_URL, help=f"site to scrape, e.g. a local test server (default: {DEFAULT_BASE_URL})")
+    parser.add_argument('--lean', action='store_true', help="block images, fonts, media and trackers in Chrome and load pages eagerly")
+    parser.add_argument('--recycle-pages', type=int, default=DEFAULT_MAX_PAGES, help=f"restart each worker's browser after this many pages (0 = never, default: {DEFAULT_MAX_PAGES})")
+    parser.add_argument('--max-browser-mb', type=int, default=DEFAULT_MAX_RSS_MB, help=f"restart a browser whose memory passes this many MB (0 = never, default: {DEFAULT_MAX_RSS_MB})")
+    parser.add_argument('--cache', default=DEFAULT_CACHE_PATH, help=f"page cache file (default: {DEFAULT_CACHE_PATH})")
+    parser.add_argument('--cache-ttl', type=float, default=12, help="hours before cached pages are re-checked (default: 12)")
+    parser.add_argument('--item-ttl', type=float, default=7, help="days a known product's nutrition is reused (default: 7)")
+    parser.add_argument('--no-cache', action='store_true', help="fetch and parse every page")
+    parser.add_argument('--resume', action='store_true', help="continue an interrupted run from its checkpoint")
+    parser.add_argument('--dry-run', action='store_true', help="show what would be scraped and exit")
+    parser.add_argument('--report', default=report_path('starbucks_report.json'), help="JSON run report with per-phase timings (default: reports/starbucks_report.json)")
+    parser.add_argument('--prometheus', help="also write metrics to this Prometheus textfile")
+
+def run(args):
+    """Scrape the whole menu, streaming items to args.output"""
+    if args.dry_run:
+        print(f"Menu: {args.base_url.rstrip('/')}/menu -> {args.output}")
+        print(f"{max(1, args.workers)} product worker(s), HTTP first, browser fallback{' (lean)' if args.lean else ''}")
+        return
+    
+    cache = None if args.no_cache else PageCache(args.cache, ttl=args.cache_ttl * 3600)
+    store = None if args.no_cache else ItemStore(args.cache, ttl=args.item_ttl * 24 * 3600)
+    
     print("Starting Starbucks Menu Scraper...")
     print("="*50)
     
-    scraper = StarbucksScraper()
-    scraper.scrape_menu()
+    scraper = StarbucksScraper(workers=args.workers, cache=cache, store=store, lean=args.lean, base_url=args.base_url,
+                               parse_workers=args.parse_workers, recycle_pages=args.recycle_pages, max_browser_mb=args.max_browser_mb)
+    try:
+        # Items go straight to disk; the CSV appears once every product is done
+        with StreamingCSVWriter(args.output, MENU_FIELDS, resume=args.resume) as writer:
+            scraper.scrape_menu(writer)
+    finally:
+        if cache:
+            cache.close()
+        if store:
+            store.print_summary()
+            store.close()
     scraper.print_summary()
-    scraper.save_to_csv()
+    
+    CONTROLLER.print_summary()
+    scraper.fetcher.print_summary()
+    scraper.metrics.print_summary()
+    write_json_report(args.report, [scraper.metrics])
+    if args.prometheus:
+        write_prometheus_textfile(args.prometheus, [scraper.metrics])
     
     print("\n✓ Scraping complete!")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape the Starbucks menu to CSV")
+    add_arguments(parser)
+    run(parser.parse_args())
@@ -0,0 +1,121 @@
+"""Checkpointed CSV output and resuming an interrupted Nutrislice batch."""
+import csv
+from datetime import date
+
+import pytest
+
+import nutrislice_scraper
+from crawl_checkpoint import Checkpoint, StreamingCSVWriter
+from menu_item import MenuItem
+from nutrislice_scraper import BatchOutput, MenuPageError, scrape_nutrislice_batch
+
+FIELDS = ['key', 'value']
+
+def read_rows(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+def test_checkpoint_resume_ignores_torn_last_line(tmp_path):
+    path = tmp_path / 'run.checkpoint'
+    checkpoint = Checkpoint(str(path))
+    checkpoint.mark_done('a', 10)
+    checkpoint.mark_done('b', 20)
+    checkpoint.close()
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('30\tc')
+
+    resumed = Checkpoint(str(path), resume=True)
+
+    assert 'a' in resumed and 'b' in resumed and 'c' not in resumed
+    assert resumed.last_offset == 20
+    resumed.close()
+
+def test_checkpoint_without_resume_starts_over(tmp_path):
+    path = str(tmp_path / 'run.checkpoint')
+    Checkpoint(path).mark_done('a')
+
+    assert len(Checkpoint(path)) == 0
+
+def test_writer_resume_drops_rows_after_last_checkpoint(tmp_path):
+    path = str(tmp_path / 'out.csv')
+    writer = StreamingCSVWriter(path, FIELDS)
+    writer.write_rows('a', [{'key': 'a', 'value': 1}])
+    # Killed after writing b's rows but before checkpointing b
+    writer.writer.writerow({'key': 'b', 'value': 2})
+    writer.close()
+
+    with StreamingCSVWriter(path, FIELDS, resume=True) as resumed:
+        assert resumed.is_done('a') and not resumed.is_done('b')
+        resumed.write_rows('b', [{'key': 'b', 'value': 2}])
+
+    assert read_rows(path) == [{'key': 'a', 'value': '1'}, {'key': 'b', 'value': '2'}]
+    assert not (tmp_path / 'out.csv.checkpoint').exists()
+    assert not (tmp_path / 'out.csv.partial').exists()
+
+def test_writer_keeps_progress_on_error(tmp_path):
+    path = str(tmp_path / 'out.csv')
+    with pytest.raises(KeyboardInterrupt):
+        with StreamingCSVWriter(path, FIELDS) as writer:
+            writer.write_rows('a', [{'key': 'a', 'value': 1}])
+            raise KeyboardInterrupt
+
+    assert not (tmp_path / 'out.csv').exists()
+    assert StreamingCSVWriter(path, FIELDS, resume=True).is_done('a')
+
+class FakeDriver:
+    page_source = '<html></html>'
+
+    def quit(self):
+        pass
+
+def test_page_that_does_not_open_raises(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(nutrislice_scraper, 'open_menu_page', lambda driver, url, warm=False: False)
+
+    with pytest.raises(MenuPageError):
+        nutrislice_scraper.scrape_menu_page(FakeDriver(), menu_url('lunch'))
+
+@pytest.fixture
+def browser_pages(monkeypatch):
+    """Stand-in browser tier: pages in 'failing' fail to load, and the run is interrupted at pages in 'stop'"""
+    pages = {'scraped': [], 'failing': set(), 'stop': set()}
+
+    def scrape_menu_page(driver, url, **kwargs):
+        pages['scraped'].append(url)
+        if url in pages['stop']:
+            raise KeyboardInterrupt
+        if url in pages['failing']:
+            raise MenuPageError(f"Failed to access menu at {url}")
+        return [MenuItem(f"Dish from {url.rsplit('/', 2)[-2]}", 100)]
+
+    monkeypatch.setattr(nutrislice_scraper, 'setup_driver', lambda lean=False: FakeDriver())
+    monkeypatch.setattr(nutrislice_scraper, 'scrape_menu_page', scrape_menu_page)
+    return pages
+
+def run_batch(merged, meals, resume=False):
+    with BatchOutput(merged_file=merged, resume=resume) as output:
+        scrape_nutrislice_batch(['dc'], meals, [date(2025, 11, 24)], use_api=False,
+                                skip=output, on_page=output.write_page)
+    return output
+
+def menu_url(meal):
+    return nutrislice_scraper.MENU_URL_TEMPLATE.format(district='cpp', location='dc', meal=meal, date='2025-11-24')
+
+def test_failed_page_is_retried_on_resume(tmp_path, browser_pages):
+    merged = str(tmp_path / 'merged.csv')
+    meals = ['breakfast', 'lunch', 'dinner']
+    browser_pages['failing'].add(menu_url('lunch'))
+    browser_pages['stop'].add(menu_url('dinner'))
+
+    with pytest.raises(KeyboardInterrupt):
+        run_batch(merged, meals)
+
+    browser_pages.update(scraped=[], failing=set(), stop=set())
+    output = run_batch(merged, meals, resume=True)
+
+    # Breakfast was checkpointed; the failed lunch page was not, so it is scraped again
+    assert browser_pages['scraped'] == [menu_url('lunch'), menu_url('dinner')]
+    assert output.pages == 2
+    assert [row['Item Name'] for row in read_rows(merged)] == [
+        'Dish from breakfast', 'Dish from lunch', 'Dish from dinner'
+    ]
@@ -0,0 +1,193 @@
+"""Token bucket, AIMD limit, circuit breaker and retrying GETs, on a fake clock."""
+import pytest
+
+import fetch_control
+from fetch_control import AIMDLimit, CircuitBreaker, CircuitOpenError, FetchController, TokenBucket
+
+class Clock:
+    """Stands in for the time module; sleeping moves the clock instead of waiting"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    perf_counter = monotonic
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(fetch_control, 'time', clock)
+    return clock
+
+def test_token_bucket_bursts_then_holds_rate(clock):
+    bucket = TokenBucket(rate=2.0, burst=3)
+
+    for _ in range(3):
+        bucket.acquire()
+    assert clock.sleeps == []
+
+    bucket.acquire()
+    assert clock.sleeps == [pytest.approx(0.5)]
+
+def test_token_bucket_refills_up_to_burst(clock):
+    bucket = TokenBucket(rate=2.0, burst=3)
+    for _ in range(3):
+        bucket.acquire()
+
+    clock.now += 60
+    for _ in range(3):
+        bucket.acquire()
+    assert clock.sleeps == []
+    bucket.acquire()
+    assert len(clock.sleeps) == 1
+
+def test_token_bucket_pause(clock):
+    bucket = TokenBucket(rate=10.0, burst=5)
+    start = clock.now
+    bucket.pause(4)
+
+    bucket.acquire()
+
+    # Held for the pause, then one token's worth of refill
+    assert clock.now - start == pytest.approx(4.1)
+
+def test_aimd_increases_after_a_round_of_healthy_responses(clock):
+    limit = AIMDLimit(initial=2, maximum=4)
+
+    for expected in (3, 4, 4):
+        for _ in range(limit.limit):
+            limit.acquire()
+            limit.release(0.1)
+        assert limit.limit == expected
+
+def test_aimd_halves_on_congestion_once_per_interval(clock):
+    limit = AIMDLimit(initial=8)
+
+    limit.acquire()
+    limit.release(0.1, congested=True)
+    limit.acquire()
+    limit.release(None, congested=True)
+    assert limit.limit == 4
+
+    clock.now += AIMDLimit.DECREASE_INTERVAL
+    limit.acquire()
+    limit.release(0.1, congested=True)
+    assert limit.limit == 2
+
+def test_aimd_slow_response_is_congestion(clock):
+    limit = AIMDLimit(initial=8, latency_factor=3.0)
+    limit.acquire()
+    limit.release(0.2)
+
+    limit.acquire()
+    limit.release(0.5)
+    assert limit.limit == 8
+    limit.acquire()
+    limit.release(0.7)
+    assert limit.limit == 4
+
+def test_aimd_floor(clock):
+    limit = AIMDLimit(initial=2, minimum=1)
+    for _ in range(3):
+        limit.acquire()
+        limit.release(None, congested=True)
+        clock.now += AIMDLimit.DECREASE_INTERVAL
+
+    assert limit.limit == 1
+
+def test_breaker_opens_at_threshold(clock):
+    breaker = CircuitBreaker(threshold=3, cooldown=30)
+    for _ in range(2):
+        breaker.record(False)
+    assert breaker.allow() and breaker.state == 'closed'
+
+    breaker.record(False)
+
+    assert breaker.state == 'open'
+    assert not breaker.allow()
+
+def test_breaker_half_open_trial(clock):
+    breaker = CircuitBreaker(threshold=1, cooldown=30)
+    breaker.record(False)
+
+    clock.now += 30
+    assert breaker.allow() and breaker.state == 'half-open'
+    # Only one trial request at a time
+    assert not breaker.allow()
+
+    breaker.record(False)
+    assert breaker.state == 'open' and not breaker.allow()
+
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record(True)
+    assert breaker.state == 'closed' and breaker.allow()
+
+@pytest.fixture
+def requests():
+    return pytest.importorskip('requests')
+
+class Response:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+class Session:
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.requests = 0
+
+    def get(self, url, **kwargs):
+        self.requests += 1
+        outcome = self.outcomes.pop(0) if len(self.outcomes) > 1 else self.outcomes[0]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+URL = "https://example.com/menu"
+
+def test_get_retries_transient_failures(clock, requests):
+    controller = FetchController(retries=3)
+    session = Session(Response(503), requests.ConnectionError('reset'), Response(200))
+
+    assert controller.get(session, URL, 'test').status_code == 200
+    assert session.requests == 3
+    assert controller.breaker('test').state == 'closed'
+
+def test_get_returns_last_response_or_raises(clock, requests):
+    controller = FetchController(retries=2)
+
+    assert controller.get(Session(Response(500)), URL, 'test').status_code == 500
+    with pytest.raises(requests.Timeout):
+        controller.get(Session(requests.Timeout('slow')), URL, 'test')
+    # Not retried
+    session = Session(Response(404))
+    assert controller.get(session, URL, 'test').status_code == 404
+    assert session.requests == 1
+
+def test_get_honors_retry_after(clock, requests):
+    controller = FetchController(retries=1)
+
+    controller.get(Session(Response(429, {'Retry-After': '7'}), Response(200)), URL, 'test')
+
+    assert 7 in clock.sleeps
+
+def test_get_fails_fast_while_breaker_is_open(clock, requests):
+    controller = FetchController(retries=0, breaker_threshold=2)
+    failing = Session(Response(503))
+    for _ in range(2):
+        controller.get(failing, URL, 'test')
+
+    with pytest.raises(CircuitOpenError):
+        controller.get(failing, URL, 'test')
+    assert failing.requests == 2
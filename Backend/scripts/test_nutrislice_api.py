@@ -0,0 +1,137 @@
+"""Nutrislice menu API mapping against a recorded week (benchmarks/fixtures/nutrislice_week.json)."""
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+import threading
+
+import pytest
+
+from menu_item import MenuItem, allergen_bits
+import nutrislice_scraper
+from nutrislice_scraper import fetch_menu_from_api, find_menu_day, food_to_menu_item, parse_nutrition_html
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks', 'fixtures')
+MENU_URL = "https://cpp.nutrislice.com/menu/centerpointe-dining-commons/lunch/2025-11-24"
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURE_DIR, name), encoding='utf-8') as f:
+        return f.read()
+
+@pytest.fixture(scope='module')
+def week():
+    return json.loads(load_fixture('nutrislice_week.json'))
+
+@pytest.fixture(autouse=True)
+def fresh_controller():
+    """Start each test with closed circuit breakers"""
+    nutrislice_scraper.CONTROLLER.reset()
+
+def foods(day):
+    return {entry['food']['name'].strip(): entry['food'] for entry in day['menu_items'] if entry['food']}
+
+@pytest.fixture
+def api_server(week):
+    """Local server answering every request with the recorded week"""
+    body = json.dumps(week).encode('utf-8')
+    paths = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            paths.append(self.path)
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}", paths
+    server.shutdown()
+    server.server_close()
+
+def test_find_menu_day(week):
+    assert find_menu_day(week, date(2025, 11, 25))['date'] == '2025-11-25'
+    assert find_menu_day(week, date(2025, 11, 23))['menu_items'] == []
+    assert find_menu_day(week, date(2025, 11, 30)) is None
+    assert find_menu_day({}, date(2025, 11, 24)) is None
+
+def test_food_mapping(week):
+    day = foods(find_menu_day(week, date(2025, 11, 24)))
+
+    # Unknown icons ("Made without Gluten") are not allergens
+    assert food_to_menu_item(day['Cheeseburger']) == MenuItem('Cheeseburger (1 each)', 423, 21, 28, 12, False,
+                                                              allergen_bits('M,S,W'))
+    # No total fat: saturated + trans; the vegetarian icon is a flag, not an allergen
+    assert food_to_menu_item(day['Veggie Wrap']) == MenuItem('Veggie Wrap (1 wrap)', 310, 9.5, 44, 1.5, True,
+                                                             allergen_bits('SS,W'))
+
+def test_missing_nutrients_and_serving_size(week):
+    fruit = foods(find_menu_day(week, date(2025, 11, 24)))['Fruit Cup']
+
+    assert food_to_menu_item(fruit) == MenuItem('Fruit Cup', 60, 0, 15, 0, False, 0)
+
+def test_all_zero_food_is_skipped(week):
+    assert food_to_menu_item(foods(find_menu_day(week, date(2025, 11, 24)))['Water']) is None
+
+def test_vegan_and_nut_codes(week):
+    trail_mix = foods(find_menu_day(week, date(2025, 11, 25)))['Trail Mix']
+
+    item = food_to_menu_item(trail_mix)
+    assert item.vegetarian is True
+    assert item.allergen_list == ['P', 'T']
+
+def test_api_and_modal_give_the_same_row(week):
+    pytest.importorskip('bs4')
+    cheeseburger = foods(find_menu_day(week, date(2025, 11, 24)))['Cheeseburger']
+
+    from_api = food_to_menu_item(cheeseburger)
+    from_modal = parse_nutrition_html(load_fixture('nutrislice_modal.html'), 'Cheeseburger')
+
+    assert from_api == from_modal
+    assert from_api.to_row() == from_modal.to_row()
+
+def test_fetch_menu_from_api(api_server):
+    pytest.importorskip('requests')
+    api_base, paths = api_server
+    week_cache = {}
+
+    monday = fetch_menu_from_api(MENU_URL, api_base=api_base, week_cache=week_cache)
+    tuesday = fetch_menu_from_api(MENU_URL.replace('2025-11-24', '2025-11-25'), api_base=api_base, week_cache=week_cache)
+
+    # Section titles and the all-zero item are left out, tile order is kept
+    assert [item.name for item in monday] == ['Cheeseburger (1 each)', 'Veggie Wrap (1 wrap)', 'Fruit Cup']
+    assert [item.name for item in tuesday] == ['Trail Mix (1 ounce)']
+    # The second day of the week comes from the week cache
+    assert paths == ['/menu/api/weeks/school/centerpointe-dining-commons/menu-type/lunch/2025/11/24/']
+
+def test_fetch_menu_from_api_day_missing(api_server):
+    pytest.importorskip('requests')
+    api_base, _ = api_server
+
+    assert fetch_menu_from_api(MENU_URL.replace('2025-11-24', '2025-12-01'), api_base=api_base) is None
+    assert fetch_menu_from_api("https://cpp.nutrislice.com/not-a-menu", api_base=api_base) is None
+
+def test_store_aliases_are_scoped_to_the_location(api_server, tmp_path):
+    pytest.importorskip('requests')
+    from item_store import ItemStore
+    from nutrislice_scraper import item_alias, menu_location
+
+    api_base, _ = api_server
+    store = ItemStore(str(tmp_path / 'cache.db'))
+    fetch_menu_from_api(MENU_URL, api_base=api_base, store=store)
+
+    here = menu_location(MENU_URL)
+    elsewhere = menu_location(MENU_URL.replace('centerpointe-dining-commons', 'vista-market'))
+    assert here == 'cpp.nutrislice.com/centerpointe-dining-commons'
+    # Other meals and dates at the same location share the alias
+    assert menu_location(MENU_URL.replace('lunch/2025-11-24', 'dinner/2025-11-25')) == here
+
+    assert MenuItem.from_record(store.get_by_alias(item_alias(here, 'Cheeseburger'))).name == 'Cheeseburger (1 each)'
+    # Another location may serve it in another portion, so it isn't reused there
+    assert store.get_by_alias(item_alias(elsewhere, 'Cheeseburger')) is None
+    store.close()
@@ -0,0 +1,79 @@
+"""Meal-plan search over a small NutritionMatrix built from a temp Menus directory."""
+from itertools import combinations
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from menu_item import MenuItem, allergen_bits, write_menu_csv
+from nutrition_matrix import MIN_CALORIES, NutritionMatrix, solve, solve_batch
+
+GOAL = {'calories': 2000, 'protein': 120, 'carbs': 220, 'fats': 70}
+
+ITEMS = [
+    MenuItem('Oatmeal', 500, 20, 80, 10, True),
+    MenuItem('Chicken Bowl', 500, 45, 50, 15, False, allergen_bits('S')),
+    MenuItem('Peanut Noodles', 500, 25, 60, 20, True, allergen_bits('P,W')),
+    MenuItem('Veggie Burrito', 500, 25, 55, 20, True, allergen_bits('M,W')),
+    MenuItem('Fruit Plate', 400, 5, 90, 2, True),
+    MenuItem('Steak', 600, 55, 0, 40, False),
+    MenuItem('Black Coffee', 5, 0, 1, 0, True),
+]
+
+@pytest.fixture
+def matrix(tmp_path):
+    write_menu_csv(str(tmp_path / 'dining.csv'), ITEMS)
+    return NutritionMatrix.from_menus(str(tmp_path), {'dining.csv': 'restaurant-1'})
+
+def names(matrix, plan):
+    return sorted(str(matrix.names[i]) for i in plan['items'])
+
+def test_plans_fit_the_calorie_goal_and_are_ranked(matrix):
+    plans = solve(matrix, GOAL, top=10)
+
+    assert plans
+    assert [plan['error'] for plan in plans] == sorted(plan['error'] for plan in plans)
+    for plan in plans:
+        assert len(set(plan['items'])) == 4
+        assert abs(plan['totals']['calories'] - GOAL['calories']) <= 0.05 * GOAL['calories']
+        assert plan['totals']['calories'] == sum(ITEMS[i].calories for i in plan['items'])
+
+def test_best_plan_is_the_exhaustive_best(matrix):
+    def error(combo):
+        totals = [sum(getattr(ITEMS[i], m) for i in combo) for m in ('calories', 'protein', 'carbs', 'fats')]
+        return sum(w * abs(t - g) / g for w, t, g in zip((2, 1, 0.5, 0.5), totals, GOAL.values()))
+
+    feasible = [c for c in combinations(range(len(ITEMS)), 4)
+                if abs(sum(ITEMS[i].calories for i in c) - GOAL['calories']) <= 100]
+
+    assert sorted(solve(matrix, GOAL)[0]['items']) == list(min(feasible, key=error))
+
+def test_restrictions_and_calorie_floor(matrix):
+    assert ITEMS[-1].calories < MIN_CALORIES
+
+    for plan in solve(matrix, GOAL, restrictions=['Vegetarian', 'Nut-Free'], top=10):
+        assert not {'Chicken Bowl', 'Steak', 'Peanut Noodles', 'Black Coffee'} & set(names(matrix, plan))
+    for plan in solve(matrix, GOAL, restrictions=['Gluten-Free'], top=10):
+        assert not {'Peanut Noodles', 'Veggie Burrito'} & set(names(matrix, plan))
+
+def test_no_plan_when_too_few_items_or_goal_unreachable(matrix):
+    # Only the oatmeal and fruit plate are vegan, nut-free and over the calorie floor
+    assert solve(matrix, GOAL, restrictions=['Vegan', 'Nut-Free']) == []
+    assert solve(matrix, dict(GOAL, calories=5000)) == []
+
+def test_batch_matches_one_user_at_a_time(matrix):
+    users = [
+        {'goal': GOAL, 'restrictions': []},
+        {'goal': dict(GOAL, calories=1900), 'restrictions': ['Vegetarian']},
+        {'goal': GOAL, 'restrictions': ['Vegan', 'Nut-Free']},
+    ]
+
+    assert solve_batch(matrix, users) == [solve(matrix, user['goal'], user['restrictions']) for user in users]
+
+def test_save_and_load_round_trip(matrix, tmp_path):
+    path = str(tmp_path / 'menus.npz')
+    matrix.save(path)
+    loaded = NutritionMatrix.load(path)
+
+    assert [loaded.item(i) for i in range(len(loaded))] == [matrix.item(i) for i in range(len(matrix))]
+    assert solve(loaded, GOAL) == solve(matrix, GOAL)
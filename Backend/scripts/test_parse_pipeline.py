@@ -0,0 +1,94 @@
+"""ParsePipeline ordering, failures and back-pressure, inline and with a process pool."""
+import threading
+import time
+
+import pytest
+
+from parse_pipeline import ParsePipeline, parse_pool, run_parse
+from run_metrics import RunMetrics
+
+# Module-level so the process pool can pickle them
+def shout(html, delay=0.0):
+    time.sleep(delay)
+    return html.upper()
+
+def explode(html):
+    raise ValueError(f"can't parse {html}")
+
+def run(pool, pages, max_pending=8):
+    results = []
+    with ParsePipeline(pool, lambda key, result: results.append((key, result)), max_pending) as pipeline:
+        for key, parse, args in pages:
+            pipeline.submit(key, parse, *args)
+    return results
+
+def test_parse_pool_zero_is_inline():
+    assert parse_pool(0) is None
+    assert run_parse(None, shout, 'a') == 'A'
+
+def test_inline_results_in_order_with_failures_as_none():
+    results = run(None, [('a', shout, ['a']), ('b', explode, ['b']), ('c', shout, ['c'])])
+
+    assert results == [('a', 'A'), ('b', None), ('c', 'C')]
+
+def test_ready_values_keep_their_place():
+    results = []
+    with ParsePipeline(None, lambda key, result: results.append((key, result))) as pipeline:
+        pipeline.submit('a', shout, 'a')
+        pipeline.ready('cached', 'FROM CACHE')
+        pipeline.submit('b', shout, 'b')
+
+    assert results == [('a', 'A'), ('cached', 'FROM CACHE'), ('b', 'B')]
+
+def test_writer_error_is_raised_on_close():
+    def on_result(key, result):
+        if key == 'a':
+            raise OSError('disk full')
+
+    pipeline = ParsePipeline(None, on_result)
+    pipeline.submit('a', shout, 'a')
+    # The writer keeps draining after an error
+    pipeline.submit('b', shout, 'b')
+
+    with pytest.raises(OSError, match='disk full'):
+        pipeline.close()
+
+def test_submit_blocks_at_max_pending():
+    release = threading.Event()
+    written = []
+
+    def on_result(key, result):
+        release.wait()
+        written.append(key)
+
+    pipeline = ParsePipeline(None, on_result, max_pending=1)
+    pipeline.submit('a', shout, 'a')
+    # The writer holds 'a' and 'b' fills the queue, so 'c' waits for room
+    pipeline.submit('b', shout, 'b')
+    submitter = threading.Thread(target=pipeline.submit, args=('c', shout, 'c'))
+    submitter.start()
+    submitter.join(0.2)
+    assert submitter.is_alive()
+
+    release.set()
+    submitter.join()
+    pipeline.close()
+    assert written == ['a', 'b', 'c']
+
+def test_inline_parses_are_timed():
+    metrics = RunMetrics('test')
+    with ParsePipeline(None, lambda key, result: None, metrics=metrics) as pipeline:
+        pipeline.submit('a', shout, 'a')
+        pipeline.submit('b', shout, 'b')
+
+    assert metrics.durations['html_parse'].count == 2
+
+def test_pool_results_in_submission_order():
+    pool = parse_pool(2)
+
+    # The first page takes longest, but is still written first
+    results = run(pool, [('a', shout, ['a', 0.3]), ('b', explode, ['b']), ('c', shout, ['c'])])
+
+    assert results == [('a', 'A'), ('b', None), ('c', 'C')]
+    assert parse_pool(2) is pool
+    assert run_parse(pool, shout, 'd') == 'D'
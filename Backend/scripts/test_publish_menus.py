@@ -0,0 +1,102 @@
+"""publish_menus.py deltas against an in-memory MongoDB (mongomock)."""
+import copy
+import os
+
+import pytest
+
+mongomock = pytest.importorskip('mongomock')
+from bson import ObjectId
+
+from menu_csv import load_menu_csv
+from publish_menus import MENUS_DIR, diff_menu, publish_menu
+
+def menu_item(name, calories, protein=1, vegetarian=False, allergens=()):
+    return {'itemName': name, 'calories': calories, 'nutrition': {'protein': protein, 'carbs': 2, 'fats': 3},
+            'vegetarian': vegetarian, 'allergens': list(allergens)}
+
+def stored_items(collection, restaurant_id):
+    items = collection.find_one({'_id': restaurant_id})['menuItems']
+    return [{key: value for key, value in item.items() if key != '_id'} for item in items]
+
+@pytest.fixture
+def restaurants():
+    collection = mongomock.MongoClient().db.restaurants
+    restaurant_id = ObjectId()
+    collection.insert_one({'_id': restaurant_id, 'name': 'Subway', 'menuItems': []})
+    return collection, restaurant_id
+
+def test_first_publish_adds_every_row(restaurants):
+    collection, restaurant_id = restaurants
+    items = [menu_item('Turkey Breast', 280), menu_item('Turkey Breast', 560), menu_item('Cookie', 200)]
+
+    result = publish_menu(collection, restaurant_id, items)
+
+    assert result['status'] == 'ok'
+    assert (result['added'], result['updated'], result['removed']) == (3, 0, 0)
+    assert stored_items(collection, restaurant_id) == items
+    assert all('_id' in item for item in collection.find_one({'_id': restaurant_id})['menuItems'])
+
+def test_unchanged_rerun_writes_nothing(restaurants):
+    collection, restaurant_id = restaurants
+    items = [menu_item('Turkey Breast', 280), menu_item('Turkey Breast', 560)]
+    publish_menu(collection, restaurant_id, items)
+
+    result = publish_menu(collection, restaurant_id, copy.deepcopy(items))
+
+    assert result['status'] == 'unchanged'
+    assert result['operations'] == 0
+
+def test_one_field_change_updates_only_that_row(restaurants):
+    collection, restaurant_id = restaurants
+    items = [menu_item('Turkey Breast', 280), menu_item('Turkey Breast', 560), menu_item('Cookie', 200)]
+    publish_menu(collection, restaurant_id, items)
+    ids_before = [item['_id'] for item in collection.find_one({'_id': restaurant_id})['menuItems']]
+
+    items[1] = menu_item('Turkey Breast', 600)
+    result = publish_menu(collection, restaurant_id, items)
+
+    assert (result['added'], result['updated'], result['removed']) == (0, 1, 0)
+    assert stored_items(collection, restaurant_id) == items
+    # Updated in place, so the API's item ids stay valid
+    assert [item['_id'] for item in collection.find_one({'_id': restaurant_id})['menuItems']] == ids_before
+
+def test_same_name_rows_are_kept_and_removed_one_at_a_time(restaurants):
+    collection, restaurant_id = restaurants
+    items = [menu_item('Turkey Breast', 280), menu_item('Turkey Breast', 560), menu_item('Turkey Breast', 840)]
+    publish_menu(collection, restaurant_id, items)
+
+    result = publish_menu(collection, restaurant_id, items[:2])
+
+    assert (result['added'], result['updated'], result['removed']) == (0, 0, 1)
+    assert stored_items(collection, restaurant_id) == items[:2]
+
+def test_items_without_ids_are_replaced_once(restaurants):
+    collection, restaurant_id = restaurants
+    collection.update_one({'_id': restaurant_id}, {'$set': {'menuItems': [menu_item('Cookie', 200)] * 2}})
+    items = [menu_item('Cookie', 200), menu_item('Brownie', 300)]
+
+    publish_menu(collection, restaurant_id, items)
+
+    assert stored_items(collection, restaurant_id) == items
+    assert publish_menu(collection, restaurant_id, items)['status'] == 'unchanged'
+
+@pytest.mark.parametrize('filename', ['subway_menu.csv', 'qdoba_menu.csv'])
+def test_real_menus_with_repeated_names_round_trip(restaurants, filename):
+    collection, restaurant_id = restaurants
+    items = load_menu_csv(os.path.join(MENUS_DIR, filename))
+    assert len({item['itemName'] for item in items}) < len(items)
+
+    publish_menu(collection, restaurant_id, items)
+
+    assert stored_items(collection, restaurant_id) == items
+    assert publish_menu(collection, restaurant_id, items)['status'] == 'unchanged'
+
+def test_diff_menu_matches_repeated_names_by_order():
+    stored = [dict(menu_item('Wrap', 300), _id=1), dict(menu_item('Wrap', 400), _id=2)]
+    new = [menu_item('Wrap', 300), menu_item('Wrap', 450), menu_item('Wrap', 500)]
+
+    added, updated, removed = diff_menu(stored, new)
+
+    assert added == [new[2]]
+    assert updated == {2: {'calories': 450}}
+    assert removed == []
@@ -0,0 +1,24 @@
+"""Prometheus text rendering of run metrics."""
+from run_metrics import RunMetrics, prometheus_text
+
+def declared_types(text):
+    return dict(line.split()[2:4] for line in text.splitlines() if line.startswith('# TYPE'))
+
+def test_prometheus_types_match_names():
+    metrics = RunMetrics('test')
+    metrics.record('page_load', 0.5)
+    metrics.record('page_load', 1.5, ok=False)
+    metrics.add('page_bytes', 2048)
+    metrics.add_items(3)
+
+    text = prometheus_text([metrics])
+    types = declared_types(text)
+
+    # Only counters may use the _total suffix
+    assert {name for name, kind in types.items() if name.endswith('_total')} == {
+        name for name, kind in types.items() if kind == 'counter'
+    }
+    assert 'scraper_counter{source="test",counter="page_bytes"} 2048' in text
+    assert 'scraper_items{source="test"} 3' in text
+    assert 'scraper_phase_failures_total{source="test",phase="page_load"} 1' in text
+    assert 'scraper_phase_seconds_count{source="test",phase="page_load"} 2' in text
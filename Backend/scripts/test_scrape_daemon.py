@@ -0,0 +1,82 @@
+"""Job spec validation and the POST /jobs answers of the scrape daemon (no sessions started)."""
+from argparse import Namespace
+from http.server import ThreadingHTTPServer
+import http.client
+import json
+import threading
+
+import pytest
+
+from scrape_daemon import JobRequestHandler, ScrapeDaemon
+
+NUTRISLICE = {'source': 'nutrislice', 'location': 'centerpointe-dining-commons', 'meal': 'lunch', 'date': '2025-11-24'}
+
+@pytest.fixture
+def daemon():
+    return ScrapeDaemon(Namespace(sessions=1, warm=[]))
+
+@pytest.mark.parametrize('spec', [
+    NUTRISLICE,
+    {key: value for key, value in NUTRISLICE.items() if key != 'date'},
+    dict(NUTRISLICE, district='cpp'),
+    {'source': 'starbucks'},
+])
+def test_valid_specs_are_queued(daemon, spec):
+    job = daemon.submit(dict(spec))
+
+    assert daemon.get(job.id) is job
+    assert daemon.queues[spec['source']].get_nowait() is job
+
+@pytest.mark.parametrize('spec, error', [
+    ({}, 'source must be one of'),
+    ({'source': ['nutrislice']}, 'source must be one of'),
+    (dict(NUTRISLICE, date=20251124), 'date must be a non-empty string'),
+    (dict(NUTRISLICE, date='11/24/2025'), 'date must be YYYY-MM-DD'),
+    (dict(NUTRISLICE, location=7), 'location must be a non-empty string'),
+    (dict(NUTRISLICE, meal=None), 'meal must be a non-empty string'),
+    (dict(NUTRISLICE, meal=' '), 'meal must be a non-empty string'),
+    ({'source': 'nutrislice', 'meal': 'lunch'}, 'nutrislice jobs need location'),
+    (dict(NUTRISLICE, dates=['2025-11-24']), "nutrislice jobs don't take dates"),
+    ({'source': 'starbucks', 'location': 'pomona'}, "starbucks jobs don't take location"),
+])
+def test_bad_specs_are_rejected(daemon, spec, error):
+    with pytest.raises(ValueError, match=error):
+        daemon.submit(spec)
+    assert all(q.empty() for q in daemon.queues.values())
+
+@pytest.fixture
+def api(daemon, monkeypatch):
+    monkeypatch.setattr(JobRequestHandler, 'daemon', daemon)
+    monkeypatch.setattr(JobRequestHandler, 'log_message', lambda self, format, *args: None)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), JobRequestHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    def post(path, body):
+        connection = http.client.HTTPConnection('127.0.0.1', server.server_port, timeout=5)
+        connection.request('POST', path, body=json.dumps(body))
+        response = connection.getresponse()
+        result = response.status, json.loads(response.read())
+        connection.close()
+        return result
+
+    yield post
+    server.shutdown()
+    server.server_close()
+
+@pytest.mark.parametrize('path, body', [
+    ('/jobs', dict(NUTRISLICE, date=20251124)),
+    ('/jobs', ['nutrislice']),
+    ('/jobs', {'source': {'name': 'starbucks'}}),
+    ('/jobs?wait=soon', NUTRISLICE),
+])
+def test_bad_requests_get_400(api, path, body):
+    status, answer = api(path, body)
+
+    assert status == 400
+    assert answer['error']
+
+def test_queued_job_gets_202(api):
+    status, answer = api('/jobs', {'source': 'starbucks'})
+
+    assert status == 202
+    assert answer['status'] == 'queued'
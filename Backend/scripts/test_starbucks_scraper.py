@@ -0,0 +1,75 @@
+"""Starbucks product page parsing against the benchmark fixtures."""
+import os
+
+import pytest
+
+pytest.importorskip('bs4')
+
+from menu_item import MenuItem, allergen_bits
+from starbucks_scraper import StarbucksScraper
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks', 'fixtures')
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURE_DIR, name), encoding='utf-8') as f:
+        return f.read()
+
+@pytest.fixture
+def scraper():
+    return StarbucksScraper()
+
+def test_rendered_panel(scraper):
+    assert scraper.parse_product_html(load_fixture('starbucks_nutrition.html')) == MenuItem(
+        'Caffè Latte', 190, 13, 19, 7, None, allergen_bits('M')
+    )
+
+def test_embedded_state(scraper):
+    assert scraper.parse_product_html(load_fixture('starbucks_product_state.html')) == MenuItem(
+        'Caffè Latte', 190, 13, 19, 7, None, allergen_bits('M')
+    )
+
+def test_all_zero_panel_is_kept(scraper):
+    assert scraper.parse_product_html(load_fixture('starbucks_nutrition_zero.html')) == MenuItem(
+        'Iced Black Tea', 0, 0, 0, 0, None, 0
+    )
+
+def test_page_without_panel_needs_rendering(scraper):
+    assert scraper.parse_product_html('<html><body><div id="root"></div></body></html>') is None
+
+class Response:
+    status_code = 200
+    headers = {}
+
+    def __init__(self, text):
+        self.text = text
+
+    def raise_for_status(self):
+        pass
+
+class Session:
+    """Answers every GET with the rendered latte page"""
+
+    def __init__(self):
+        self.requests = 0
+
+    def get(self, url, **kwargs):
+        self.requests += 1
+        return Response(load_fixture('starbucks_nutrition.html'))
+
+def test_fetched_product_is_stored_as_a_record(tmp_path):
+    pytest.importorskip('requests')
+    from item_store import ItemStore
+    from page_cache import PageCache
+
+    cache, store = PageCache(str(tmp_path / 'cache.db')), ItemStore(str(tmp_path / 'cache.db'))
+    session = Session()
+    url = "https://www.starbucks.com/menu/product/1/hot"
+    fetched = StarbucksScraper(cache=cache, store=store).fetch_product(url, session=session)
+
+    assert fetched == MenuItem('Caffè Latte', 190, 13, 19, 7, None, allergen_bits('M'))
+    assert cache.get_fresh(f"{url}/nutrition") == fetched.to_record()
+    # A later run takes it from the store without fetching
+    assert StarbucksScraper(cache=cache, store=store).fetch_product(url, session=session) == fetched
+    assert session.requests == 1
+    cache.close()
+    store.close()
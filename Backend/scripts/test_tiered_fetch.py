@@ -0,0 +1,125 @@
+"""TieredFetcher tier learning: which HTTP outcomes escalate a URL pattern to the browser."""
+import os
+
+import pytest
+
+requests = pytest.importorskip('requests')
+
+import tiered_fetch
+from fetch_control import CONTROLLER
+from tiered_fetch import ESCALATE_AFTER, TieredFetcher, url_pattern
+
+URL = "https://www.starbucks.com/menu/product/{}/hot/nutrition"
+
+class Response:
+    def __init__(self, status_code, text=''):
+        self.status_code = status_code
+        self.text = text
+        self.headers = {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} error")
+
+class Session:
+    """Answers each GET with the next outcome: a Response, or an exception to raise"""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.requests = 0
+
+    def get(self, url, **kwargs):
+        self.requests += 1
+        outcome = self.outcomes.pop(0) if len(self.outcomes) > 1 else self.outcomes[0]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+class Driver:
+    page_source = '<div id="nutrition">190</div>'
+
+    def get(self, url):
+        pass
+
+def parse(html):
+    return html if 'nutrition' in html else None
+
+@pytest.fixture(autouse=True)
+def no_retries(monkeypatch):
+    monkeypatch.setattr(CONTROLLER, 'retries', 0)
+    monkeypatch.setattr(CONTROLLER, 'breaker_threshold', 1000)
+    CONTROLLER.reset()
+    yield
+    CONTROLLER.reset()
+
+def fetch_all(fetcher, session, count):
+    return [fetcher.fetch(URL.format(i), session, parse, get_driver=Driver)[0] for i in range(1, count + 1)]
+
+def tier(fetcher):
+    return fetcher.patterns[url_pattern(URL.format(1))]['tier']
+
+def test_pages_without_content_escalate_to_the_browser():
+    fetcher = TieredFetcher('test')
+    session = Session(Response(200, '<div id="root"></div>'))
+
+    assert fetch_all(fetcher, session, ESCALATE_AFTER + 2) == ['browser'] * (ESCALATE_AFTER + 2)
+    # The GET is skipped once the pattern has been learned
+    assert session.requests == ESCALATE_AFTER
+    assert tier(fetcher) == 'browser'
+
+@pytest.mark.parametrize('failure', [
+    requests.Timeout('read timed out'),
+    requests.ConnectionError('connection reset by peer'),
+    Response(503),
+    Response(404),
+])
+def test_transient_failures_are_not_misses(failure):
+    fetcher = TieredFetcher('test')
+    session = Session(failure)
+
+    fetch_all(fetcher, session, ESCALATE_AFTER + 2)
+
+    # Every page still tried HTTP first
+    assert session.requests == ESCALATE_AFTER + 2
+    assert tier(fetcher) == 'http'
+
+def test_http_success_resets_misses():
+    fetcher = TieredFetcher('test')
+    missing, found = Response(200, '<div id="root"></div>'), Response(200, '<div id="nutrition">190</div>')
+    session = Session(*([missing] * (ESCALATE_AFTER - 1) + [found] + [missing] * (ESCALATE_AFTER - 1) + [found]))
+
+    fetch_all(fetcher, session, 2 * ESCALATE_AFTER)
+
+    assert tier(fetcher) == 'http'
+
+def test_browser_tier_expires(monkeypatch):
+    fetcher = TieredFetcher('test')
+    missing, found = Response(200, '<div id="root"></div>'), Response(200, '<div id="nutrition">190</div>')
+    session = Session(*([missing] * ESCALATE_AFTER + [found]))
+    fetch_all(fetcher, session, ESCALATE_AFTER)
+    assert tier(fetcher) == 'browser'
+
+    monkeypatch.setattr(tiered_fetch, 'BROWSER_TIER_TTL', 0)
+
+    # Expired: HTTP is tried again, and works now
+    assert fetch_all(fetcher, session, 1) == ['http']
+    assert tier(fetcher) == 'http'
+
+def test_zero_valued_panel_stays_on_http():
+    pytest.importorskip('bs4')
+    from starbucks_scraper import StarbucksScraper
+
+    scraper = StarbucksScraper(base_url="https://www.starbucks.com")
+    fixture = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks', 'fixtures',
+                           'starbucks_nutrition_zero.html')
+    with open(fixture, encoding='utf-8') as f:
+        session = Session(Response(200, f.read()))
+
+    # Zero-calorie teas in a row are still pages with their content
+    for i in range(1, ESCALATE_AFTER + 3):
+        item = scraper.fetch_product(f"https://www.starbucks.com/menu/product/{i}/iced", session=session)
+        assert (item.name, item.calories) == ('Iced Black Tea', 0)
+
+    assert session.requests == ESCALATE_AFTER + 2
+    entry = scraper.fetcher.patterns[url_pattern("https://www.starbucks.com/menu/product/1/iced/nutrition")]
+    assert (entry['tier'], entry['misses']) == ('http', 0)
@@ -0,0 +1,154 @@
+"""Fetch pages over plain HTTP and escalate to a browser only when needed.
+
+A TieredFetcher GETs a page through the shared fetch controller and
+hands the HTML to a parse callback, which returns None when the page is
+missing what it needs (typically because the content is rendered
+client-side and the required selectors aren't in the HTML yet). Only
+then is the page loaded in the browser. Which tier served each URL
+pattern is remembered, so a pattern that keeps needing the browser
+skips the wasted GET, apart from an occasional probe in case the site
+starts rendering it server-side. Only responses that arrived without
+the content count against HTTP; timeouts, connection resets and error
+statuses don't, and a learned browser tier expires after
+BROWSER_TIER_TTL. Pages served per tier are counted in the source's run
+metrics as tier_http / tier_browser / tier_cache.
+"""
+import re
+import threading
+import time
+from urllib.parse import urlsplit
+
+from fetch_control import CONTROLLER, CircuitOpenError
+from run_metrics import metrics_for
+from scraper_common import load_page
+
+TIERS = ['cache', 'http', 'browser']
+
+# HTTP misses in a row before a pattern goes straight to the browser
+ESCALATE_AFTER = 2
+
+# A browser-only pattern still tries HTTP for one URL in this many
+PROBE_EVERY = 20
+
+# Seconds a pattern stays browser-only before HTTP is trusted again
+BROWSER_TIER_TTL = 15 * 60
+
+NUMBER_SEGMENT = re.compile(r'^\d+$')
+
+def url_pattern(url):
+    """URL with numeric path segments wildcarded, e.g. /menu/product/{n}/hot/nutrition"""
+    parts = urlsplit(url)
+    path = '/'.join('{n}' if NUMBER_SEGMENT.match(segment) else segment for segment in parts.path.split('/'))
+    return f"{parts.netloc}{path}"
+
+def selectors_present(soup, selectors):
+    """True if every CSS selector matches something in soup"""
+    return all(soup.select_one(selector) is not None for selector in selectors)
+
+class TieredFetcher:
+    """HTTP-first page fetcher for one source. Safe to share between worker threads."""
+
+    def __init__(self, source):
+        self.source = source
+        self.metrics = metrics_for(source)
+        self.patterns = {}
+        self.lock = threading.Lock()
+
+    def entry(self, pattern):
+        """Tier memory and per-tier page counts for pattern; call with self.lock held"""
+        if pattern not in self.patterns:
+            self.patterns[pattern] = {'tier': 'http', 'misses': 0, 'seen': 0, 'escalated_at': None,
+                                      **{tier: 0 for tier in TIERS}}
+        return self.patterns[pattern]
+
+    def record(self, tier, pattern=None):
+        """Count a page served by tier, e.g. 'cache' for a page the caller already had"""
+        self.metrics.add(f'tier_{tier}', 1)
+        if pattern is None:
+            return
+        with self.lock:
+            self.entry(pattern)[tier] += 1
+
+    def use_http(self, pattern):
+        with self.lock:
+            entry = self.patterns.get(pattern)
+            if entry is None or entry['tier'] == 'http':
+                return True
+            if time.monotonic() - entry['escalated_at'] >= BROWSER_TIER_TTL:
+                # The verdict has expired; start over on HTTP
+                entry['tier'] = 'http'
+                entry['misses'] = 0
+                return True
+            entry['seen'] += 1
+            return entry['seen'] % PROBE_EVERY == 0
+
+    def learn(self, pattern, http_worked):
+        """Record whether a page that HTTP did return had the content parse needs
+
+        Only missing content counts as a miss; all-zero values are content too.
+        """
+        with self.lock:
+            entry = self.entry(pattern)
+            if http_worked:
+                entry['tier'] = 'http'
+                entry['misses'] = 0
+            else:
+                entry['misses'] += 1
+                if entry['misses'] >= ESCALATE_AFTER and entry['tier'] != 'browser':
+                    entry['tier'] = 'browser'
+                    entry['escalated_at'] = time.monotonic()
+
+    def fetch(self, url, session, parse, get_driver=None, wait=None):
+        """Return (tier, parse(html)) for url, or (None, None) if no tier produced a result
+
+        parse(html) returns None when the page lacks what it needs, which
+        escalates to the browser; content that parses to zeros is still a
+        result and must not come back as None. get_driver() is only called
+        then, so a caller's browser can start lazily; wait(driver), if
+        given, runs after the browser load and before the page source is
+        read.
+        """
+        import requests
+
+        pattern = url_pattern(url)
+        if self.use_http(pattern):
+            result = None
+            responded = False
+            try:
+                with self.metrics.phase('http_fetch'):
+                    response = CONTROLLER.get(session, url, self.source, timeout=15)
+                response.raise_for_status()
+                responded = True
+                result = parse(response.text)
+            except (requests.RequestException, CircuitOpenError) as e:
+                print(f"    HTTP fetch failed, using browser: {e}")
+            # Only a page that came back without its content says anything about the tier
+            if responded:
+                self.learn(pattern, result is not None)
+            if result is not None:
+                self.record('http', pattern)
+                return 'http', result
+
+        if get_driver is None:
+            return None, None
+
+        driver = get_driver()
+        load_page(driver, url, self.metrics)
+        if wait:
+            wait(driver)
+        result = parse(driver.page_source)
+        if result is None:
+            return None, None
+        self.record('browser', pattern)
+        return 'browser', result
+
+    def print_summary(self):
+        """Print pages per tier for each URL pattern and the tier each settled on"""
+        with self.lock:
+            patterns = sorted(self.patterns.items())
+        if not patterns:
+            return
+        print(f"\nFetch tiers ({self.source}):")
+        for pattern, entry in patterns:
+            counts = ', '.join(f"{tier} {entry[tier]}" for tier in TIERS if entry[tier])
+            print(f"  {pattern}: {counts or 'no pages'} -> {entry['tier']}")
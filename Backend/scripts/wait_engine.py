@@ -0,0 +1,166 @@
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, StaleElementReferenceException
+import weakref
+import time
+
+# Per-step timeouts in seconds; override by passing timeouts to WaitEngine
+DEFAULT_TIMEOUTS = {
+    'page_load': 15,
+    'view_menus': 10,
+    'menu_items': 10,
+    'scroll': 2,
+    'item_clickable': 5,
+    'modal_open': 10,
+    'modal_values': 5,
+    'modal_close': 3,
+    'network_idle': 5,
+    'cookie_banner': 3,
+    'category_links': 10,
+    'nutrition_section': 10
+}
+
+# Polling interval for every condition
+POLL_FREQUENCY = 0.1
+
+_engines = weakref.WeakKeyDictionary()
+
+def document_ready():
+    """Condition: the document has finished loading"""
+    def check(driver):
+        return driver.execute_script("return document.readyState") == 'complete'
+    return check
+
+def network_idle(quiet_period=0.5):
+    """Condition: no new resource requests have started for quiet_period seconds"""
+    state = {'count': -1, 'since': time.monotonic()}
+
+    def check(driver):
+        count = driver.execute_script(
+            "return document.readyState === 'complete' ? "
+            "performance.getEntriesByType('resource').length : -1"
+        )
+        now = time.monotonic()
+        if count != state['count']:
+            state['count'] = count
+            state['since'] = now
+            return False
+        return count >= 0 and now - state['since'] >= quiet_period
+    return check
+
+def element_present(locator):
+    """Condition: at least one element matches locator"""
+    return EC.presence_of_element_located(locator)
+
+def element_clickable(target):
+    """Condition: a locator or an element is visible and enabled"""
+    return EC.element_to_be_clickable(target)
+
+def element_gone(locator):
+    """Condition: no visible element matches locator (removed or hidden)"""
+    return EC.invisibility_of_element_located(locator)
+
+def element_in_viewport(element):
+    """Condition: the element's box is inside the viewport"""
+    def check(driver):
+        return driver.execute_script(
+            "var r = arguments[0].getBoundingClientRect();"
+            "return r.top >= 0 && r.bottom <= window.innerHeight;",
+            element
+        )
+    return check
+
+def text_matches(locator, pattern):
+    """Condition: an element matching locator has text matching the regex pattern"""
+    def check(driver):
+        for element in driver.find_elements(*locator):
+            if pattern.search(element.text or ''):
+                return element
+        return False
+    return check
+
+class WaitEngine:
+    """Waits on concrete page conditions and records how long each wait took"""
+
+    def __init__(self, driver, timeouts=None, metrics=None):
+        self.driver = driver
+        self.metrics = metrics
+        self.timeouts = dict(DEFAULT_TIMEOUTS)
+        if timeouts:
+            self.timeouts.update(timeouts)
+        self.records = []
+
+    def until(self, step, condition, timeout=None):
+        """Wait for condition, raising TimeoutException after the step's timeout"""
+        timeout = timeout if timeout is not None else self.timeouts.get(step, 10)
+        start = time.perf_counter()
+        try:
+            result = WebDriverWait(
+                self.driver, timeout,
+                poll_frequency=POLL_FREQUENCY,
+                ignored_exceptions=(StaleElementReferenceException,)
+            ).until(condition)
+            self.add_record(step, time.perf_counter() - start, True)
+            return result
+        except TimeoutException:
+            self.add_record(step, time.perf_counter() - start, False)
+            raise
+
+    def add_record(self, step, elapsed, ok):
+        self.records.append((step, elapsed, ok))
+        if self.metrics is not None:
+            self.metrics.record(f"wait.{step}", elapsed, ok)
+
+    def maybe(self, step, condition, timeout=None):
+        """Wait for condition, returning False instead of raising on timeout"""
+        try:
+            return self.until(step, condition, timeout)
+        except TimeoutException:
+            return False
+
+    def summary(self):
+        """Return {step: {'count', 'timeouts', 'total', 'max'}} over recorded waits"""
+        return summarize(self.records)
+
+    def print_summary(self):
+        """Print time spent waiting per step"""
+        print_wait_summary(self.records)
+
+def summarize(records):
+    """Group (step, seconds, ok) wait records into per-step stats"""
+    stats = {}
+    for step, elapsed, ok in records:
+        entry = stats.setdefault(step, {'count': 0, 'timeouts': 0, 'total': 0.0, 'max': 0.0})
+        entry['count'] += 1
+        entry['total'] += elapsed
+        entry['max'] = max(entry['max'], elapsed)
+        if not ok:
+            entry['timeouts'] += 1
+    return stats
+
+def print_wait_summary(records):
+    """Print time spent waiting per step, e.g. for records merged from several drivers"""
+    stats = summarize(records)
+    if not stats:
+        return
+    print("\nWait times:")
+    for step, entry in stats.items():
+        avg = entry['total'] / entry['count']
+        print(f"  {step}: {entry['count']} waits, avg {avg:.2f}s, max {entry['max']:.2f}s, "
+              f"total {entry['total']:.1f}s, {entry['timeouts']} timeouts")
+
+def waits_for(driver, timeouts=None, metrics=None):
+    """Return the WaitEngine attached to driver, creating it on first use.
+
+    Passing a RunMetrics also reports every wait as a 'wait.<step>' phase.
+    """
+    engine = _engines.get(driver)
+    if engine is None:
+        engine = WaitEngine(driver, timeouts, metrics)
+        _engines[driver] = engine
+    else:
+        if timeouts:
+            engine.timeouts.update(timeouts)
+        if metrics is not None:
+            engine.metrics = metrics
+    return engine